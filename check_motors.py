@@ -1,31 +1,225 @@
 import os
+import sys
+import json
+import time
+import argparse
+import concurrent.futures
 from dynamixel_sdk import * # Uses Dynamixel SDK library
+from hardware.sim_bus import create_port_handler
 
 # ==============================================================================
 # ⚙️ 설정 (Herobot Hardware Setup)
 # ==============================================================================
-DEVICENAME          = '/dev/ttyUSB0'    # 포트 이름
+DEVICENAME          = os.getenv("HEROBOT_PORT", '/dev/ttyUSB0')    # 포트 이름 ("sim" 이면 시뮬레이션 버스)
 BAUDRATE            = 57600     # 통신 속도
 PROTOCOL_VERSION    = 2.0       # 프로토콜 버전
+SPEC_PATH           = "config/hardware_spec.json"
 
 # 2XL430 / XC430 / XL330 등 X-Series 공통 주소
 ADDR_PRESENT_POSITION = 132     # 현재 위치 주소 (4 Byte)
 ADDR_MODEL_NUMBER     = 0       # 모델 번호 주소 (2 Byte)
 
+# ★ 빠른 스캔: Present Current(126) ~ Present Temperature(146) 를 Sync Read 한 번으로
+ADDR_STATUS_BLOCK     = 126
+LEN_STATUS_BLOCK      = 21      # 126..146
+STATUS_FIELDS = {              # 이름: (블록 내 오프셋, 길이, 부호)
+    "current":     (0, 2, True),
+    "velocity":    (2, 4, True),
+    "position":    (6, 4, True),
+    "voltage":     (18, 2, False),
+    "temperature": (20, 1, False),
+}
+
 # 스캔할 ID 범위 (1번부터 20번까지만 스캔해봅니다)
 MAX_ID_SCAN         = 20
+# 브로드캐스트 핑 응답을 기다릴 최대 ID (ID 당 약 3ms 의 응답 슬롯)
+MAX_ID_PING         = 32
+# --sweep 시 시도할 보드레이트
+SWEEP_BAUDRATES     = [57600, 1000000, 115200, 2000000, 3000000, 4000000, 9600]
+
+MODEL_NAMES = {
+    1090: "2XL430-W250", 1060: "XL430-W250", 1030: "XM430-W210", 1020: "XM430-W350",
+    1070: "XC430-W150", 1080: "XC430-W240", 1190: "XL330-M077", 1200: "XL330-M288",
+}
 # ==============================================================================
 
-def main():
+
+def model_name(model_number):
+    return MODEL_NAMES.get(model_number, f"Model-{model_number}")
+
+
+def fast_ping(portHandler, packetHandler, max_id=MAX_ID_PING):
+    """
+    ★ 브로드캐스트 핑 (트랜잭션 1회)
+    - SDK 의 broadcastPing 은 ID 252개 분량(57600bps 에서 약 1.4초)을 항상 기다리므로,
+      max_id 까지의 응답 슬롯만 기다리도록 직접 수신
+    - 반환: {ID: (모델 번호, 펌웨어 버전)}
+    """
+    txpacket = [0] * 10
+    txpacket[PKT_ID] = BROADCAST_ID
+    txpacket[PKT_LENGTH_L] = 3
+    txpacket[PKT_LENGTH_H] = 0
+    txpacket[PKT_INSTRUCTION] = INST_PING
+
+    result = packetHandler.txPacket(portHandler, txpacket)
+    portHandler.is_using = False
+    if result != COMM_SUCCESS:
+        return {}
+
+    STATUS_LENGTH = 14
+    tx_time_per_byte = 10000.0 / portHandler.getBaudRate()
+    portHandler.setPacketTimeoutMillis(STATUS_LENGTH * max_id * tx_time_per_byte + 3.0 * max_id + 16.0)
+
+    rxpacket = []
+    while not portHandler.isPacketTimeout():
+        rxpacket += portHandler.readPort(STATUS_LENGTH * max_id - len(rxpacket))
+
+    found = {}
+    idx = 0
+    while idx + STATUS_LENGTH <= len(rxpacket):
+        if rxpacket[idx:idx + 3] != [0xFF, 0xFF, 0xFD]:
+            idx += 1
+            continue
+        packet = rxpacket[idx:idx + STATUS_LENGTH]
+        crc = DXL_MAKEWORD(packet[12], packet[13])
+        if packetHandler.updateCRC(0, packet, STATUS_LENGTH - 2) == crc:
+            found[packet[PKT_ID]] = (DXL_MAKEWORD(packet[9], packet[10]), packet[11])
+            idx += STATUS_LENGTH
+        else:
+            idx += 1
+    return found
+
+
+def read_status(portHandler, packetHandler, ids):
+    """찾은 모든 ID 의 상태 블록을 Sync Read 한 번으로 읽기 → {ID: {필드: 값}}"""
+    group = GroupSyncRead(portHandler, packetHandler, ADDR_STATUS_BLOCK, LEN_STATUS_BLOCK)
+    for dxl_id in ids:
+        group.addParam(dxl_id)
+    group.txRxPacket()
+
+    status = {}
+    for dxl_id in ids:
+        if not group.isAvailable(dxl_id, ADDR_STATUS_BLOCK, LEN_STATUS_BLOCK):
+            continue
+        raw = group.data_dict[dxl_id]
+        status[dxl_id] = {
+            name: int.from_bytes(bytes(raw[offset:offset + length]), 'little', signed=signed)
+            for name, (offset, length, signed) in STATUS_FIELDS.items()
+        }
+    return status
+
+
+def scan_port(port_name, spec, baudrates, max_id=MAX_ID_PING):
+    """
+    포트 하나를 주어진 보드레이트들로 스캔
+    - 반환: [(보드레이트, {ID: 정보})]  (응답이 있는 보드레이트만)
+    """
+    portHandler = create_port_handler(port_name, spec)
+    packetHandler = PacketHandler(PROTOCOL_VERSION)
+    if not portHandler.openPort():
+        print(f"❌ 포트 열기 실패: {port_name}")
+        return []
+
+    hits = []
+    try:
+        for baudrate in baudrates:
+            if not portHandler.setBaudRate(baudrate):
+                print(f"❌ 보드레이트 설정 실패: {port_name} @ {baudrate}")
+                continue
+            found = fast_ping(portHandler, packetHandler, max_id)
+            if not found:
+                continue
+            status = read_status(portHandler, packetHandler, sorted(found))
+            motors = {}
+            for dxl_id, (model_number, firmware) in found.items():
+                motors[dxl_id] = dict(model=model_number, firmware=firmware, **status.get(dxl_id, {}))
+            hits.append((baudrate, motors))
+    finally:
+        portHandler.closePort()
+    return hits
+
+
+def report(port_name, baudrate, motors, spec):
+    """스캔 결과 표 + 스펙(hardware_spec.json)과의 차이"""
+    expected = {m['id']: m for m in spec['motors']}
+
+    print(f"\n📍 {port_name} @ {baudrate}bps")
+    print("=" * 86)
+    print(f"{'ID':<4} | {'이름':<17} | {'모델':<12} | {'FW':<3} | {'위치':>6} | {'전압':>5} | {'온도':>4} | 상태")
+    print("=" * 86)
+
+    for dxl_id in sorted(motors):
+        m = motors[dxl_id]
+        info = expected.get(dxl_id)
+        name = info['name'] if info else "-"
+        position = m.get('position', '-')
+        voltage = f"{m['voltage'] / 10:.1f}V" if 'voltage' in m else "-"
+        temperature = f"{m['temperature']}℃" if 'temperature' in m else "-"
+
+        if info is None:
+            state = "❓ 스펙에 없음"
+        elif 'position' not in m:
+            state = "⚠️ 상태 읽기 실패"
+        elif info.get('model') and not info['model'].startswith(model_name(m['model'])):
+            state = f"⚠️ 모델 불일치 (스펙: {info['model']})"
+        elif info.get('type') != 'wheel' and not info['min'] <= position <= info['max']:
+            state = f"⚠️ 범위 밖 ({info['min']}~{info['max']})"
+        else:
+            state = "🟢 정상"
+        print(f"{dxl_id:<4} | {name:<17} | {model_name(m['model']):<12} | {m['firmware']:<3} | "
+              f"{position:>6} | {voltage:>5} | {temperature:>4} | {state}")
+
+    print("=" * 86)
+    missing = [expected[i]['name'] + f"({i})" for i in sorted(expected) if i not in motors]
+    extra = [str(i) for i in sorted(motors) if i not in expected]
+    if missing:
+        print(f"🚫 없는 모터 {len(missing)}개: {', '.join(missing)}")
+    if extra:
+        print(f"❓ 스펙에 없는 모터 {len(extra)}개: ID {', '.join(extra)}")
+    return missing, extra
+
+
+def fast_scan(ports, spec, sweep=False, max_id=MAX_ID_PING):
+    """
+    ★ 빠른 스캔: 브로드캐스트 핑 1회 + Sync Read 1회
+    - sweep=True 면 보드레이트를 순회 (포트별로 병렬)
+    """
+    baudrates = SWEEP_BAUDRATES if sweep else [spec['robot_info'].get('default_baudrate', BAUDRATE)]
+    t0 = time.monotonic()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(ports)) as pool:
+        results = dict(zip(ports, pool.map(lambda p: scan_port(p, spec, baudrates, max_id), ports)))
+    elapsed = time.monotonic() - t0
+
+    seen = {}
+    for port_name in ports:
+        for baudrate, motors in results[port_name]:
+            report(port_name, baudrate, motors, spec)
+            for dxl_id in motors:
+                seen.setdefault(dxl_id, []).append(f"{port_name}@{baudrate}")
+
+    expected = {m['id'] for m in spec['motors']}
+    print(f"\n🏁 스캔 완료 ({elapsed * 1000:.0f}ms). 스펙 {len(expected)}개 중 {len(expected & set(seen))}개 발견.")
+    duplicated = {i: where for i, where in seen.items() if len(where) > 1}
+    if duplicated:
+        print(f"⚠️ 여러 포트/보드레이트에서 발견된 ID: {duplicated}")
+    return len(expected - set(seen)) == 0
+
+
+def legacy_scan(port_name=DEVICENAME):
+    """기존 방식: ID 를 하나씩 PING + 위치 읽기"""
+    with open(SPEC_PATH, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
     # 1. 포트 핸들러 & 패킷 핸들러 초기화
-    portHandler = PortHandler(DEVICENAME)
+    portHandler = create_port_handler(port_name, spec)
     packetHandler = PacketHandler(PROTOCOL_VERSION)
 
     # 2. 포트 열기
     if portHandler.openPort():
-        print(f"✅ 포트 열기 성공: {DEVICENAME}")
+        print(f"✅ 포트 열기 성공: {port_name}")
     else:
-        print(f"❌ 포트 열기 실패: {DEVICENAME}")
+        print(f"❌ 포트 열기 실패: {port_name}")
         print("   - 케이블이 연결되었는지, 포트 번호가 맞는지 확인하세요.")
         exit()
 
@@ -47,29 +241,46 @@ def main():
     for dxl_id in range(1, MAX_ID_SCAN + 1):
         # (1) PING을 보내서 모터가 존재하는지 확인
         model_number, result, error = packetHandler.ping(portHandler, dxl_id)
-        
+
         if result == COMM_SUCCESS:
             # (2) 존재한다면 현재 위치값 읽기
             present_pos, result_pos, error_pos = packetHandler.read4ByteTxRx(
                 portHandler, dxl_id, ADDR_PRESENT_POSITION
             )
-            
-            # 모델명 매핑 (2XL430 확인용)
-            model_name = "Unknown"
-            if model_number == 1090: model_name = "2XL430-W250" # 예시
-            else: model_name = f"Model-{model_number}"
+
+            # 모델명 매핑
+            name = model_name(model_number)
 
             if result_pos == COMM_SUCCESS:
-                print(f"{dxl_id:<5} | {model_name:<20} | {present_pos:<15} | 🟢 연결됨")
+                print(f"{dxl_id:<5} | {name:<20} | {present_pos:<15} | 🟢 연결됨")
                 found_count += 1
             else:
-                print(f"{dxl_id:<5} | {model_name:<20} | {'ERROR':<15} | ⚠️ 위치 읽기 실패")
+                print(f"{dxl_id:<5} | {name:<20} | {'ERROR':<15} | ⚠️ 위치 읽기 실패")
 
     print("=" * 60)
     print(f"🏁 스캔 완료. 총 {found_count}개의 모터를 찾았습니다.\n")
-    
+
     # 포트 닫기
     portHandler.closePort()
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Herobot 다이나믹셀 점검")
+    parser.add_argument("--ports", default=DEVICENAME, help="쉼표로 구분한 포트 목록 (sim 가능)")
+    parser.add_argument("--sweep", action="store_true", help="지원 보드레이트 전체 스캔")
+    parser.add_argument("--max-id", type=int, default=MAX_ID_PING, help="브로드캐스트 핑 응답 대기 최대 ID")
+    parser.add_argument("--legacy", action="store_true", help="ID 별 개별 PING 스캔 (기존 방식)")
+    args = parser.parse_args()
+
+    if args.legacy:
+        legacy_scan(args.ports.split(",")[0])
+        return
+
+    with open(SPEC_PATH, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    ok = fast_scan(args.ports.split(","), spec, sweep=args.sweep, max_id=args.max_id)
+    sys.exit(0 if ok else 1)
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
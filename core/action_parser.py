@@ -0,0 +1,108 @@
+import json
+
+
+class ActionStreamParser:
+    """
+    ★ {"text": ..., "motions": [...]} 응답을 스트리밍으로 파싱
+    - feed(chunk) 는 이번 조각으로 문법적으로 완성된 motions 원소(dict)들을 돌려줌
+    - 전체 응답을 기다리지 않으므로 첫 번째 동작을 수십 토큰 만에 실행할 수 있음
+    - 문자열/이스케이프 상태와 괄호 깊이만 추적하는 1-pass 스캐너 (이미 본 문자는 다시 보지 않음)
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.text = None
+        self.motions = []
+
+        self._pos = 0
+        self._stack = []          # 열린 괄호 ('{' / '[')
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False  # 최상위 객체에서 다음 문자열이 키인지
+        self._last_key = None
+        self._motions_depth = None
+        self._element_start = None
+
+    def feed(self, chunk):
+        """조각을 추가하고 새로 완성된 motion 들을 반환"""
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._on_string(buf[self._string_start:i + 1])
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in '{[':
+                if (c == '{' and self._motions_depth is not None
+                        and len(self._stack) == self._motions_depth):
+                    self._element_start = i
+                if c == '[' and len(self._stack) == 1 and self._last_key == 'motions':
+                    self._motions_depth = 2
+                self._stack.append(c)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+            elif c in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if (c == '}' and self._element_start is not None
+                        and len(self._stack) == self._motions_depth):
+                    motion = self._parse_element(buf[self._element_start:i + 1])
+                    self._element_start = None
+                    if motion is not None:
+                        self.motions.append(motion)
+                        completed.append(motion)
+                elif c == ']' and self._motions_depth is not None and len(self._stack) < self._motions_depth:
+                    self._motions_depth = None
+            elif len(self._stack) == 1:
+                if c == ',':
+                    self._expect_key = True
+                elif c == ':':
+                    self._expect_key = False
+
+        self._pos = len(buf)
+        return completed
+
+    def _on_string(self, raw):
+        if len(self._stack) != 1:
+            return
+        if self._expect_key:
+            self._last_key = json.loads(raw)
+        elif self._last_key == 'text':
+            self.text = json.loads(raw)
+
+    @staticmethod
+    def _parse_element(raw):
+        try:
+            motion = json.loads(raw)
+        except json.JSONDecodeError:
+            print(f"⚠️ [Parser] 잘못된 motion 무시: {raw[:60]}")
+            return None
+        return motion if isinstance(motion, dict) else None
+
+    def finish(self):
+        """스트림 종료 후 전체 계획. 전체 JSON 이 깨졌으면 지금까지 파싱한 부분으로 구성"""
+        try:
+            plan = json.loads(self.buffer)
+            if isinstance(plan, dict):
+                return plan
+        except json.JSONDecodeError:
+            pass
+        plan = {"motions": list(self.motions)}
+        if self.text is not None:
+            plan["text"] = self.text
+        return plan
+
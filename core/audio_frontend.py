@@ -0,0 +1,366 @@
+import os
+import time
+import threading
+import numpy as np
+
+try:
+    import webrtcvad  # 선택 사항: 설치되어 있으면 에너지 VAD 와 함께 사용
+except ImportError:
+    webrtcvad = None
+
+
+class SpeechSegment:
+    """링 버퍼 위의 발화 구간 [start, end) (프레임 단위, 누적 인덱스)"""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.gaps = []
+
+    def __len__(self):
+        return self.end - self.start
+
+
+class AudioFrontEnd:
+    """
+    ★ 온디바이스 오디오 프런트엔드
+    - PyAudio 스트림을 한 번만 열어 계속 켜 두고, 30ms 프레임을 NumPy 링 버퍼에 기록
+    - 프레임마다 VAD(에너지 + 선택적으로 webrtcvad) 판정, 소음 기준은 무음 구간에서 계속 갱신
+      (매 호출마다 adjust_for_ambient_noise 를 다시 돌릴 필요 없음)
+    - 소비자는 누적 프레임 인덱스로 구간을 요청하므로 마이크를 다시 열지 않고
+      호출어 직후의 오디오를 그대로 이어서 읽을 수 있음
+    """
+
+    def __init__(self, device_index=24, rate=16000, frame_ms=30, buffer_seconds=30,
+                 vad_ratio=3.0, min_energy=150.0):
+        self.device_index = device_index
+        self.rate = rate
+        self.frame = rate * frame_ms // 1000
+        self.frame_sec = frame_ms / 1000.0
+        self.n_frames = int(buffer_seconds / self.frame_sec)
+
+        self.samples = np.zeros((self.n_frames, self.frame), dtype=np.int16)
+        self.energy = np.zeros(self.n_frames, dtype=np.float32)
+        self.voiced = np.zeros(self.n_frames, dtype=bool)
+        self.frames_written = 0
+
+        self.vad_ratio = vad_ratio
+        self.min_energy = min_energy
+        self.noise_floor = None
+        self.vad = webrtcvad.Vad(2) if webrtcvad is not None else None
+
+        self._cond = threading.Condition()
+        self._pa = None
+        self._stream = None
+
+    def start(self, calibrate_sec=0.5):
+        import pyaudio
+
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+            input_device_index=self.device_index, frames_per_buffer=self.frame,
+            stream_callback=self._callback,
+        )
+        self._stream.start_stream()
+
+        # 첫 구간으로 소음 기준 초기화
+        self.wait_frames(int(calibrate_sec / self.frame_sec))
+        print(f"✅ [Audio] 마이크 스트림 시작 (소음 기준 RMS {self.noise_floor:.0f}, "
+              f"VAD: {'webrtcvad+energy' if self.vad else 'energy'})")
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        import pyaudio
+
+        chunk = np.frombuffer(in_data, dtype=np.int16)
+        for offset in range(0, len(chunk) - self.frame + 1, self.frame):
+            self.push_frame(chunk[offset:offset + self.frame])
+        return None, pyaudio.paContinue
+
+    def push_frame(self, frame):
+        """프레임 하나 기록 + VAD 판정 (오디오 콜백 스레드)"""
+        slot = self.frames_written % self.n_frames
+        self.samples[slot] = frame
+        rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+        self.energy[slot] = rms
+
+        if self.noise_floor is None:
+            self.noise_floor = max(rms, 1.0)
+
+        voiced = rms > max(self.noise_floor * self.vad_ratio, self.min_energy)
+        if voiced and self.vad is not None:
+            voiced = self.vad.is_speech(frame.tobytes(), self.rate)
+        self.voiced[slot] = voiced
+
+        # 무음 프레임으로만 소음 기준을 천천히 추적 (내려갈 때는 빠르게)
+        if not voiced:
+            alpha = 0.2 if rms < self.noise_floor else 0.02
+            self.noise_floor += alpha * (rms - self.noise_floor)
+
+        with self._cond:
+            self.frames_written += 1
+            self._cond.notify_all()
+
+    def wait_frames(self, index, timeout=None):
+        """누적 프레임 수가 index 이상이 될 때까지 대기"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.frames_written >= index, timeout=timeout)
+
+    def next_segment(self, cursor, pause=0.8, max_len=10.0, start_timeout=None,
+                     min_speech=0.09, preroll=0.3, on_pause=None, partial_pause=0.25):
+        """
+        cursor 프레임 이후 첫 발화 구간을 찾아 반환
+        - pause: 이 시간만큼 무음이 이어지면 발화 종료
+          (함수면 지금까지 말한 시간(초) → pause: 짧은 명령은 짧게 끊는 적응형 끝 판정용)
+        - start_timeout: 이 시간 안에 발화가 시작되지 않으면 None
+        - preroll: 첫 음절이 잘리지 않도록 시작점 앞을 조금 포함
+        - on_pause(start, end): 발화 중 무음이 partial_pause 만큼 이어질 때마다 한 번 호출
+          (end = 말이 멈춘 프레임, 부분 인식용)
+        반환 구간의 gaps 에는 말이 다시 이어진 문장 안 쉼의 길이(초)가 담김
+        """
+        pause_of = pause if callable(pause) else (lambda speech_sec: pause)
+        partial_frames = max(1, int(partial_pause / self.frame_sec))
+        max_frames = int(max_len / self.frame_sec)
+        min_frames = max(1, int(min_speech / self.frame_sec))
+        preroll_frames = int(preroll / self.frame_sec)
+        deadline = None if start_timeout is None else time.monotonic() + start_timeout
+
+        # 1. 발화 시작 (연속 voiced 프레임 min_frames 개)
+        i = max(cursor, self.frames_written - self.n_frames + 1)
+        run = 0
+        while run < min_frames:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            if not self.wait_frames(i + 1, timeout=remaining):
+                return None
+            run = run + 1 if self.voiced[i % self.n_frames] else 0
+            i += 1
+        start = max(i - min_frames - preroll_frames, cursor, self.frames_written - self.n_frames + 1)
+
+        # 2. 발화 종료 (무음 pause_frames 개 또는 최대 길이)
+        silence = 0
+        gaps = []
+        pause_frames = max(1, int(pause_of((i - start) * self.frame_sec) / self.frame_sec))
+        while silence < pause_frames and i - start < max_frames:
+            self.wait_frames(i + 1)
+            if self.voiced[i % self.n_frames]:
+                if silence:
+                    gaps.append(silence * self.frame_sec)
+                silence = 0
+            else:
+                silence += 1
+                if silence == 1:
+                    # 말이 멈춘 순간에 지금까지 말한 길이로 pause 를 다시 정함
+                    pause_frames = max(1, int(pause_of((i - start) * self.frame_sec) / self.frame_sec))
+                if silence == partial_frames and on_pause is not None:
+                    on_pause(start, i + 1 - silence)
+            i += 1
+        segment = SpeechSegment(start, i - silence)
+        segment.gaps = gaps
+        return segment
+
+    def voiced_since(self, index):
+        """index 프레임 이후 (지금까지) 발화 프레임이 있었는지"""
+        index = max(index, self.frames_written - self.n_frames)
+        slots = np.arange(index, self.frames_written) % self.n_frames
+        return bool(self.voiced[slots].any())
+
+    def read(self, segment):
+        """구간의 PCM 샘플 (int16, 1차원)"""
+        start = max(segment.start, self.frames_written - self.n_frames)
+        slots = np.arange(start, segment.end) % self.n_frames
+        return self.samples[slots].reshape(-1)
+
+
+class AdaptiveEndpointer:
+    """
+    ★ 적응형 발화 끝 판정 (고정 pause 0.8초 대신)
+    - 지금까지 말한 시간이 short_speech 보다 짧으면 (짧은 명령문) 학습된 짧은 pause, 길면 기본 pause
+    - 학습: 지난 짧은 명령들에서 말이 다시 이어진 문장 안 쉼 길이의 q 분위수 × margin
+      (표본이 min_samples 보다 적으면 기본 pause)
+    - 너무 일찍 끊었다는 신호(끊은 직후 바로 말이 이어짐)가 오면 margin 을 늘리고,
+      잘 끊긴 명령이 이어지면 천천히 되돌림
+    """
+
+    def __init__(self, base_pause=0.8, min_pause=0.35, short_speech=1.6, quantile=90,
+                 margin=1.4, max_margin=2.5, min_samples=8, history=200):
+        self.base_pause = base_pause
+        self.min_pause = min_pause
+        self.short_speech = short_speech
+        self.quantile = quantile
+        self.margin = margin
+        self.initial_margin = margin
+        self.max_margin = max_margin
+        self.min_samples = min_samples
+        self.gaps = np.zeros(history)
+        self.n_gaps = 0
+        self.short_pause = base_pause
+        self.cutoffs = 0
+
+    def pause_for(self, speech_sec):
+        """지금까지 말한 시간(초) → 끝 판정에 필요한 무음 길이(초)"""
+        return self.short_pause if speech_sec < self.short_speech else self.base_pause
+
+    def learn(self, segment, frame_sec):
+        """끝난 명령 하나의 문장 안 쉼을 기록하고 짧은 명령용 pause 를 다시 계산"""
+        if len(segment) * frame_sec < self.short_speech * 1.5:
+            for gap in segment.gaps:
+                self.gaps[self.n_gaps % len(self.gaps)] = gap
+                self.n_gaps += 1
+        # 잘리지 않은 명령이 이어지면 margin 을 처음 값 쪽으로 천천히
+        self.margin += 0.05 * (self.initial_margin - self.margin)
+        self._update()
+
+    def cut_off(self):
+        """끝 판정 직후 말이 바로 이어짐 → 너무 일찍 끊음"""
+        self.cutoffs += 1
+        self.margin = min(self.margin * 1.25, self.max_margin)
+        self._update()
+
+    def _update(self):
+        n = min(self.n_gaps, len(self.gaps))
+        if n < self.min_samples:
+            self.short_pause = self.base_pause
+            return
+        learned = float(np.percentile(self.gaps[:n], self.quantile)) * self.margin
+        self.short_pause = min(max(learned, self.min_pause), self.base_pause)
+
+
+class KeywordSpotter:
+    """
+    ★ 경량 로컬 호출어 판별기 (클라우드 STT 로 보낼 후보만 통과)
+    - 호출어 뒤에 명령을 이어 말할 수 있으므로 ("히어로봇 손 흔들어 줘") 구간 앞부분 onset 초만 판별
+    1. 길이 게이트: 호출어 한 마디보다 짧으면 탈락 (길이 상한은 없음, 긴 구간은 앞부분으로 판단)
+    2. 음절 수 게이트: 앞부분 에너지 포락선의 봉우리 수로 음절 수 추정 ("히어로봇" ≈ 3~5, 뒤 명령 1~2 음절 여유)
+    3. (템플릿이 등록된 경우) 로그 멜 특징 + 끝이 열린 DTW 거리로 등록된 호출어와 비교
+       템플릿은 STT 로 확인된 호출어 단독 발화로 첫 실행 때 자동 등록 (VoiceInterface, enroll)
+    """
+
+    def __init__(self, rate=16000, min_dur=0.35, onset=1.2, syllables=(2, 7),
+                 templates_path="config/wake_templates.npz", dtw_threshold=9.0, max_templates=3):
+        self.rate = rate
+        self.min_dur = min_dur
+        self.onset = onset
+        self.syllables = syllables
+        self.templates_path = templates_path
+        self.dtw_threshold = dtw_threshold
+        self.max_templates = max_templates
+
+        self.hop = rate // 100        # 10ms
+        self.win = rate * 25 // 1000  # 25ms
+        self.n_fft = 512
+        self.mel = self._mel_filterbank(26)
+
+        self.templates = []
+        if templates_path and os.path.exists(templates_path):
+            data = np.load(templates_path)
+            self.templates = [data[k] for k in sorted(data.files)]
+
+    @property
+    def enrolling(self):
+        """템플릿을 더 모으는 중인지 (max_templates 개 미만)"""
+        return len(self.templates) < self.max_templates
+
+    def check(self, samples):
+        """(통과 여부, 판단 근거 dict)"""
+        duration = len(samples) / self.rate
+        if duration < self.min_dur:
+            return False, {"reason": "duration", "duration": round(duration, 2)}
+
+        head = samples[:int(self.onset * self.rate)]
+        n_syllables = self.count_syllables(head)
+        if not self.syllables[0] <= n_syllables <= self.syllables[1]:
+            return False, {"reason": "syllables", "syllables": n_syllables}
+
+        if self.templates:
+            feats = self.features(head)
+            distance = min(self.dtw(t, feats, open_end=True) for t in self.templates)
+            if distance > self.dtw_threshold:
+                return False, {"reason": "template", "distance": round(distance, 2)}
+            return True, {"syllables": n_syllables, "distance": round(distance, 2)}
+
+        return True, {"syllables": n_syllables}
+
+    def count_syllables(self, samples):
+        x = samples.astype(np.float32)
+        n = len(x) // self.hop
+        if n < 3:
+            return 0
+        env = np.sqrt(np.mean(x[:n * self.hop].reshape(n, self.hop) ** 2, axis=1))
+        env = np.convolve(env, np.ones(5) / 5, mode='same')
+
+        threshold = env.max() * 0.35
+        is_peak = (env[1:-1] > env[:-2]) & (env[1:-1] >= env[2:]) & (env[1:-1] > threshold)
+        peaks = np.nonzero(is_peak)[0]
+
+        # 100ms 이내의 봉우리는 같은 음절로 봄
+        count, last = 0, -100
+        for p in peaks:
+            if p - last >= 10:
+                count += 1
+                last = p
+        return count
+
+    def features(self, samples):
+        """로그 멜 특징 [프레임, 26] (프레임별 평균 정규화)"""
+        x = samples.astype(np.float32) / 32768.0
+        x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+        n = 1 + max(0, (len(x) - self.win) // self.hop)
+        idx = np.arange(self.win)[None, :] + self.hop * np.arange(n)[:, None]
+        frames = x[np.minimum(idx, len(x) - 1)] * np.hamming(self.win)
+        power = np.abs(np.fft.rfft(frames, self.n_fft)) ** 2
+        feats = np.log(power @ self.mel.T + 1e-10)
+        return feats - feats.mean(axis=0)
+
+    def _mel_filterbank(self, n_mels):
+        def hz_to_mel(f):
+            return 2595.0 * np.log10(1.0 + f / 700.0)
+
+        def mel_to_hz(m):
+            return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+        mels = np.linspace(hz_to_mel(0), hz_to_mel(self.rate / 2), n_mels + 2)
+        bins = np.floor((self.n_fft + 1) * mel_to_hz(mels) / self.rate).astype(int)
+        bank = np.zeros((n_mels, self.n_fft // 2 + 1))
+        for m in range(1, n_mels + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+        return bank
+
+    @staticmethod
+    def dtw(a, b, open_end=False):
+        """
+        길이 정규화된 DTW 거리 (행 단위 벡터화)
+        - open_end: a 전체가 b 의 앞부분 어디까지와 맞아도 됨 (b 뒤에 다른 말이 이어지는 경우)
+        """
+        cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+        acc = np.full((len(a) + 1, len(b) + 1), np.inf)
+        acc[0, 0] = 0.0
+        for i in range(1, len(a) + 1):
+            diag_up = np.minimum(acc[i - 1, :-1], acc[i - 1, 1:]) + cost[i - 1]
+            row = acc[i]
+            for j in range(1, len(b) + 1):
+                row[j] = min(diag_up[j - 1], row[j - 1] + cost[i - 1, j - 1])
+        if open_end:
+            return float(np.min(acc[-1, 1:] / (len(a) + np.arange(1, len(b) + 1))))
+        return float(acc[-1, -1] / (len(a) + len(b)))
+
+    def enroll(self, samples):
+        """호출어 단독 발화를 템플릿으로 등록하고 저장 → 등록된 템플릿 수"""
+        self.templates.append(self.features(samples[:int(self.onset * self.rate)]))
+        if self.templates_path:
+            np.savez(self.templates_path, **{f"t{i:02d}": t for i, t in enumerate(self.templates)})
+        return len(self.templates)
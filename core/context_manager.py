@@ -0,0 +1,98 @@
+import os
+import re
+import json
+
+# 스펙 파일별 컴파일 결과 캐시: path → ((mtime, size), table)
+_SPEC_CACHE = {}
+
+
+def compile_spec(spec_path):
+    """
+    ★ hardware_spec.json → 토큰을 최소화한 관절 표
+    - JSON 키/들여쓰기/따옴표 반복을 없애고 한 관절을 한 줄로 표현
+    - 파일이 바뀌었을 때(mtime/크기)만 다시 만듦
+    """
+    try:
+        st = os.stat(spec_path)
+    except OSError:
+        return "하드웨어 정보를 찾을 수 없음."
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _SPEC_CACHE.get(spec_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    info = spec.get('robot_info', {})
+    lines = [
+        f"{info.get('name', 'robot')} v{info.get('version', '?')}: {info.get('description', '')}",
+        "name|type|min|max|neutral|desc",
+    ]
+    for m in spec['motors']:
+        kind = 'W' if m.get('type') == 'wheel' else 'J'
+        desc = re.sub(r"\s+", " ", m.get('desc', '')).strip()
+        lines.append(f"{m['name']}|{kind}|{m['min']}|{m['max']}|{m['neutral']}|{desc}")
+
+    table = "\n".join(lines)
+    _SPEC_CACHE[spec_path] = (stamp, table)
+    return table
+
+
+def summarize_turns(turns, max_chars=400):
+    """
+    오래된 대화를 로컬에서 요약 (API 호출 없음)
+    - 사용자 발화와 로봇의 대사(text)만 남기고 motions JSON 은 개수만 기록
+    """
+    parts = []
+    for user_text, model_text in turns:
+        try:
+            plan = json.loads(model_text)
+            said = plan.get('text', '')
+            n_motions = len(plan.get('motions', []))
+        except (json.JSONDecodeError, AttributeError):
+            said, n_motions = model_text, 0
+        parts.append(f"U:{user_text} / R:{said} ({n_motions}동작)")
+    summary = " | ".join(parts)
+    return summary[-max_chars:]
+
+
+class ConversationContext:
+    """
+    ★ 최근 N 턴만 유지하는 대화 창
+    - 창 밖으로 밀려난 턴은 summarizer 로 한 줄 요약에 합쳐 둠 (None 이면 그냥 버림)
+    - build() 는 매 요청에 보낼 contents 리스트를 만듦 → 프롬프트 크기가 시간에 따라 늘지 않음
+    """
+
+    def __init__(self, max_turns=6, summarizer=summarize_turns):
+        self.max_turns = max_turns
+        self.summarizer = summarizer
+        self.turns = []      # [(user_text, model_text)]
+        self.summary = ""
+
+    def build(self, user_input):
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [{"text": f"[이전 대화 요약] {self.summary}"}]})
+            contents.append({"role": "model", "parts": [{"text": '{"text": "기억하고 있어요.", "motions": []}'}]})
+        for user_text, model_text in self.turns:
+            contents.append({"role": "user", "parts": [{"text": user_text}]})
+            contents.append({"role": "model", "parts": [{"text": model_text}]})
+        contents.append({"role": "user", "parts": [{"text": user_input}]})
+        return contents
+
+    def add_turn(self, user_text, model_text):
+        self.turns.append((user_text, model_text))
+        if len(self.turns) <= self.max_turns:
+            return
+
+        dropped = self.turns[:-self.max_turns]
+        self.turns = self.turns[-self.max_turns:]
+        if self.summarizer is not None:
+            previous = [self.summary] if self.summary else []
+            self.summary = " | ".join(previous + [self.summarizer(dropped)])[-400:]
+
+    def clear(self):
+        self.turns = []
+        self.summary = ""
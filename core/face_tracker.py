@@ -0,0 +1,163 @@
+import time
+import threading
+import numpy as np
+
+cv2 = None
+mp = None
+
+
+class FaceTracker:
+    """
+    ★ 온디바이스 얼굴 추적 (LLM 을 거치지 않는 시선 제어)
+    - VisionBrain 캡처 스레드의 새 프레임마다 MediaPipe 얼굴 검출 (축소 이미지)
+    - 가장 큰 얼굴의 화면 중심 대비 오프셋 → 비례 제어로 head_pan / 머리 상하(tilt) 목표를 조금씩 이동
+      (카메라가 머리와 함께 움직이므로 오프셋 자체가 오차 → 폐루프)
+    - 상하는 분리형 목 구조: 위는 head_tilt_up, 아래는 head_tilt_down 이 담당.
+      각 모터가 움직이는 방향은 스펙의 travel_sign (관절 이름의 동작 쪽으로 값이 변하는 부호) 으로 정하고,
+      neutral 과 그 방향 한계 사이만 씀 (예: head_tilt_up 은 [min, neutral], 초기값보다 커지지 않음)
+    - 세 관절을 move_joints 한 번(SyncWrite 1패킷)으로 전송, 최대 rate_hz
+    - 제스처가 머리를 움직이는 동안에는 pause() 로 양보
+    """
+
+    def __init__(self, vision, driver, rate_hz=25, detect_width=320,
+                 pan_gain=120.0, tilt_gain=0.08, deadband=0.06, max_step=40.0,
+                 pan_range=700, tilt_fraction=0.6, lost_timeout=2.0, invert_pan=False):
+        self.vision = vision
+        self.driver = driver
+        self.period = 1.0 / rate_hz
+        self.detect_width = detect_width
+
+        self.pan_gain = pan_gain          # 화면 폭 오프셋 1.0 당 tick/주기
+        self.tilt_gain = tilt_gain        # 화면 높이 오프셋 1.0 당 tilt 상태(-1~1) 변화/주기
+        self.deadband = deadband
+        self.max_step = max_step
+        self.lost_timeout = lost_timeout
+        self.pan_sign = 1.0 if invert_pan else -1.0   # 얼굴이 화면 오른쪽(+) → 오른쪽(-)으로 회전
+
+        motors = driver.motors
+        pan = motors['head_pan']
+        self.pan_neutral = float(pan['neutral'])
+        self.pan_lo = max(pan['min'], pan['neutral'] - pan_range)
+        self.pan_hi = min(pan['max'], pan['neutral'] + pan_range)
+
+        # 상하 모터: neutral → travel_sign 쪽 한계 × tilt_fraction, 허용 범위는 neutral 과 그 한계 사이
+        def travel(info):
+            limit = info['min'] if info.get('travel_sign', 1) < 0 else info['max']
+            neutral = float(info['neutral'])
+            return neutral, (limit - neutral) * tilt_fraction, (min(neutral, limit), max(neutral, limit))
+        self.up_neutral, self.up_travel, self.up_range = travel(motors['head_tilt_up'])
+        self.down_neutral, self.down_travel, self.down_range = travel(motors['head_tilt_down'])
+
+        self.pan = self.pan_neutral
+        self.tilt = 0.0                   # +1 위, -1 아래
+        self.last_seen = 0.0
+
+        self.latency = np.zeros(256)      # 프레임 시각 → 명령 전송 완료 (초)
+        self.n_cycles = 0
+        self.n_detections = 0
+        self.t_start = None
+
+        self._detector = None
+        self._paused = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        global cv2, mp
+        import cv2
+        import mediapipe as mp
+
+        self._detector = mp.solutions.face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="face-tracker", daemon=True)
+        self._thread.start()
+        print(f"🙂 [FaceTrack] 얼굴 추적 시작 (목표 {1.0 / self.period:.0f}Hz)")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._detector is not None:
+            self._detector.close()
+            self._detector = None
+
+    def pause(self):
+        self._paused.set()
+
+    def resume(self):
+        # 제스처가 머리를 움직였을 수 있으므로 현재 위치에서 다시 시작
+        if self.driver.feedback is not None and self.driver.feedback.get('head_pan') is not None:
+            self.pan = float(self.driver.feedback.get('head_pan'))
+        self._paused.clear()
+
+    def _loop(self):
+        seq = -1
+        next_tick = time.monotonic()
+        self.t_start = next_tick
+        while self._running:
+            # 주기 제한 (카메라가 더 빨라도 rate_hz 이상으로 보내지 않음)
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_tick = max(next_tick + self.period, time.monotonic())
+
+            new_seq, stamp, frame = self.vision.wait_frame(seq, timeout=0.5)
+            if frame is None or new_seq == seq or self._paused.is_set():
+                continue
+            seq = new_seq
+
+            offset = self.detect(frame)
+            self.n_cycles += 1
+            if offset is None:
+                # 얼굴을 잃어버린 지 오래되면 천천히 정면으로 복귀
+                if time.monotonic() - self.last_seen > self.lost_timeout:
+                    self.step(-(self.pan - self.pan_neutral) / max(self.pan_gain, 1.0) * 0.1, -self.tilt * 0.5)
+                continue
+            self.n_detections += 1
+            self.last_seen = time.monotonic()
+            self.step(*offset)
+            self.latency[self.n_detections % len(self.latency)] = time.monotonic() - stamp
+
+    def detect(self, frame):
+        """가장 큰 얼굴 중심의 화면 중심 대비 오프셋 (x, y), 각각 -1~1. 없으면 None"""
+        h, w = frame.shape[:2]
+        scale = self.detect_width / w
+        small = cv2.resize(frame, (self.detect_width, int(h * scale)), interpolation=cv2.INTER_AREA)
+        result = self._detector.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        if not result.detections:
+            return None
+
+        box = max((d.location_data.relative_bounding_box for d in result.detections),
+                  key=lambda b: b.width * b.height)
+        x = (box.xmin + box.width / 2) * 2.0 - 1.0
+        y = (box.ymin + box.height / 2) * 2.0 - 1.0
+        return x, y
+
+    def step(self, x, y):
+        """오프셋 → 목표 갱신 → 세 관절 한 프레임으로 전송"""
+        if abs(x) > self.deadband:
+            self.pan += float(np.clip(self.pan_sign * self.pan_gain * x, -self.max_step, self.max_step))
+            self.pan = min(max(self.pan, self.pan_lo), self.pan_hi)
+        if abs(y) > self.deadband:
+            # 화면 아래(+y) 에 얼굴 → 고개를 숙임(tilt 감소)
+            self.tilt = min(max(self.tilt - self.tilt_gain * y, -1.0), 1.0)
+
+        up = float(np.clip(self.up_neutral + max(self.tilt, 0.0) * self.up_travel, *self.up_range))
+        down = float(np.clip(self.down_neutral + max(-self.tilt, 0.0) * self.down_travel, *self.down_range))
+        self.driver.move_joints({
+            'head_pan': int(round(self.pan)),
+            'head_tilt_up': int(round(up)),
+            'head_tilt_down': int(round(down)),
+        })
+
+    def stats(self):
+        n = min(self.n_detections, len(self.latency))
+        elapsed = time.monotonic() - self.t_start if self.t_start else 0.0
+        latency_ms = self.latency[:n] * 1000.0
+        return {
+            "fps": round(self.n_cycles / elapsed, 1) if elapsed > 0 else 0.0,
+            "detections": self.n_detections,
+            "latency_p50_ms": round(float(np.percentile(latency_ms, 50)), 1) if n else None,
+            "latency_p99_ms": round(float(np.percentile(latency_ms, 99)), 1) if n else None,
+        }
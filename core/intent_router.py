@@ -0,0 +1,249 @@
+import os
+import json
+import math
+import time
+import numpy as np
+
+from core.plan_cache import normalize_transcript
+from utils.logger import telemetry
+
+
+def char_ngrams(text, n_max=3):
+    """발화(정규화된 문자열)의 글자 1~n_max-gram (앞뒤 경계 표시 포함) → {gram: 횟수}"""
+    text = f"^{text}$"
+    grams = {}
+    for n in range(1, n_max + 1):
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if gram in ('^', '$'):
+                continue
+            grams[gram] = grams.get(gram, 0) + 1
+    return grams
+
+
+class Route:
+    """
+    라우팅 결과
+    - intent: 가장 비슷한 의도 이름 (문구가 하나도 없으면 None)
+    - confidence: 가장 비슷한 문구와의 코사인 유사도 (0~1)
+    - margin: 다른 의도 중 가장 비슷한 문구와의 차이
+    - accepted: 임계값/차이를 넘어 LLM 없이 바로 실행해도 되는지
+    - negated: 부정 표현("~지 마", "~말고")이 있어 받아들이지 않았는지
+    - compound: 여러 동작을 이어 말한 발화("오른손 들고 왼손 흔들어")라 받아들이지 않았는지
+    """
+
+    def __init__(self, intent, confidence, margin, accepted, plan=None, refusal=False, phrase=None, negated=False,
+                 compound=False):
+        self.intent = intent
+        self.confidence = confidence
+        self.margin = margin
+        self.accepted = accepted
+        self.plan = plan
+        self.refusal = refusal
+        self.phrase = phrase
+        self.negated = negated
+        self.compound = compound
+
+
+class IntentRouter:
+    """
+    ★ 온디바이스 의도 분류기 (config/intents.json)
+    - 큐레이션한 문구들을 글자 n-gram TF-IDF 벡터로 미리 색인 ([문구, n-gram] 행렬, 행마다 L2 정규화)
+    - 발화 하나는 n-gram 추출 + 행렬·벡터 곱 한 번 (색인에 없는 n-gram 도 발화 벡터 크기에는 포함되므로
+      처음 보는 내용이 많을수록 유사도가 낮아짐)
+    - 유사도가 threshold 이상이고 다른 의도와 margin 이상 차이 나면 저장된 계획으로 바로 실행,
+      애매하거나 새로운 요청만 LLM 으로 (의도마다 "threshold" 로 더 엄격하게: 예) 바퀴를 움직이는 의도)
+    - 글자 n-gram 은 부정을 구분하지 못하므로("앞으로 가지 마" ≈ "앞으로 가") 부정 표현이 있는 발화는
+      항상 LLM 으로
+    - 여러 동작을 이어 말한 발화도 한 의도로 고르면 나머지 동작이 사라지므로 항상 LLM 으로
+      (두 어절 사이의 연결 어미/접속사 "-고", "-면서", "그리고", "다음에" 또는 동사 어절이 둘 이상)
+    - "refusal": true 인 의도는 물리적으로 불가능한 요청 (Layer 3: 어깨 으쓱 + 정중한 거절)
+    """
+
+    def __init__(self, intents, threshold=0.75, margin=0.08, fillers=(), endings=(), negations=(),
+                 connectives=(), verb_endings=(), n_max=3):
+        self.threshold = threshold
+        self.margin = margin
+        self.n_max = n_max
+        # 의미 없는 말(호출어 등)과 말끝(존댓말/부탁 어미)은 비교 전에 떼어냄 ("손 들어 줄래요?" ≈ "손 들어")
+        # 군말은 어절 단위로만 ("좀비" 의 "좀" 은 그대로), "한 번" 처럼 여러 어절인 군말도 가능
+        self.fillers = sorted((self.tokens(w) for w in fillers), key=len, reverse=True)
+        self.endings = sorted((normalize_transcript(w) for w in endings), key=len, reverse=True)
+        self.negations = [normalize_transcript(w) for w in negations]
+        self.connectives = [normalize_transcript(w) for w in connectives]
+        self.verb_endings = tuple(normalize_transcript(w) for w in verb_endings)
+        self.intents = {item['name']: item for item in intents}
+        self.hits = 0
+        self.misses = 0
+
+        # 1. 문구 → (의도 번호, n-gram)
+        names = list(self.intents)
+        phrases, owners, grams = [], [], []
+        for k, name in enumerate(names):
+            for phrase in self.intents[name].get('phrases', []):
+                g = char_ngrams(self.clean(phrase), n_max)
+                if g:
+                    phrases.append(phrase)
+                    owners.append(k)
+                    grams.append(g)
+        self.names = names
+        self.phrases = phrases
+        self.owners = np.array(owners, dtype=np.int64)
+
+        # 2. 어휘 + IDF (문구 수 기준, 색인에 없는 n-gram 은 가장 드문 n-gram 과 같은 가중치)
+        vocab, df = {}, []
+        for g in grams:
+            for gram in g:
+                if gram not in vocab:
+                    vocab[gram] = len(vocab)
+                    df.append(0)
+                df[vocab[gram]] += 1
+        n = len(grams)
+        self.vocab = vocab
+        self.idf = np.log((1.0 + n) / (1.0 + np.array(df, dtype=np.float64))) + 1.0
+        self.unknown_idf = math.log(1.0 + n) + 1.0
+
+        # 3. [문구, n-gram] 행렬 (행 L2 정규화)
+        self.matrix = np.zeros((n, len(vocab)), dtype=np.float32)
+        for row, g in enumerate(grams):
+            for gram, count in g.items():
+                col = vocab[gram]
+                self.matrix[row, col] = (1.0 + math.log(count)) * self.idf[col]
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.maximum(norms, 1e-12)
+
+    @classmethod
+    def from_file(cls, path="config/intents.json"):
+        """의도 파일이 없으면 빈 라우터 (모든 발화가 LLM 으로)"""
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('intents', []), threshold=data.get('threshold', 0.75), margin=data.get('margin', 0.08),
+                   fillers=data.get('fillers', ()), endings=data.get('endings', ()),
+                   negations=data.get('negations', ()), connectives=data.get('connectives', ()),
+                   verb_endings=data.get('verb_endings', ()))
+
+    @staticmethod
+    def tokens(text):
+        """공백 기준 어절 → 어절마다 정규화 (문장부호만 있던 어절은 버림)"""
+        return tuple(t for t in (normalize_transcript(word) for word in text.split()) if t)
+
+    def words(self, text):
+        """어절 단위 군말 제거 → 남은 어절들"""
+        words = self.tokens(text)
+        kept, i = [], 0
+        while i < len(words):
+            for filler in self.fillers:
+                if filler and words[i:i + len(filler)] == filler:
+                    i += len(filler)
+                    break
+            else:
+                kept.append(words[i])
+                i += 1
+        return kept
+
+    def clean(self, text):
+        """어절 단위 군말 제거 + 정규화 + 말끝 제거 (말끝만 남으면 그대로 둠)"""
+        return self._strip_endings("".join(self.words(text)))
+
+    def _strip_endings(self, text):
+        stripped = True
+        while stripped:
+            stripped = False
+            for ending in self.endings:
+                if text.endswith(ending) and len(text) > len(ending):
+                    text = text[:-len(ending)]
+                    stripped = True
+                    break
+        return text
+
+    def is_compound(self, text):
+        """
+        여러 동작을 이어 말했는지 ("오른손 들고 왼손 흔들어", "손 들어 다음에 인사해")
+        - 마지막이 아닌 어절이 연결 어미로 끝남 ("들고") 또는 앞 어절 뒤에 접속사 ("... 다음에 ...")
+          (첫 어절인 접속사는 해당 없음: "다음에 봐")
+        - 또는 말끝("봐", "줘")만으로 된 보조 어절을 빼고 동사 어미로 끝나는 어절이 둘 이상
+        """
+        words = self.words(text)
+        for i, word in enumerate(words[:-1]):
+            if any(word.endswith(c) and (i > 0 or len(word) > len(c)) for c in self.connectives):
+                return True
+        verbs = 0
+        for word in words:
+            word = self._strip_endings(word)
+            if word not in self.endings and word.endswith(self.verb_endings):
+                verbs += 1
+        return verbs > 1
+
+    def _vector(self, text):
+        """발화 → (색인 어휘 위의 벡터, 전체 벡터 크기)"""
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        norm2 = 0.0
+        for gram, count in char_ngrams(self.clean(text), self.n_max).items():
+            col = self.vocab.get(gram)
+            idf = self.idf[col] if col is not None else self.unknown_idf
+            w = (1.0 + math.log(count)) * idf
+            norm2 += w * w
+            if col is not None:
+                vector[col] = w
+        return vector, math.sqrt(norm2)
+
+    def classify(self, text):
+        """발화 → Route (LLM 호출 없음)"""
+        if not self.phrases:
+            return Route(None, 0.0, 0.0, False)
+        vector, norm = self._vector(text)
+        if norm == 0.0:
+            return Route(None, 0.0, 0.0, False)
+
+        scores = self.matrix @ vector / norm
+        # 의도별 최고 유사도
+        best = np.full(len(self.names), -1.0)
+        np.maximum.at(best, self.owners, scores)
+        order = np.argsort(best)[::-1]
+        top = int(order[0])
+        confidence = float(best[top])
+        margin = confidence - float(best[order[1]]) if len(order) > 1 else confidence
+        intent = self.intents[self.names[top]]
+        negated = any(word in normalize_transcript(text) for word in self.negations)
+        compound = self.is_compound(text)
+        accepted = (confidence >= intent.get('threshold', self.threshold) and margin >= self.margin
+                    and not negated and not compound)
+
+        phrase = self.phrases[int(np.argmax(np.where(self.owners == top, scores, -1.0)))]
+        return Route(self.names[top], confidence, margin, accepted,
+                     plan=intent.get('plan'), refusal=bool(intent.get('refusal')), phrase=phrase, negated=negated,
+                     compound=compound)
+
+    def route(self, text):
+        """확신이 높으면 Route, 아니면 None (→ LLM)"""
+        t0 = time.perf_counter()
+        with telemetry.span("route") as span:
+            result = self.classify(text)
+            span.set('intent', result.intent)
+            span.set('accepted', result.accepted)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+        if not result.accepted:
+            self.misses += 1
+            if result.negated:
+                telemetry.count("router.negated")
+            if result.compound:
+                telemetry.count("router.compound")
+            return None
+        self.hits += 1
+        kind = "거절" if result.refusal else "의도"
+        print(f"🧭 [Router] {kind} '{result.intent}' (≈ '{result.phrase}', 유사도 {result.confidence:.2f}, "
+              f"{elapsed_ms:.2f}ms) - LLM 생략")
+        return result
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "intents": len(self.names),
+            "phrases": len(self.phrases),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,250 @@
+import time
+import queue
+import random
+import threading
+
+from utils.logger import telemetry
+
+# 다시 시도하면 성공할 수 있는 오류 (한도 초과 / 일시적 서버 오류)
+RETRYABLE = ("429", "Quota exceeded", "RESOURCE_EXHAUSTED", "500", "502", "503", "504", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+QUOTA = ("429", "Quota exceeded", "RESOURCE_EXHAUSTED")
+
+
+class DaemonPool:
+    """
+    고정 크기 데몬 스레드 풀 (프로세스 수명 동안 유지)
+    - 응답이 오지 않는 API 호출이 남아 있어도 종료를 막지 않음 (ThreadPoolExecutor 는 종료 시 join)
+    """
+
+    def __init__(self, size, name):
+        self._jobs = queue.SimpleQueue()
+        for i in range(size):
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, fn, *args):
+        self._jobs.put((fn, args))
+
+    def _work(self):
+        while True:
+            fn, args = self._jobs.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                telemetry.log("⚠️ [LLM] 작업 스레드 오류: {}", e)
+
+
+class _Lane:
+    """요청 하나 (모델 + 시도 번호). 취소되면 남은 청크를 버리고 스트림을 닫음"""
+
+    def __init__(self, model, kind):
+        self.model = model
+        self.kind = kind                    # 'primary' / 'retry' / 'hedge'
+        self.cancelled = threading.Event()
+        self.alive = True
+        self.t0 = 0
+
+
+class LLMClient:
+    """
+    ★ 마감 시간을 지키는 상주형 LLM 클라이언트
+    - 상주 데몬 스레드 풀에서 요청 (호출마다 실행기를 만들고 닫지 않음)
+    - 요청마다 실제 마감: 마감이 지나면 TimeoutError, 진행 중인 요청은 취소 표시 후 버림
+    - 재시도: 지수 백오프 + full jitter, 남은 마감 시간 안에서만 (한도 초과에 30초씩 자지 않음)
+      한도 초과(429)가 난 모델은 cooldown 동안 건너뛰고 대체 모델로 바로 보냄
+    - 헤지: 주 모델의 첫 토큰이 hedge 시각(주 모델 첫 토큰 지연의 p95, 표본이 적으면 기본값)까지
+      안 오면 대체 모델로 같은 요청을 하나 더 보내고, 먼저 첫 토큰을 준 쪽만 사용
+    - 모델별 첫 토큰 / 전체 지연은 텔레메트리 히스토그램 llm.first_token.<모델>, llm.total.<모델>
+    """
+
+    def __init__(self, get_client, model, fallback_model=None, workers=8, max_retries=3,
+                 backoff_base=0.5, backoff_cap=4.0, hedge_percentile=95, hedge_default=2.0,
+                 hedge_min=0.5, hedge_max=4.0, hedge_min_samples=10, cooldown=30.0):
+        self._get_client = get_client       # genai.Client 를 돌려주는 함수 (SDK 지연 로드)
+        self.model = model
+        self.fallback_model = fallback_model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default = hedge_default
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.hedge_min_samples = hedge_min_samples
+        self.cooldown = cooldown
+
+        self.pool = DaemonPool(workers, "llm")
+        self._cooling = {}                  # 모델 → 한도 초과로 쉬는 끝 시각 (monotonic)
+        self.last_model = None
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+    def generate(self, contents, config, timeout):
+        """전체 응답 하나 (마감 초과 시 TimeoutError)"""
+        def call(client, model):
+            yield client.models.generate_content(model=model, contents=contents, config=config)
+
+        responses = list(self._race(call, timeout))
+        return responses[0] if responses else None
+
+    def stream(self, contents, config, timeout):
+        """응답 청크를 도착하는 대로 yield (마감 초과 시 TimeoutError)"""
+        def call(client, model):
+            return client.models.generate_content_stream(model=model, contents=contents, config=config)
+
+        return self._race(call, timeout)
+
+    def hedge_delay(self, model):
+        """주 모델 첫 토큰 지연의 백분위수 (표본이 적으면 기본값), [hedge_min, hedge_max] 로 제한"""
+        hist = telemetry.histograms.get(f"llm.first_token.{model}")
+        if hist is None or hist.n < self.hedge_min_samples:
+            delay = self.hedge_default
+        else:
+            delay = hist.percentile(self.hedge_percentile) / 1e6
+        return min(max(delay, self.hedge_min), self.hedge_max)
+
+    def backoff(self, retry):
+        """retry 번째 재시도 전 대기 (full jitter)"""
+        return random.uniform(0.0, min(self.backoff_cap, self.backoff_base * (2 ** retry)))
+
+    def stats(self):
+        """모델별 첫 토큰 / 전체 지연 (p50, p99 등) + 헤지/재시도 횟수"""
+        stats = telemetry.stats()
+        models = [m for m in (self.model, self.fallback_model) if m]
+        out = {}
+        for model in models:
+            out[model] = {
+                "first_token": stats["histograms"].get(f"llm.first_token.{model}", {"n": 0}),
+                "total": stats["histograms"].get(f"llm.total.{model}", {"n": 0}),
+                "errors": stats["counters"].get(f"llm.errors.{model}", 0),
+                "wins": stats["counters"].get(f"llm.wins.{model}", 0),
+            }
+        out["hedges"] = stats["counters"].get("llm.hedges", 0)
+        out["retries"] = stats["counters"].get("llm.retries", 0)
+        return out
+
+    # ------------------------------------------------------------------
+    # 요청 경쟁
+    # ------------------------------------------------------------------
+    def _pick(self, preferred):
+        """preferred 가 한도 초과로 쉬는 중이면 대체 모델"""
+        if self.fallback_model and self._cooling.get(preferred, 0) > time.monotonic():
+            other = self.fallback_model if preferred == self.model else self.model
+            if self._cooling.get(other, 0) <= time.monotonic():
+                return other
+        return preferred
+
+    def _launch(self, lanes, events, call, model, kind, delay=0.0):
+        lane = _Lane(model, kind)
+        lanes.append(lane)
+        self.pool.submit(self._run_lane, lane, call, events, delay)
+        return lane
+
+    def _run_lane(self, lane, call, events, delay):
+        """(풀 스레드) 요청 하나 실행 → events 로 ('item' | 'end' | 'error')"""
+        if delay > 0 and lane.cancelled.wait(delay):
+            return
+        lane.t0 = time.perf_counter_ns()
+        stream = None
+        try:
+            stream = call(self._get_client(), lane.model)
+            for item in stream:
+                if lane.cancelled.is_set():
+                    return
+                events.put((lane, 'item', item))
+            events.put((lane, 'end', None))
+        except Exception as e:
+            events.put((lane, 'error', e))
+        finally:
+            if lane.cancelled.is_set() and hasattr(stream, 'close'):
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+
+    def _race(self, call, timeout):
+        deadline = time.monotonic() + timeout
+        self.last_model = None
+        events = queue.SimpleQueue()
+        lanes = []
+        retries = 0
+        winner = None
+
+        primary = self._launch(lanes, events, call, self._pick(self.model), 'primary')
+        hedge_at = None
+        if self.fallback_model and primary.model == self.model:
+            hedge_at = time.monotonic() + self.hedge_delay(self.model)
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    telemetry.count("llm.timeouts")
+                    raise TimeoutError(f"LLM 응답 마감 {timeout:.1f}s 초과")
+                wait = deadline - now
+                if winner is None and hedge_at is not None:
+                    wait = min(wait, max(hedge_at - now, 0.0))
+                try:
+                    lane, kind, payload = events.get(timeout=wait)
+                except queue.Empty:
+                    if winner is None and hedge_at is not None and time.monotonic() >= hedge_at:
+                        hedge_at = None
+                        telemetry.count("llm.hedges")
+                        telemetry.log("🪁 [LLM] {} 첫 토큰 지연 → {} 로 헤지 요청", self.model, self.fallback_model)
+                        self._launch(lanes, events, call, self.fallback_model, 'hedge')
+                    continue
+
+                if winner is not None and lane is not winner:
+                    continue
+
+                if kind == 'item':
+                    if winner is None:
+                        winner = lane
+                        self._won(lane, lanes)
+                    yield payload
+                    continue
+
+                if kind == 'end':
+                    if winner is None:
+                        winner = lane
+                        self._won(lane, lanes)
+                    telemetry.observe(f"llm.total.{lane.model}", (time.perf_counter_ns() - lane.t0) / 1000.0)
+                    return
+
+                # 오류: 이미 내보낸 청크가 있으면 재시도하지 않음 (같은 동작이 두 번 나가는 것 방지)
+                lane.alive = False
+                telemetry.count(f"llm.errors.{lane.model}")
+                if winner is lane:
+                    raise payload
+                message = str(payload)
+                if any(code in message for code in QUOTA):
+                    self._cooling[lane.model] = time.monotonic() + self.cooldown
+                if any(other.alive for other in lanes):
+                    continue        # 다른 요청(헤지)이 아직 진행 중
+                if retries >= self.max_retries or not any(code in message for code in RETRYABLE):
+                    raise payload
+
+                delay = self.backoff(retries)
+                if time.monotonic() + delay >= deadline:
+                    raise payload
+                retries += 1
+                model = self._pick(lane.model)
+                telemetry.count("llm.retries")
+                telemetry.log("⏳ [LLM] {} 오류 → {:.2f}s 후 {} 로 재시도 ({}/{}): {}",
+                              lane.model, delay, model, retries, self.max_retries, message[:80])
+                self._launch(lanes, events, call, model, 'retry', delay)
+        finally:
+            for lane in lanes:
+                if lane is not winner:
+                    lane.cancelled.set()
+            if winner is not None and winner.alive:
+                winner.cancelled.set()
+
+    def _won(self, lane, lanes):
+        """첫 토큰을 먼저 준 요청만 남기고 나머지는 취소"""
+        telemetry.observe(f"llm.first_token.{lane.model}", (time.perf_counter_ns() - lane.t0) / 1000.0)
+        telemetry.count(f"llm.wins.{lane.model}")
+        self.last_model = lane.model
+        for other in lanes:
+            if other is not lane:
+                other.cancelled.set()
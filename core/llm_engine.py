@@ -1,24 +1,71 @@
 import os
 import json
 import time
-import concurrent.futures
-from google import genai
-from google.genai import types
+import threading
 from dotenv import load_dotenv
+from core.plan_cache import PlanCache, depends_on_context, fingerprint, normalize_transcript
+from core.action_parser import ActionStreamParser
+from core.context_manager import ConversationContext, compile_spec
+from core.intent_router import IntentRouter
+from core.llm_client import LLMClient
+from motion.primitives import PrimitiveLibrary
+from utils.logger import telemetry
 
 # .env 파일에서 API 키 로드
 load_dotenv()
 API_KEY = os.getenv("GEMINI_API_KEY")
 
+# google.genai 는 임포트가 무거우므로 실제로 API 를 쓸 때 로드 (시작 시간 단축)
+genai = None
+types = None
+
+
+def _load_genai():
+    global genai, types
+    if genai is None:
+        from google import genai as _genai
+        from google.genai import types as _types
+        genai, types = _genai, _types
+
 class LLMEngine:
-    def __init__(self, spec_path="config/hardware_spec.json"):
-        # 1. 하드웨어 스펙 로드
-        try:
-            with open(spec_path, 'r', encoding='utf-8') as f:
-                self.spec_text = f.read()
-        except FileNotFoundError:
-            self.spec_text = "하드웨어 정보를 찾을 수 없음."
-            
+    def __init__(self, spec_path="config/hardware_spec.json", model="gemini-3.1-flash-lite-preview", max_turns=6,
+                 intents_path="config/intents.json", fallback_model="gemini-2.5-flash-lite"):
+        self.spec_path = spec_path
+        self.model = model  # ⚡ 1. 속도 문제를 해결하기 위해 Lite 모델 적용
+        self.spec_table = None
+        # ★ 프리미티브 라이브러리: LLM 은 {"prim": ...} 한 줄만 쓰고 키프레임은 로컬에서 펼침
+        self.primitives = PrimitiveLibrary.from_file(spec_path)
+        # ★ 온디바이스 의도 라우터: 자주 쓰는 명령/불가능한 요청은 API 호출 없이 저장된 계획으로
+        self.router = IntentRouter.from_file(intents_path) if intents_path else None
+
+        # ★ 최근 N 턴만 보내는 대화 창 (오래된 턴은 로컬 요약)
+        self.context = ConversationContext(max_turns=max_turns)
+        # 턴별 프롬프트 토큰 기록
+        self.token_report = []
+
+        # stream_response 가 끝난 뒤의 전체 계획 (text 포함)
+        self.last_plan = None
+        # 부분 인식 결과로 미리 시작한 응답 (speculate, 부분 인식 스레드에서도 바꾸므로 잠금)
+        self.speculation = None
+        self._speculation_lock = threading.Lock()
+        self.cache = None
+
+        # 2. 새로운 SDK 클라이언트 (첫 호출 또는 warm_up() 에서 생성)
+        self._client = None
+        self._config = None
+        # ★ 마감/재시도/헤지를 맡는 상주 요청 클라이언트 (fallback_model=None 이면 헤지 없음)
+        self.llm = LLMClient(lambda: self.client, model, fallback_model=fallback_model)
+
+        # 3. 시스템 프롬프트 + 생성 설정 (스펙 파일이 바뀔 때만 다시 만듦)
+        self._refresh_prompt()
+
+    def _refresh_prompt(self):
+        # 1. 하드웨어 스펙 → 압축 관절 표
+        spec_table = compile_spec(self.spec_path)
+        if spec_table == self.spec_table:
+            return
+        self.spec_table = spec_table
+
         # =================================================================
         # [Mode 1: 일반 대화 및 섬세한 행동 제어] (캡틴의 오리지널 프롬프트)
         # =================================================================
@@ -28,7 +75,8 @@ class LLMEngine:
         사용자의 말을 듣고 [대화(text)]와 [행동(motions)]을 JSON 형식으로 생성하라.
         
         [내 몸의 관절 정보 (Hardware Spec)]
-        {self.spec_text}
+        (형식: name|type(J=관절,W=바퀴)|min|max|neutral|desc)
+        {self.spec_table}
         
         [행동 생성 규칙]
         1. 'motions'는 순차적으로 실행될 행동 리스트다.
@@ -52,74 +100,311 @@ class LLMEngine:
         - 설명: 동작 사이에 잠시 멈춤(여운)이 필요할 때 사용.
         - 중요: 인사를 하거나 포즈를 취한 뒤에는 반드시 1.0~2.0초 정도 delay를 줘서 사용자가 볼 시간을 줘라.
         
+        [Type D: 프리미티브 (Primitive) ★ 우선 사용]
+        - 형식: {{"prim": "이름", "amp": 0.2~1.5, "speed": 0.3~3.0, "reps": 1~5, "side": "r"|"l"|"both"}} (이름 외 모두 옵션)
+        - 설명: 미리 만들어진 동작. 중립 자세에서 시작해 중립 자세로 끝남.
+            * amp: 동작 크기 (기본 1.0), speed: 빠르기 (기본 1.0), reps: 반복 횟수 (기본 2), side: 어느 팔
+        - 목록:
+        {self.primitives.describe()}
+        - 목록에 있는 동작은 반드시 prim 으로 쓰고, 감정/강도는 amp·speed 로 조절하라.
+        - 목록에 없는 새 동작만 Type A~C 로 조립하라. 불가능하거나 위험한 요청은 shrug 와 함께 정중히 거절하라.
+        
         [출력 예시: 자연스러운 인사]
         {{
-            "text": "안녕하세요! (천천히 손을 내립니다)",
-            "motions": [
-                // 1. 빠르게 손 들기 (speed 생략)
-                {{"joint": "r_wrist_pitch", "pos": 2475}}, 
-                {{"delay": 0.5}},
-                // 2. 손 흔들기
-                {{"joint": "r_wrist_pitch", "pos": 2800}},
-                {{"joint": "r_wrist_pitch", "pos": 2100}},
-                {{"delay": 1.0}},
-                // 3. ★ 천천히 팔 내리기 (speed: 40 적용)
-                {{"joint": "r_shoulder_pitch", "pos": 1071, "speed": 40}},
-                {{"joint": "r_wrist_pitch", "pos": 1464, "speed": 40}}
-            ]
+            "text": "안녕하세요!",
+            "motions": [{{"prim": "wave", "amp": 0.8, "speed": 1.2}}, {{"delay": 1.0}}]
         }}
         """
         
-        # 2. 새로운 SDK 클라이언트 초기화
-        self.client = genai.Client(api_key=API_KEY)
-        
-        # 3. 채팅 세션 시작 (빠르고 똑똑한 Lite 모델로 교체)
-        self.chat = self.client.chats.create(
-            model="gemini-3.1-flash-lite-preview",  # ⚡ 1. 속도 문제를 해결하기 위해 Lite 모델 적용
-            config=types.GenerateContentConfig(
+        # 생성 설정은 프롬프트가 바뀌면 다음 호출 때 다시 만듦
+        self._config = None
+
+        # ★ 행동 계획 캐시 (스펙/프롬프트가 바뀌면 지문이 달라져 자동 무효화, 매뉴얼 고정 항목은 다시 로드)
+        if self.cache is None:
+            self.cache = PlanCache(fingerprint=fingerprint(self.system_instruction))
+        else:
+            self.cache.set_fingerprint(fingerprint(self.system_instruction))
+
+    @property
+    def client(self):
+        if self._client is None:
+            _load_genai()
+            self._client = genai.Client(api_key=API_KEY)
+        return self._client
+
+    @property
+    def config(self):
+        if self._config is None:
+            _load_genai()
+            self._config = types.GenerateContentConfig(
                 system_instruction=self.system_instruction,
                 response_mime_type="application/json",
                 temperature=0.4  # 🎯 2. 모델이 말을 못 알아듣고 헛소리하는 것을 막기 위해 창의성 억제 (기본값 1.0 -> 0.4)
             )
-        )
+        return self._config
+
+    def warm_up(self):
+        """SDK 임포트 + 클라이언트 생성을 미리 수행 (준비 완료 후 백그라운드에서 호출)"""
+        return self.client is not None and self.config is not None
+
+    def close(self):
+        """진행 중인 추측 응답 취소 + 저장되지 않은 캐시 변경 저장"""
+        self.cancel_speculation()
+        self.cache.close()
+
+    def _record_usage(self, usage):
+        """턴별 프롬프트 토큰 수 기록 (대화가 길어져도 일정하게 유지되는지 확인용)"""
+        if usage is None:
+            return
+        report = {
+            "turn": len(self.token_report) + 1,
+            "prompt_tokens": usage.prompt_token_count,
+            "output_tokens": usage.candidates_token_count,
+            "window_turns": len(self.context.turns),
+        }
+        self.token_report.append(report)
+        print(f"   📊 [Brain/Tokens] prompt {report['prompt_tokens']} / output {report['output_tokens']} "
+              f"(창 {report['window_turns']}턴)")
+
+    def _expanded(self, plan):
+        """계획의 prim 을 관절 motions 로 펼친 사본 (캐시/대화 기록에는 압축된 원본을 남김)"""
+        return dict(plan, motions=self.primitives.expand_all(plan.get('motions', [])))
+
+    def _cacheable(self, user_input):
+        """앞 대화에 기대는 발화("다시 해 줘")는 캐시하지 않음 (첫 대화의 계획이 다른 대화에서 재생되지 않도록)"""
+        if depends_on_context(user_input):
+            telemetry.count("cache.context_skips")
+            return False
+        return True
+
+    def _routed(self, user_input):
+        """라우터가 확신하는 발화면 저장된 계획, 아니면 None"""
+        if self.router is None:
+            return None
+        route = self.router.route(user_input)
+        return None if route is None else route.plan
+
+    def _contents(self, user_input):
+        """최신 프롬프트 확인 + 대화 창 + 새 발화"""
+        self._refresh_prompt()
+        return self.context.build(user_input)
 
     def generate_response(self, user_input, timeout=10):
         """
         [일반 대화 모드] 타임아웃 기능이 추가된 행동 제어
         - timeout: LLM 응답을 기다리는 최대 시간(초). 기본값 10초.
         """
+        # ★ 라우터/캐시 적중 시 API 호출 없이 즉시 반환
+        routed = self._routed(user_input)
+        if routed is not None:
+            self.context.add_turn(user_input, json.dumps(routed, ensure_ascii=False))
+            return self._expanded(routed)
+
+        cacheable = self._cacheable(user_input)
+        cached = self.cache.get(user_input) if cacheable else None
+        if cached is not None:
+            print(f"🧠 [Brain/Cache] 캐시 적중 (hit {self.cache.hits} / miss {self.cache.misses})")
+            self.context.add_turn(user_input, json.dumps(cached, ensure_ascii=False))
+            return self._expanded(cached)
+
         print("🧠 [Brain/Chat] 생각 중...", end="", flush=True)
-        
-        max_retries = 3
-        retry_delay = 30
-
-        for attempt in range(max_retries):
-            try:
-                # ★ ThreadPoolExecutor를 사용해 백그라운드에서 API 호출
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    # self.chat.send_message를 별도 스레드에서 실행
-                    future = executor.submit(self.chat.send_message, user_input)
-                    
-                    # timeout 초만큼 기다림. 안 끝나면 TimeoutError 발생!
-                    response = future.result(timeout=timeout)
-                    
-                print(" ✅ 완료")
-                return json.loads(response.text)
-
-            except concurrent.futures.TimeoutError:
-                # ★ 10초가 넘어가면 쿨하게 포기하고 빠져나옴
-                print("\n⏳ [Brain] 생각이 너무 오래 걸려 취소했습니다. (타임아웃)")
-                return None
-                
-            except Exception as e:
-                error_msg = str(e)
-                if "429" in error_msg or "Quota exceeded" in error_msg:
-                    print(f"\n⏳ [System] API 호출 한도 초과! ({attempt+1}/{max_retries})")
-                    print(f"   - {retry_delay}초간 대기...")
-                    time.sleep(retry_delay)
-                else:
-                    print(f"\n❌ [Brain] 생각 오류: {e}")
-                    return None
-        
-        print("❌ [System] 실패")
-        return None
\ No newline at end of file
+
+        try:
+            # ★ 상주 클라이언트: 마감 안에서만 재시도, 첫 토큰이 늦으면 대체 모델로 헤지
+            response = self.llm.generate(self._contents(user_input), self.config, timeout)
+        except TimeoutError:
+            # ★ 마감이 지나면 쿨하게 포기하고 빠져나옴 (진행 중인 요청은 버려짐)
+            print("\n⏳ [Brain] 생각이 너무 오래 걸려 취소했습니다. (타임아웃)")
+            return None
+        except Exception as e:
+            print(f"\n❌ [Brain] 생각 오류: {e}")
+            return None
+
+        print(f" ✅ 완료 ({self.llm.last_model})")
+        self._record_usage(response.usage_metadata)
+        try:
+            action_plan = json.loads(response.text)
+        except (TypeError, ValueError) as e:
+            # 잘리거나 깨진 응답은 대화 창에도 남기지 않음 (다음 턴 문맥을 오염시키지 않도록)
+            print(f"❌ [Brain] 응답 해석 실패: {e}")
+            return None
+        self.context.add_turn(user_input, response.text)
+        if isinstance(action_plan, dict):
+            if cacheable:
+                self.cache.put(user_input, action_plan)
+            return self._expanded(action_plan)
+        return action_plan
+
+    def stream_response(self, user_input, timeout=10):
+        """
+        [스트리밍 모드] 응답을 기다리지 않고 motions 원소가 완성되는 즉시 하나씩 yield
+        - 전체 계획(text 포함)은 스트림이 끝난 뒤 self.last_plan 에 저장됨
+        - timeout: 응답 전체를 기다리는 최대 시간(초)
+        - 같은 발화로 미리 시작한 추측 실행(speculate)이 있으면 그 결과를 이어받음
+        """
+        self.last_plan = None
+
+        with self._speculation_lock:
+            speculation, self.speculation = self.speculation, None
+        if speculation is not None:
+            if speculation.matches(user_input):
+                print(f"   🔮 [Brain/Speculate] 부분 인식으로 미리 시작한 응답 사용 "
+                      f"({time.monotonic() - speculation.started:.2f}s 전에 시작)")
+                telemetry.count("speculation.hits")
+                yield from speculation.follow()
+                self.last_plan = speculation.result.get('plan')
+                self._commit(speculation.text, speculation.result)
+                return
+            telemetry.count("speculation.misses")
+            print(f"   🔮 [Brain/Speculate] 최종 인식이 달라 미리 만든 응답을 버립니다. ('{speculation.text}')")
+            speculation.cancel()
+
+        result = {}
+        yield from self._stream(user_input, timeout, result)
+        self.last_plan = result.get('plan')
+        self._commit(user_input, result)
+
+    def speculate(self, user_input, timeout=10):
+        """
+        ★ 안정된 부분 인식 결과로 응답을 미리 시작 (동작은 내보내지 않고 모아 둠)
+        - 최종 인식이 같으면 stream_response 가 이어받고, 다르면 버림 (대화 기록/캐시에 남기지 않음)
+        """
+        with self._speculation_lock:
+            current = self.speculation
+            if current is not None:
+                if current.matches(user_input):
+                    return current
+                current.cancel()
+            current = self.speculation = Speculation(self, user_input, timeout)
+        telemetry.count("speculation.started")
+        return current
+
+    def cancel_speculation(self):
+        with self._speculation_lock:
+            speculation, self.speculation = self.speculation, None
+        if speculation is not None:
+            speculation.cancel()
+
+    def _commit(self, user_input, result):
+        """스트림이 끝까지 돌았을 때 토큰 기록, 응답이 온전한 JSON 일 때만 대화 창 / 캐시 반영"""
+        if result.get('usage') is not None:
+            self._record_usage(result['usage'])
+        if result.get('turn') is None:
+            return
+        self.context.add_turn(user_input, result['turn'])
+        if result.get('cache'):
+            self.cache.put(user_input, result['plan'])
+
+    def _stream(self, user_input, timeout, result):
+        """
+        라우터 → 캐시 → LLM 순으로 motions 를 yield (엔진 상태는 바꾸지 않음)
+        - result: 'plan' (전체 계획), 'turn' (대화 창에 남길 응답, 실패 시 없음), 'usage', 'cache'
+        """
+        routed = self._routed(user_input)
+        if routed is not None:
+            result.update(plan=routed, turn=json.dumps(routed, ensure_ascii=False))
+            yield from self.primitives.expand_all(routed.get('motions', []))
+            return
+
+        cacheable = self._cacheable(user_input)
+        cached = self.cache.get(user_input) if cacheable else None
+        if cached is not None:
+            print(f"🧠 [Brain/Cache] 캐시 적중 (hit {self.cache.hits} / miss {self.cache.misses})")
+            result.update(plan=cached, turn=json.dumps(cached, ensure_ascii=False))
+            yield from self.primitives.expand_all(cached.get('motions', []))
+            return
+
+        print("🧠 [Brain/Stream] 생각 중...", flush=True)
+
+        parser = ActionStreamParser()
+        usage = []
+        started = time.monotonic()
+        try:
+            # 수신은 LLM 클라이언트의 풀 스레드에서 → 여기서는 마감을 지키며 청크만 받음
+            # (첫 청크가 온 뒤의 오류는 재시도하지 않음: 같은 동작이 두 번 나가는 것 방지)
+            for chunk in self.llm.stream(self._contents(user_input), self.config, timeout):
+                if chunk.usage_metadata is not None:
+                    usage.append(chunk.usage_metadata)
+                item = chunk.text or ""
+
+                with telemetry.span("parse", n=len(item)):
+                    completed = parser.feed(item)
+                for motion in completed:
+                    if len(parser.motions) == 1:
+                        telemetry.event("llm.first_motion")
+                        print(f"   ⚡ [Brain/Stream] 첫 동작 도착 ({time.monotonic() - started:.2f}s)")
+                    yield from self.primitives.expand_all([motion])
+
+        except TimeoutError:
+            print("\n⏳ [Brain] 생각이 너무 오래 걸려 취소했습니다. (타임아웃)")
+            result['plan'] = parser.finish()
+            return
+
+        except Exception as e:
+            print(f"\n❌ [Brain] 생각 오류: {e}")
+            result['plan'] = parser.finish()
+            return
+
+        result.update(plan=parser.finish(), usage=usage[-1] if usage else None)
+        print(f"   ✅ [Brain/Stream] 완료 ({time.monotonic() - started:.2f}s, {self.llm.last_model})")
+        try:
+            complete = json.loads(parser.buffer)
+        except (TypeError, ValueError) as e:
+            complete = None
+            print(f"❌ [Brain] 응답 해석 실패: {e}")
+        # 잘리거나 깨진 응답은 이미 나간 동작만 두고 대화 창/캐시에는 남기지 않음 (generate_response 와 동일)
+        if isinstance(complete, dict):
+            result.update(turn=parser.buffer, cache=cacheable)
+
+
+class Speculation:
+    """
+    부분 인식 결과로 미리 돌리는 응답 하나
+    - 별도 데몬 스레드에서 LLMEngine._stream 을 돌려 motions 를 모아 둠 (실행하지 않음)
+    - follow(): 이미 모인 motions 를 바로 내보내고, 나머지는 도착하는 대로 이어서 yield
+    """
+
+    def __init__(self, engine, text, timeout):
+        self.text = text
+        self.key = normalize_transcript(text)
+        self.started = time.monotonic()
+        self.motions = []
+        self.result = {}
+        self.done = False
+        self._cancelled = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, args=(engine, timeout), name="llm-speculate", daemon=True)
+        self._thread.start()
+
+    def _run(self, engine, timeout):
+        stream = engine._stream(self.text, timeout, self.result)
+        try:
+            for motion in stream:
+                if self._cancelled.is_set():
+                    break
+                with self._cond:
+                    self.motions.append(motion)
+                    self._cond.notify_all()
+        finally:
+            stream.close()
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def matches(self, text):
+        return normalize_transcript(text) == self.key
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def follow(self):
+        i = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: i < len(self.motions) or self.done)
+                ready = self.motions[i:]
+                finished = self.done
+            i += len(ready)
+            yield from ready
+            if finished and i >= len(self.motions):
+                return
@@ -0,0 +1,282 @@
+import time
+import queue
+import asyncio
+import threading
+import concurrent.futures
+
+from core.voice_interface import suppress_alsa_warnings
+from motion.motion_planner import split_open_keyframe
+from utils.logger import telemetry
+
+STOP_WORDS = ['멈춰', '그만', '정지']
+EXIT_WORDS = ['종료', '꺼줘', '잘자']
+HEAD_JOINTS = {'head_pan', 'head_tilt_up', 'head_tilt_down'}
+
+
+class DaemonWorker(concurrent.futures.Executor):
+    """
+    단일 데몬 스레드 실행기
+    - 블로킹 SDK 호출(마이크 대기 등)이 끝나지 않아도 프로세스 종료를 막지 않음
+      (ThreadPoolExecutor 는 종료 시 작업 스레드를 join 하므로 무한 대기 호출이 있으면 멈춤)
+    """
+
+    def __init__(self, name):
+        self._jobs = queue.SimpleQueue()
+        threading.Thread(target=self._work, name=name, daemon=True).start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _work(self):
+        while True:
+            future, fn, args, kwargs = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class HerobotRuntime:
+    """
+    ★ 듣기 / 생각 / 움직이기를 겹쳐서 실행하는 asyncio 런타임
+
+        [audio] ─audio_q→ [stt] ─text_q→ [llm] ─motion_q→ [motion]
+                                                [vision] (최신 프레임 유지)
+
+    - 각 블로킹 호출은 전용 데몬 스레드에서 실행되므로 팔이 움직이는 동안에도 계속 들음
+    - 새 명령이 들어오면 진행 중인 동작/응답을 선점(preempt)하고 새 계획을 실행
+    - "멈춰" 같은 정지어는 LLM 을 거치지 않고 즉시 현재 동작을 중단
+    """
+
+    def __init__(self, driver, brain, voice, vision, planner, streamer, validator=None, tracker=None,
+                 recorder=None, wake_word="히어로봇"):
+        self.driver = driver
+        self.brain = brain
+        self.voice = voice
+        self.vision = vision
+        self.planner = planner
+        self.streamer = streamer
+        # 실행 전 안전 검사 (motion/safety_validator.py). None 이면 검사 없이 실행
+        self.validator = validator
+        # 얼굴 추적기 (core/face_tracker.py). 계획이 머리 관절을 움직이는 동안 일시 정지
+        self.tracker = tracker
+        # 세션 기록기 (utils/recorder.py). 발화와 LLM 계획을 기록 (버스 쓰기는 드라이버가 기록)
+        self.recorder = recorder
+        self.wake_word = wake_word
+
+        self.workers = {name: DaemonWorker(f"herobot-{name}") for name in ('audio', 'stt', 'llm', 'motion', 'vision')}
+
+        # 선점 세대: 값이 바뀌면 이전 세대의 응답/동작은 모두 버려짐
+        self.generation = 0
+        self.stop_event = None
+        self.latest_frame = None
+        # 호출어 감지 시각 (perf_counter_ns). 첫 동작이 나갈 때 "호출어 → 첫 동작" 구간으로 기록
+        self.wake_stamp = None
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.audio_q = asyncio.Queue(maxsize=4)
+        self.text_q = asyncio.Queue(maxsize=4)
+        self.motion_q = asyncio.Queue(maxsize=64)
+        self.shutdown = asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(self.audio_task(), name="audio"),
+            asyncio.create_task(self.stt_task(), name="stt"),
+            asyncio.create_task(self.llm_task(), name="llm"),
+            asyncio.create_task(self.motion_task(), name="motion"),
+        ]
+        if self.vision is not None:
+            tasks.append(asyncio.create_task(self.vision_task(), name="vision"))
+
+        try:
+            await self.shutdown.wait()
+        finally:
+            self.preempt()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _blocking(self, worker, fn, *args):
+        return self.loop.run_in_executor(self.workers[worker], fn, *args)
+
+    def preempt(self):
+        """진행 중인 동작과 대기 중인 응답을 모두 취소"""
+        self.generation += 1
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for q in (self.text_q, self.motion_q):
+            while not q.empty():
+                q.get_nowait()
+
+    # ------------------------------------------------------------------
+    # Tasks
+    # ------------------------------------------------------------------
+    async def audio_task(self):
+        """호출어 대기 → 명령 녹음 (인식은 stt_task 에서)"""
+        while True:
+            with telemetry.span("wake_word"):
+                awake = await self._blocking('audio', self._quiet, self.voice.wait_for_wake_word, self.wake_word)
+            if not awake:
+                print("👋 시스템을 종료합니다.")
+                self.shutdown.set()
+                return
+            self.wake_stamp = time.perf_counter_ns()
+            telemetry.event("wake")
+
+            with telemetry.span("record"):
+                audio = await self._blocking('audio', self._quiet, self.voice.record_command, self._on_partial)
+            if audio is None:
+                print("⚡ [Idle] 명령을 듣지 못했습니다. 다시 불러주세요.")
+                continue
+            await self.audio_q.put(audio)
+
+    def _on_partial(self, text):
+        """
+        (부분 인식 스레드) 안정된 부분 인식 → LLM 응답을 미리 시작
+        - 동작은 최종 인식이 같은 문장일 때만 llm_task 가 이어받아 실행 (다르면 버림)
+        """
+        if any(w in text for w in STOP_WORDS + EXIT_WORDS):
+            return
+        self.brain.speculate(text)
+
+    async def stt_task(self):
+        while True:
+            audio = await self.audio_q.get()
+            with telemetry.span("stt") as span:
+                text = await self._blocking('stt', self.voice.transcribe, audio)
+                span.set('text', text)
+            if not text:
+                continue
+            if self.recorder is not None:
+                self.recorder.user_input(text)
+
+            if any(w in text for w in STOP_WORDS):
+                print("✋ [Runtime] 정지 명령 - 현재 동작을 중단합니다.")
+                self.brain.cancel_speculation()
+                self.preempt()
+                continue
+
+            if any(w in text for w in EXIT_WORDS):
+                print("👋 시스템을 종료합니다.")
+                self.brain.cancel_speculation()
+                self.shutdown.set()
+                return
+
+            await self.text_q.put(text)
+
+    async def llm_task(self):
+        while True:
+            text = await self.text_q.get()
+            # 밀린 명령이 있으면 가장 최근 것만 처리
+            while not self.text_q.empty():
+                text = self.text_q.get_nowait()
+            # 새 명령은 이전 명령을 선점
+            self.preempt()
+            await self._blocking('llm', self._stream_plan, text, self.generation)
+
+    def _stream_plan(self, text, generation):
+        """(llm 스레드) 스트리밍 응답의 motion 을 완성되는 대로 motion_q 로 전달"""
+        with telemetry.span("llm", text=text):
+            for motion in self.brain.stream_response(text):
+                if generation != self.generation:
+                    print("   ↪️ [Runtime] 새 명령으로 이전 응답을 버립니다.")
+                    return
+                self._post(('motion', generation, motion))
+        if self.recorder is not None and self.brain.last_plan is not None:
+            self.recorder.plan(self.brain.last_plan)
+        self._post(('end', generation, self.brain.last_plan))
+
+    def _post(self, item):
+        asyncio.run_coroutine_threadsafe(self.motion_q.put(item), self.loop).result()
+
+    async def motion_task(self):
+        pending = []
+        pending_generation = None
+
+        while True:
+            kind, generation, payload = await self.motion_q.get()
+            if generation != self.generation:
+                continue
+            if generation != pending_generation:
+                pending = []
+                pending_generation = generation
+
+            if kind == 'motion':
+                pending.append(payload)
+                ready, pending = split_open_keyframe(pending)
+                if ready and not await self._execute(ready):
+                    # Layer 3: 거절된 계획의 나머지는 실행하지 않음
+                    self.preempt()
+                continue
+
+            if pending:
+                executed = await self._execute(pending)
+                pending = []
+                if not executed:
+                    self.preempt()
+                    continue
+            if payload and "text" in payload:
+                print(f"   🗣️  [Say]: {payload['text']}")
+            print("💤 대기 모드로 전환합니다...")
+
+    async def _execute(self, motions):
+        stop = threading.Event()
+        self.stop_event = stop
+        try:
+            return await self._blocking('motion', self._run_trajectory, motions, stop)
+        except asyncio.CancelledError:
+            stop.set()
+            raise
+
+    def _run_trajectory(self, motions, stop):
+        """(motion 스레드) motions → 안전 검사 → 동기화된 최소 저크 궤적 → 고정 주기 스트리밍. 거절 시 False"""
+        start = self.planner.current_positions(self.driver.feedback)
+        if self.validator is not None:
+            with telemetry.span("safety", n=len(motions)):
+                result = self.validator.check(motions, start=start)
+            for reason in result.reasons:
+                print(f"   🛡️ [Safety] {reason}")
+            if result.rejected:
+                print("🙅 [Safety] 위험하거나 불가능한 동작이라 실행하지 않습니다.")
+                return False
+            motions = result.motions
+
+        with telemetry.span("plan", n=len(motions)):
+            trajectory = self.planner.plan(motions, start=start)
+        head = self.tracker is not None and any(m.get('joint') in HEAD_JOINTS for m in motions)
+        if head:
+            self.tracker.pause()
+        wake_stamp, self.wake_stamp = self.wake_stamp, None
+        if wake_stamp is not None:
+            telemetry.since("wake_to_first_motion", wake_stamp)
+        try:
+            with telemetry.span("stream", duration=round(trajectory.duration, 3)) as span:
+                stats = self.streamer.run(trajectory, stop_event=stop)
+                for key in ("jitter_p99_ms", "overruns", "skipped", "busy", "comm_errors"):
+                    span.set(key, stats[key])
+        finally:
+            if head:
+                self.tracker.resume()
+        if stop.is_set():
+            # 중간에 멈췄으므로 다음 계획은 실제로 보낸 마지막 설정점에서 출발
+            self.planner.last_positions = self.streamer.last_setpoint
+        state = "중단" if stop.is_set() else "완료"
+        late = f", 늦은 tick {stats['overruns']}회" if stats['overruns'] else ""
+        print(f"   └─ ({state}) {len(motions)}개 동작 {trajectory.duration:.2f}s, 지터 p99 {stats['jitter_p99_ms']}ms{late}")
+        return True
+
+    async def vision_task(self, interval=0.2):
+        """최신 프레임 참조만 갱신 (캡처는 VisionBrain 의 캡처 스레드가 하므로 대기 없음)"""
+        while True:
+            self.latest_frame = self.vision.capture_frame()
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _quiet(fn, *args):
+        with suppress_alsa_warnings():
+            return fn(*args)
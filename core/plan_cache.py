@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# 앞 대화를 가리키는 말: 같은 발화라도 대화마다 계획이 달라야 하므로 캐시에서 찾지도 저장하지도 않음
+CONTEXT_WORDS = ("다시", "한번더", "또해", "반대", "아까", "방금", "그거", "그것", "저거", "이거",
+                 "똑같", "같은거", "그대로", "그렇게", "마찬가지", "계속", "좀더", "조금더", "더크게", "더빨리", "더천천히")
+
+
+def normalize_transcript(text):
+    """공백/문장부호/대소문자 차이를 없앤 캐시 키용 문자열 ("인사해 봐!" == "인사해봐")"""
+    return re.sub(r"[\W_]+", "", text).lower()
+
+
+def depends_on_context(text):
+    """앞 대화에 기대는 발화인지 ("다시 해 줘", "반대쪽도", "한 번 더")"""
+    key = normalize_transcript(text)
+    return any(word in key for word in CONTEXT_WORDS)
+
+
+def fingerprint(*parts):
+    """하드웨어 스펙/시스템 프롬프트가 바뀌면 이전 캐시가 자동으로 무효화되도록 하는 해시"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+class PlanCache:
+    """
+    ★ 행동 계획(LLM JSON) 캐시 - 디스크에 저장되는 LRU + TTL
+    - 키: 스펙/프롬프트 지문 + 정규화된 발화
+    - 고정(pin)된 계획은 만료/퇴출되지 않음 (데이터 기반 Layer 1 매뉴얼)
+    - motion/manual_library.json 의 {"발화": 계획} 항목은 시작 시 (그리고 지문이 바뀔 때) 자동으로 고정됨
+    - 디스크 쓰기는 응답 경로에서 하지 않음: 변경 후 save_delay 초 뒤 타이머 스레드가 한 번에 저장,
+      종료 시 close() 로 남은 변경을 저장 (save_delay 가 0 이면 매번 바로 저장)
+    """
+
+    def __init__(self, path="cache/plan_cache.json", fingerprint="", max_entries=256,
+                 ttl=7 * 24 * 3600, library_path="motion/manual_library.json", save_delay=5.0):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.library_path = library_path
+        self.save_delay = save_delay
+
+        self.entries = OrderedDict()   # key → {"plan", "created", "pinned"}
+        self.hits = 0
+        self.misses = 0
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._timer = None
+
+        self.load()
+        if library_path:
+            self.load_library(library_path)
+
+    def _key(self, text):
+        return f"{self.fingerprint}:{normalize_transcript(text)}"
+
+    def get(self, text):
+        key = self._key(text)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if not entry['pinned'] and time.time() - entry['created'] > self.ttl:
+                del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['plan']
+
+    def put(self, text, plan, pinned=False):
+        key = self._key(text)
+        with self._lock:
+            old = self.entries.get(key)
+            self.entries[key] = {
+                "plan": plan,
+                "created": time.time(),
+                "pinned": pinned or bool(old and old['pinned']),
+            }
+            self.entries.move_to_end(key)
+            self._evict()
+        self._changed()
+
+    def pin(self, text, plan=None):
+        """검증된 계획을 고정. plan 을 생략하면 이미 캐시된 계획을 고정함"""
+        if plan is None:
+            plan = self.get(text)
+            if plan is None:
+                return False
+        self.put(text, plan, pinned=True)
+        return True
+
+    def unpin(self, text):
+        key = self._key(text)
+        with self._lock:
+            if key not in self.entries:
+                return False
+            self.entries[key]['pinned'] = False
+            self.entries[key]['created'] = time.time()
+        self._changed()
+        return True
+
+    def set_fingerprint(self, fingerprint):
+        """
+        스펙/프롬프트가 바뀌어 지문이 달라졌을 때: 이전 지문의 항목은 버리고 매뉴얼 라이브러리를 새 지문으로 다시 고정
+        """
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return
+            self.fingerprint = fingerprint
+            self.entries = OrderedDict((k, e) for k, e in self.entries.items() if k.startswith(f"{fingerprint}:"))
+        if self.library_path:
+            self.load_library(self.library_path)
+        self._changed()
+
+    def _evict(self):
+        """오래된(앞쪽) 고정되지 않은 항목부터 퇴출"""
+        overflow = len(self.entries) - self.max_entries
+        if overflow <= 0:
+            return
+        for key in [k for k, e in self.entries.items() if not e['pinned']][:overflow]:
+            del self.entries[key]
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ [Cache] 캐시 파일을 읽을 수 없어 새로 시작합니다: {e}")
+            return
+
+        now = time.time()
+        for key, entry in data.get('entries', []):
+            # 지문이 다른(스펙/프롬프트가 바뀐) 항목과 만료된 항목은 버림
+            if not key.startswith(f"{self.fingerprint}:"):
+                continue
+            if not entry.get('pinned') and now - entry.get('created', 0) > self.ttl:
+                continue
+            self.entries[key] = entry
+        self._evict()
+
+    def load_library(self, library_path):
+        try:
+            with open(library_path, 'r', encoding='utf-8') as f:
+                library = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        with self._lock:
+            for text, plan in library.items():
+                self.entries[self._key(text)] = {"plan": plan, "created": time.time(), "pinned": True}
+
+    def _changed(self):
+        """변경 표시 → save_delay 뒤 저장 예약 (이미 예약돼 있으면 그 저장에 합쳐짐)"""
+        if not self.save_delay:
+            self.save()
+            return
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """저장되지 않은 변경이 있으면 지금 저장"""
+        with self._lock:
+            self._timer = None
+            dirty, self._dirty = self._dirty, False
+        if dirty:
+            self.save()
+
+    def close(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (중간에 꺼져도 캐시 파일이 깨지지 않음)"""
+        with self._lock:
+            data = {"entries": list(self.entries.items())}
+            self.saves += 1
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ [Cache] 캐시 저장 실패: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "pinned": sum(1 for e in self.entries.values() if e['pinned']),
+            "hits": self.hits,
+            "misses": self.misses,
+            "saves": self.saves,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -1,49 +1,201 @@
-import cv2
-from google import genai
+import time
+import threading
+import numpy as np
+
+cv2 = None
+
 
 class VisionBrain:
-    def __init__(self, api_key):
+    """
+    ★ 카메라 캡처 스레드 + 필요할 때만 LLM 으로 보내는 시각 모듈
+    - 캡처 스레드가 미리 할당된 링 버퍼(기본 3칸)에 계속 덮어쓰고, 읽는 쪽은 복사 없이 최신 칸의 뷰를 받음
+      (쓰기 스레드는 다음 칸에 쓰므로 받은 뷰는 최소 2프레임 동안 그대로 유지됨)
+    - 프레임마다 축소 흑백 이미지로 장면 변화 점수를 계산 (변화가 없으면 비전 API 호출을 건너뜀)
+    - JPEG 인코딩은 요청이 있을 때만, 프레임별로 한 번만 수행해 캐시
+    """
+
+    def __init__(self, api_key, camera_index=0, model="gemini-3.1-flash-lite-preview",
+                 slots=3, change_threshold=0.04, capture=None):
+        """capture: cv2.VideoCapture 대신 쓸 프레임 소스 (read / set / isOpened / release, 벤치마크용)"""
         print("👁️ [Vision] 일반 웹캠(RGB) 로딩 중...")
-        self.client = genai.Client(api_key=api_key)
-        
+        # cv2 는 임포트가 무거우므로 카메라를 열 때 로드
+        global cv2
+        import cv2
+
+        self.api_key = api_key
+        self.model = model
+        self._client = None
+
+        self.n_slots = slots
+        self.change_threshold = change_threshold
+        self.frames = None               # [slots, H, W, 3] uint8 (첫 프레임 크기로 할당)
+        self.stamps = np.zeros(slots, dtype=np.float64)
+        self.seq = -1
+        self.small = None                # 최신 프레임의 축소 흑백 (32x24)
+        self.motion = 0.0                # 직전 프레임 대비 변화 점수 (0~1)
+
+        self._jpeg_cache = {}            # (seq, max_side, quality) → bytes
+        self._described_small = None     # 마지막으로 LLM 에 보낸 장면
+        self._description = None
+        self.stats_data = {"frames": 0, "read_errors": 0, "encodes": 0, "api_calls": 0, "skipped": 0}
+
         # 일반 웹캠 연결 (0번 인덱스가 기본 카메라)
-        self.cap = cv2.VideoCapture(0)
-        
+        self.cap = capture if capture is not None else cv2.VideoCapture(camera_index)
+        # 드라이버 내부 버퍼를 최소화해 오래된 프레임이 쌓이지 않게 함
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
         if not self.cap.isOpened():
             print("❌ [Vision] 카메라를 열 수 없습니다. 연결을 확인하세요.")
         else:
             print("✅ [Vision] 웹캠 연결 성공!")
+            self.start()
+
+    @property
+    def client(self):
+        """genai 클라이언트 (처음 사용할 때 생성)"""
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    # ------------------------------------------------------------------
+    # 캡처 스레드
+    # ------------------------------------------------------------------
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="camera", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        t_start = time.monotonic()
+        while self._running:
+            slot = (self.seq + 1) % self.n_slots
+            if self.frames is None:
+                ret, frame = self.cap.read()
+                if ret:
+                    self.frames = np.empty((self.n_slots,) + frame.shape, dtype=frame.dtype)
+                    self.frames[slot] = frame
+            else:
+                # 미리 할당된 칸에 바로 디코딩 (프레임마다 새 배열을 만들지 않음)
+                ret, _ = self.cap.read(self.frames[slot])
+
+            if not ret:
+                self.stats_data["read_errors"] += 1
+                time.sleep(0.01)
+                continue
+
+            gray = cv2.cvtColor(self.frames[slot], cv2.COLOR_BGR2GRAY)
+            small = cv2.resize(gray, (32, 24), interpolation=cv2.INTER_AREA)
+            if self.small is not None:
+                self.motion = float(cv2.absdiff(small, self.small).mean()) / 255.0
+            self.small = small
+            self.stamps[slot] = time.monotonic()
+
+            with self._cond:
+                self.seq += 1
+                self.stats_data["frames"] += 1
+                self.stats_data["fps"] = round(self.stats_data["frames"] / (time.monotonic() - t_start), 1)
+                self._cond.notify_all()
+
+    def latest(self):
+        """(seq, timestamp, 읽기 전용 프레임 뷰). 아직 프레임이 없으면 (-1, None, None)"""
+        seq = self.seq
+        if seq < 0:
+            return -1, None, None
+        slot = seq % self.n_slots
+        view = self.frames[slot].view()
+        view.flags.writeable = False
+        return seq, self.stamps[slot], view
+
+    def wait_frame(self, after_seq, timeout=1.0):
+        """after_seq 보다 새로운 프레임이 들어올 때까지 대기 → latest()"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after_seq, timeout=timeout)
+        return self.latest()
 
     def capture_frame(self):
         """
-        현재 화면을 캡처하여 반환합니다.
+        현재 화면을 반환합니다 (캡처 스레드의 최신 프레임, 대기 없음).
         추후 HRI 상호작용(얼굴/제스처 인식)을 위해 사용될 기본 뼈대입니다.
         """
-        if not self.cap.isOpened():
-            return None
+        return self.latest()[2]
+
+    # ------------------------------------------------------------------
+    # 장면 변화 / 인코딩 / 비전 API
+    # ------------------------------------------------------------------
+    def scene_changed(self, threshold=None):
+        """마지막으로 LLM 에 보낸 장면과 비교해 바뀌었는지 (축소 흑백 평균 차이)"""
+        if self._described_small is None or self.small is None:
+            return True
+        threshold = self.change_threshold if threshold is None else threshold
+        return float(cv2.absdiff(self.small, self._described_small).mean()) / 255.0 > threshold
+
+    def encode_jpeg(self, max_side=512, quality=80):
+        """최신 프레임을 축소 JPEG 로 (같은 프레임/설정이면 캐시 재사용) → (seq, bytes)"""
+        seq, _, frame = self.latest()
+        if frame is None:
+            return seq, None
+        key = (seq, max_side, quality)
+        if key not in self._jpeg_cache:
+            h, w = frame.shape[:2]
+            scale = max_side / max(h, w)
+            if scale < 1.0:
+                frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            # 최신 프레임 것만 보관
+            self._jpeg_cache = {key: buf.tobytes() if ok else None}
+            self.stats_data["encodes"] += 1
+        return seq, self._jpeg_cache[key]
 
-        ret, frame = self.cap.read()
-        if not ret:
-            print("❌ [Vision] 프레임을 읽어올 수 없습니다.")
+    def describe(self, prompt="지금 보이는 장면을 한 문장으로 설명해줘.", force=False):
+        """
+        최신 프레임을 Gemini 로 설명
+        - 마지막 호출 이후 장면이 바뀌지 않았으면 API 를 부르지 않고 이전 결과를 반환
+        """
+        if not force and self._description is not None and not self.scene_changed():
+            self.stats_data["skipped"] += 1
+            return self._description
+
+        _, jpeg = self.encode_jpeg()
+        if jpeg is None:
             return None
-            
-        return frame
-        
+
+        from google.genai import types
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=[types.Part.from_bytes(data=jpeg, mime_type='image/jpeg'), prompt],
+        )
+        self.stats_data["api_calls"] += 1
+        self._described_small = self.small.copy()
+        self._description = response.text
+        return self._description
+
+    def stats(self):
+        return dict(self.stats_data, motion=round(self.motion, 4))
+
     def show_monitor(self, frame, text=""):
         """
         모니터링 창을 띄워 현재 시야를 확인합니다.
         """
         display_frame = frame.copy()
         if text:
-            cv2.putText(display_frame, text, (10, 30), 
+            cv2.putText(display_frame, text, (10, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-        
+
         cv2.imshow('HeroBot RGB Monitor', display_frame)
         cv2.waitKey(1)
 
     def close(self):
         """종료 시 리소스 해제"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
         if self.cap and self.cap.isOpened():
             self.cap.release()
         cv2.destroyAllWindows()
-        print("👁️ [Vision] 카메라 종료됨.")
\ No newline at end of file
+        print("👁️ [Vision] 카메라 종료됨.")
@@ -1,25 +1,92 @@
-import speech_recognition as sr
+import os
+import sys
 import time
+import threading
+from contextlib import contextmanager
+from core.audio_frontend import AudioFrontEnd, KeywordSpotter, AdaptiveEndpointer, SpeechSegment
+from utils.logger import telemetry
+
+# speech_recognition 은 VoiceInterface 생성 시 로드 (모듈 임포트 시간 단축)
+sr = None
+
+
+def _load_sr():
+    global sr
+    if sr is None:
+        import speech_recognition
+        sr = speech_recognition
+    return sr
+
+
+@contextmanager
+def suppress_alsa_warnings():
+    fd = sys.stderr.fileno()
+    old_stderr = os.dup(fd)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fd)
+    try:
+        yield
+    finally:
+        os.dup2(old_stderr, fd)
+        os.close(old_stderr)
+        os.close(devnull)
+
+
+class CommandAudio:
+    """
+    녹음된 명령 + 마지막 부분 인식 (transcribe 에서 사용)
+    - partial: 명령 구간 전체를 덮는 부분 인식이 있으면 (완료 Event, [텍스트]) → 최종 STT 를 다시 하지 않음
+    """
+
+    def __init__(self, audio, partial=None):
+        self.audio = audio
+        self.partial = partial
+
 
 class VoiceInterface:
-    def __init__(self):
-        self.r = sr.Recognizer()
-        self.mic = sr.Microphone(device_index=24)
-        
-        # 인식 감도 설정 (Dynamic Energy Threshold)
-        self.r.dynamic_energy_threshold = True
-        self.r.energy_threshold = 300  # 기본 소음 기준값 (조절 가능)
-        self.r.pause_threshold = 0.8   # 말이 0.8초 끊기면 끝난 것으로 간주
+    def __init__(self, front=None, recognizer=None, spotter=None, device_index=24):
+        """
+        - front: 이미 시작된 AudioFrontEnd (None 이면 마이크 device_index 를 열어 시작)
+        - recognizer: recognize_google(audio, language) 를 가진 인식기 (None 이면 sr.Recognizer)
+        - spotter: KeywordSpotter (None 이면 config/wake_templates.npz 템플릿을 쓰는 기본값)
+          (셋 다 벤치마크에서 WAV 재생 / 가짜 STT / 임시 템플릿으로 바꿔 끼우는 용도, utils/latency_bench.py)
+        """
+        _load_sr()
+        self.r = recognizer if recognizer is not None else sr.Recognizer()
+        self.pause_threshold = 0.8   # 말이 0.8초 끊기면 끝난 것으로 간주 (긴 문장 기준)
+        # ★ 짧은 명령은 학습된 더 짧은 쉼으로 끊음 + 말이 잠깐 멈출 때마다 부분 인식
+        self.endpointer = AdaptiveEndpointer(base_pause=self.pause_threshold)
+        self.partial_pause = 0.25
+        # 명령이 끝난 뒤 이 시간 안에 말이 다시 시작되면 너무 일찍 끊은 것으로 봄
+        self.resume_window = 0.6
+        self.last_command_end = None
 
-        # 초기 소음 측정
-        with self.mic as source:
-            print("\n🎤 [Voice] 주변 소음 측정 중... (1초간 침묵해주세요)")
-            self.r.adjust_for_ambient_noise(source, duration=1)
-            print("✅ [Voice] 귀가 열렸습니다. 소음 기준값:", self.r.energy_threshold)
+        # ★ 마이크는 한 번만 열고 계속 링 버퍼에 기록 (VAD + 로컬 호출어 판별)
+        if front is None:
+            print("\n🎤 [Voice] 마이크 스트림 여는 중... (0.5초간 침묵해주세요)")
+            front = AudioFrontEnd(device_index=device_index)
+            front.start()
+        self.front = front
+        self.spotter = spotter if spotter is not None else KeywordSpotter(rate=self.front.rate)
+
+        # 호출어 구간이 끝난 프레임 (명령은 여기서부터 이어서 읽음)
+        self.cursor = self.front.frames_written
+        # 호출어와 한 번에 말한 명령 ("히어로봇 인사해")
+        self.pending_command = None
+
+        self.stt_calls = 0
+        self.partial_calls = 0
+        self.partial_final = 0
+        self.rejected_local = 0
+        print("✅ [Voice] 귀가 열렸습니다. 소음 기준 RMS:", round(self.front.noise_floor))
+
+    def _to_audio_data(self, samples):
+        return sr.AudioData(samples.tobytes(), self.front.rate, 2)
 
     def wait_for_wake_word(self, target_word="히어로봇"):
         """
         호출어(True) 또는 종료(False)를 감지하는 함수
+        - 로컬 VAD/호출어 판별을 통과한 구간만 클라우드 STT 로 보냄
         """
         target_words = [target_word, "히어로", "로봇"]
         # ★ [추가] 종료 키워드 리스트
@@ -27,33 +94,49 @@ class VoiceInterface:
         
         print(f"\n👂 [WakeWord] 저를 불러주세요... (인식 대상: {target_words})")
         
-        with self.mic as source:
-            self.r.adjust_for_ambient_noise(source, duration=0.5)
-        
+        # 지난 명령 이후의 오디오부터 이어서 검사
+        cursor = self.cursor
         while True:
             try:
-                with self.mic as source:
-                    audio = self.r.listen(source, timeout=None, phrase_time_limit=2)
-                
-                text = self.r.recognize_google(audio, language='ko-KR')
-                print(f"   👂 [DEBUG] 들린 말: '{text}'") 
+                # 호출어와 명령을 한 번에 말해도 잘리지 않도록 명령과 같은 최대 길이 (판별은 앞부분만)
+                segment = self.front.next_segment(cursor, pause=0.3, max_len=10)
+                cursor = segment.end
+                self._check_cut_off(segment)
+                samples = self.front.read(segment)
+
+                passed, info = self.spotter.check(samples)
+                if not passed:
+                    self.rejected_local += 1
+                    continue
+
+                self.stt_calls += 1
+                text = self.r.recognize_google(self._to_audio_data(samples), language='ko-KR')
+                print(f"   👂 [DEBUG] 들린 말: '{text}' {info}") 
 
                 # 1. 호출어 확인 -> True 반환 (기존 로직)
-                if any(word in text for word in target_words):
+                matched = [word for word in target_words if word in text]
+                if matched:
                     print(f"⚡ [WakeWord] 호출 감지! (키워드 포함: {text})")
+                    self.cursor = segment.end
+                    # 호출어 뒤에 이어서 말한 명령이 있으면 보관
+                    rest = text.split(matched[0], 1)[1].strip(" ,.!?")
+                    self.pending_command = rest or None
+                    # 첫 실행: STT 로 확인된 호출어 단독 발화를 로컬 판별 템플릿으로 등록
+                    if not rest and self.spotter.enrolling:
+                        n = self.spotter.enroll(samples)
+                        print(f"   🎙️ [WakeWord] 호출어 템플릿 등록 ({n}/{self.spotter.max_templates})")
                     return True
                 
                 # 2. ★ [추가] 종료 명령 확인 -> False 반환
                 if any(word in text for word in exit_words):
                     print(f"👋 [WakeWord] 종료 명령 감지! ({text})")
+                    self.cursor = segment.end
                     return False
                     
                 else:
                     print("   💤 호출어가 포함되어 있지 않습니다. 다시 저를 불러주세요...")
                     # while True 루프이므로 자동으로 다시 마이크 듣기로 돌아갑니다.
                     
-            except sr.WaitTimeoutError:
-                continue
             except sr.UnknownValueError:
                 pass
             except sr.RequestError:
@@ -66,25 +149,111 @@ class VoiceInterface:
         """
         명령어를 듣고 텍스트로 반환하는 함수
         """
+        audio = self.record_command()
+        if audio is None:
+            return None
+        return self.transcribe(audio)
+
+    def record_command(self, on_partial=None):
+        """
+        명령어 녹음만 수행 (인식은 transcribe 에서 별도로)
+        - 마이크를 다시 열지 않고 호출어 직후의 링 버퍼 오디오를 이어서 읽음
+        - 호출어와 같은 문장에 명령이 있었다면 그 텍스트를 그대로 반환
+        - 말이 partial_pause 만큼 멈출 때마다 지금까지의 구간을 백그라운드로 부분 인식하고,
+          인식이 끝날 때까지 말이 다시 시작되지 않았으면 (안정된 가설) on_partial(텍스트) 호출
+        """
+        if self.pending_command:
+            command, self.pending_command = self.pending_command, None
+            return command
+
         print("🎤 [Command] 듣고 있습니다... 말씀하세요!")
         # 삐~ 소리 효과음 재생 코드를 여기에 넣으면 좋습니다.
-        
+
+        partials = {}   # 말이 멈춘 프레임 → (완료 Event, [텍스트])
+
+        def on_pause(start, end):
+            done, result = threading.Event(), [None]
+            partials[end] = (done, result)
+            samples = self.front.read(SpeechSegment(start, end))
+            threading.Thread(target=self._partial, args=(samples, end, done, result, on_partial),
+                             name="stt-partial", daemon=True).start()
+
+        # 5초간 말 안 하면 타임아웃, 말 시작하면 최대 10초까지 듣기
+        segment = self.front.next_segment(
+            self.cursor, pause=self.endpointer.pause_for, max_len=10, start_timeout=5,
+            on_pause=on_pause, partial_pause=self.partial_pause,
+        )
+        if segment is None:
+            self.cursor = self.front.frames_written
+            print("⚠️ [Command] 시간이 초과되었습니다.")
+            return None
+
+        self.cursor = segment.end
+        self.last_command_end = segment.end
+        self.endpointer.learn(segment, self.front.frame_sec)
+        # 마지막 부분 인식이 구간 전체를 덮으면 (그 뒤로 말이 없었으면) 그 결과를 최종으로
+        return CommandAudio(self._to_audio_data(self.front.read(segment)), partials.get(segment.end))
+
+    def _partial(self, samples, end, done, result, on_partial):
+        """(부분 인식 스레드) 구간 하나 인식 → 안정된 가설이면 on_partial"""
+        self.partial_calls += 1
+        try:
+            with telemetry.span("stt.partial"):
+                result[0] = self.r.recognize_google(self._to_audio_data(samples), language='ko-KR')
+            # 추측 실행은 done 전에 시작 (최종 인식이 이 결과를 재사용하면 llm_task 가 바로 이어받음)
+            if on_partial is not None and not self.front.voiced_since(end):
+                telemetry.log("   📝 [Partial] \"{}\"", result[0])
+                on_partial(result[0])
+        except sr.UnknownValueError:
+            pass
+        except Exception as e:
+            telemetry.log("⚠️ [Voice] 부분 인식 오류: {}", e)
+        finally:
+            done.set()
+
+    def _check_cut_off(self, segment):
+        """명령이 끝나자마자 말이 이어졌으면 끝 판정이 너무 빨랐던 것 → pause 를 늘림"""
+        if self.last_command_end is None:
+            return
+        if (segment.start - self.last_command_end) * self.front.frame_sec <= self.resume_window:
+            self.endpointer.cut_off()
+            print(f"   ✂️ [Voice] 명령을 너무 일찍 끊은 것 같아 쉼 기준을 늘립니다. "
+                  f"(짧은 명령 {self.endpointer.short_pause:.2f}s)")
+        self.last_command_end = None
+
+    def transcribe(self, audio):
+        """
+        녹음된 명령어를 텍스트로 변환
+        """
+        # 호출어와 함께 이미 인식된 명령
+        if isinstance(audio, str):
+            print(f"📝 [User]: \"{audio}\"")
+            return audio
+
+        if isinstance(audio, CommandAudio):
+            # ★ 구간 전체를 덮는 부분 인식이 있으면 STT 를 다시 요청하지 않음
+            if audio.partial is not None:
+                done, result = audio.partial
+                done.wait(timeout=10)
+                if result[0]:
+                    self.partial_final += 1
+                    print(f"📝 [User]: \"{result[0]}\" (부분 인식 재사용)")
+                    return result[0]
+            audio = audio.audio
+
         try:
-            with self.mic as source:
-                # 5초간 말 안 하면 타임아웃, 말 시작하면 최대 10초까지 듣기
-                audio = self.r.listen(source, timeout=5, phrase_time_limit=10)
-            
             print("⏳ [Command] 인식 중...")
+            self.stt_calls += 1
             text = self.r.recognize_google(audio, language='ko-KR')
             print(f"📝 [User]: \"{text}\"")
             return text
             
-        except sr.WaitTimeoutError:
-            print("⚠️ [Command] 시간이 초과되었습니다.")
-            return None
         except sr.UnknownValueError:
             print("⚠️ [Command] 무슨 말인지 모르겠어요.")
             return None
         except Exception as e:
             print(f"⚠️ [Command Error] {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def close(self):
+        self.front.close()
@@ -1,64 +1,420 @@
 import json
 import time
+import queue
+import threading
+import contextlib
+import concurrent.futures
+import numpy as np
 from dynamixel_sdk import *
 
+from hardware.sim_bus import create_port_handler
+from utils.logger import telemetry
+
+
+class DxlBus:
+    """
+    ★ 다이나믹셀 버스 하나 (U2D2 어댑터 + 시리얼 체인)
+    - 자기 포트/보드레이트/모터 ID 집합, 포트 잠금, 명령용 GroupSyncWrite 를 가짐
+    - 버스마다 I/O 스레드 하나와 작업 큐: 여러 버스에 걸친 요청은 버스별 스레드에서 동시에 전송
+      (start() 전이나 버스가 하나뿐이면 부른 스레드에서 바로 실행)
+    - 우선 차로: 명령(쓰기)은 command(), 피드백 폴링은 background() 로 포트를 잡음.
+      명령이 기다리는 동안 폴링은 포트를 잡지 않으므로 명령은 진행 중인 읽기 트랜잭션 하나만 기다림
+      정지 명령(command(urgent=True))은 같은 방식으로 일반 명령보다도 먼저 잡음
+    """
+
+    def __init__(self, name, port_name, baudrate, motors, spec, packet_handler, cmd_addr, cmd_len):
+        self.name = name
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.motors = motors                    # {관절 이름: 모터 정보}
+        self.ids = [info['id'] for info in motors.values()]
+
+        # 시뮬레이션 버스는 이 버스의 모터만 가짐
+        bus_spec = dict(spec, robot_info=dict(spec['robot_info'], default_baudrate=baudrate),
+                        motors=[m for m in spec['motors'] if m['name'] in motors])
+        self.portHandler = create_port_handler(port_name, bus_spec)
+        self.packetHandler = packet_handler
+        # 포트는 스레드 안전하지 않으므로 이 버스의 모든 트랜잭션은 이 락 안에서 수행
+        self.lock = threading.RLock()
+        self._commands = 0                      # 포트를 기다리는 명령 수
+        self._urgent = 0                        # 그중 정지 명령 수
+        self._idle = threading.Condition()
+        self.groupSyncWriteCmd = GroupSyncWrite(self.portHandler, packet_handler, cmd_addr, cmd_len)
+
+        self._jobs = queue.SimpleQueue()
+        self._thread = None
+
+    def open(self):
+        if not self.portHandler.openPort():
+            raise Exception(f"❌ 포트 열기 실패: {self.port_name}")
+        if not self.portHandler.setBaudRate(self.baudrate):
+            raise Exception(f"❌ 보드레이트 설정 실패: {self.port_name} @ {self.baudrate}")
+
+    @contextlib.contextmanager
+    def command(self, timeout=None, urgent=False):
+        """
+        ★ 명령용 포트 잠금 (피드백 폴링보다 먼저 잡음) → 잡았으면 True
+        - timeout: 최대 대기 초 (None 이면 무한). 못 잡으면 False 를 넘기고 아무것도 보내지 않아야 함
+        - urgent: 정지 명령용. 일반 명령보다도 먼저 잡음 (진행 중인 트랜잭션 하나만 기다림)
+        """
+        with self._idle:
+            self._commands += 1
+            self._urgent += urgent
+        try:
+            acquired = self._acquire((lambda: False) if urgent else (lambda: self._urgent), timeout)
+        finally:
+            with self._idle:
+                self._commands -= 1
+                self._urgent -= urgent
+                self._idle.notify_all()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.lock.release()
+
+    @contextlib.contextmanager
+    def background(self):
+        """피드백 폴링용 포트 잠금: 기다리는 명령이 없을 때만 잡음"""
+        self._acquire(lambda: self._commands)
+        try:
+            yield
+        finally:
+            self.lock.release()
+
+    def _acquire(self, blocked, timeout=None):
+        """blocked() 가 거짓일 때 포트를 잡음 (잡은 직후 참이 되면 양보하고 다시 기다림) → 잡았으면 True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        remaining = lambda: None if deadline is None else max(0.0, deadline - time.monotonic())
+        while True:
+            with self._idle:
+                if not self._idle.wait_for(lambda: not blocked(), remaining()):
+                    return False
+            wait = remaining()
+            if not self.lock.acquire(timeout=-1 if wait is None else wait):
+                return False
+            if not blocked():
+                return True
+            self.lock.release()
+
+    def transaction_time(self, tx_bytes, rx_bytes, replies=0, return_delay=0.0005, usb_latency=0.001):
+        """트랜잭션 1회의 예상 버스 점유 시간 (1바이트 = 10비트, 응답마다 Return Delay, 응답이 있으면 USB 지연)"""
+        return (tx_bytes + rx_bytes) * 10.0 / self.baudrate + replies * return_delay + (usb_latency if replies else 0.0)
+
+    def start(self):
+        """I/O 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name=f"dxl-{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit(self, fn, *args):
+        """이 버스의 I/O 스레드에서 fn(*args) 실행 → Future"""
+        future = concurrent.futures.Future()
+        if self._thread is None:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        else:
+            self._jobs.put((future, fn, args))
+        return future
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, fn, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def close(self):
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.portHandler.closePort()
+
+
 class DxlDriver:
-    def __init__(self, spec_path="config/hardware_spec.json"):
+    def __init__(self, spec_path="config/hardware_spec.json", port=None):
+        """
+        - port: 스펙의 포트 대신 사용할 포트. "sim" 으로 시작하면 시뮬레이션 버스 (hardware/sim_bus.py)
+          (버스가 여러 개면 "sim" 은 모든 버스를 시뮬레이션으로, 그 외에는 첫 번째 버스의 포트만 바꿈)
+        - 스펙의 "buses": [{"name", "port", "baudrate", "ids": [...]}] 로 모터를 여러 U2D2 에 나눌 수 있음
+          (어느 버스에도 없는 모터는 첫 번째 버스, "buses" 가 없으면 robot_info 의 포트 하나)
+        """
         # 1. 스펙 로드
         with open(spec_path, 'r', encoding='utf-8') as f:
             self.spec = json.load(f)
-        
-        self.port_name = self.spec['robot_info']['port']
-        self.baudrate = self.spec['robot_info']['default_baudrate']
+
         self.motors = {m['name']: m for m in self.spec['motors']}
-        
-        # 2. 통신 핸들러
-        self.portHandler = PortHandler(self.port_name)
         self.packetHandler = PacketHandler(2.0)
 
-        # ★ [추가] SyncWrite 핸들러 (동시 제어용)
-        # 주소 116(Goal Position)에 4바이트씩 씀
+        # 주소 정의
         self.ADDR_GOAL_POSITION = 116
         self.ADDR_GOAL_VELOCITY = 104
-        self.groupSyncWritePos = GroupSyncWrite(self.portHandler, self.packetHandler, self.ADDR_GOAL_POSITION, 4)
-        
-        # 주소 정의
         self.ADDR_OPERATING_MODE = 11
         self.ADDR_TORQUE_ENABLE = 64
         self.ADDR_PROFILE_ACCELERATION = 108
         self.ADDR_PROFILE_VELOCITY = 112
+        # 버스 워치독 (RAM, 단위 20ms): 이 시간 동안 명령이 없으면 속도 제어 모드 모터가 스스로 정지
+        self.ADDR_BUS_WATCHDOG = 98
+
+        # ★ [추가] Indirect Address 영역 (X-Series 공통)
+        # 관절: [Profile Velocity(4) | Goal Position(4)]
+        # 바퀴: [Profile Acceleration(4) | Goal Velocity(4)]
+        # → 모든 모터의 명령이 Indirect Data 1~8 에 연속으로 놓이므로 SyncWrite 한 번으로 전송 가능
+        self.ADDR_INDIRECT_ADDRESS_1 = 168
+        self.ADDR_INDIRECT_DATA_1 = 224
+        self.LEN_COMMAND_FRAME = 8
+
+        # ★ [추가] 상태 피드백 영역: Indirect Data 9~21 (13바이트)
+        # [Present Current(2) | Present Velocity(4) | Present Position(4) | Input Voltage(2) | Temperature(1)]
+        self.ADDR_PRESENT_CURRENT = 126
+        self.ADDR_PRESENT_VELOCITY = 128
+        self.ADDR_PRESENT_POSITION = 132
+        self.ADDR_PRESENT_INPUT_VOLTAGE = 144
+        self.ADDR_PRESENT_TEMPERATURE = 146
+        self.ADDR_FEEDBACK_FRAME = self.ADDR_INDIRECT_DATA_1 + self.LEN_COMMAND_FRAME
+        self.FEEDBACK_LAYOUT = [
+            (self.ADDR_PRESENT_CURRENT, 2),
+            (self.ADDR_PRESENT_VELOCITY, 4),
+            (self.ADDR_PRESENT_POSITION, 4),
+            (self.ADDR_PRESENT_INPUT_VOLTAGE, 2),
+            (self.ADDR_PRESENT_TEMPERATURE, 1),
+        ]
+        self.LEN_FEEDBACK_FRAME = sum(length for _, length in self.FEEDBACK_LAYOUT)
+
+        # 2. 버스 (포트/보드레이트/모터 ID 집합마다 하나)
+        self.buses = self._build_buses(port)
+        self.bus_of = {info['id']: bus for bus in self.buses for info in bus.motors.values()}
+        self.port_name = ",".join(bus.port_name for bus in self.buses)
+        # 단일 버스 호환 (시뮬레이션 벤치마크 등)
+        self.portHandler = self.buses[0].portHandler
+        self.baudrate = self.buses[0].baudrate
+
+        self.feedback = None
+        # 세션 기록기 (utils/recorder.py). 설정되면 실제로 보낸 쓰기/명령과 피드백을 기록
+        self.recorder = None
+
+        # 모터별 마지막으로 쓴 Profile Velocity (speed 생략 시 그대로 유지하기 위함)
+        self.WHEEL_ACC = 50
+        self.profile_velocity = {}
+
+        # ★ 컨트롤 테이블 쉐도우 캐시: {모터 ID: {주소: 마지막으로 성공한 쓰기 값(bytes)}}
+        # 값이 같은 쓰기는 버스에 보내지 않음. 재부팅/통신 실패/에러 상태 시 해당 모터 캐시 삭제
+        self.shadow = {}
+        self.write_stats = {"writes": 0, "suppressed": 0, "frames": 0, "frames_suppressed": 0}
+
+        # 3. 연결 (버스가 여러 개면 버스마다 I/O 스레드)
+        for bus in self.buses:
+            bus.open()
+            if len(self.buses) > 1:
+                bus.start()
 
-        # 3. 연결
-        if not self.portHandler.openPort():
-            raise Exception(f"❌ 포트 열기 실패: {self.port_name}")
-        if not self.portHandler.setBaudRate(self.baudrate):
-            raise Exception(f"❌ 보드레이트 설정 실패: {self.baudrate}")
-            
         print(f"✅ [Driver] 하드웨어 연결 성공 ({self.port_name})")
         
-        # 4. 초기화
-        self.enable_torque(False) 
+        # 4. 초기화 (Indirect Address는 토크가 꺼져 있을 때만 쓸 수 있음)
+        # ★ 모든 단계가 SyncWrite 1~2 패킷 (모터별 TxRx 왕복 없음)
+        self.enable_torque(False)
         self.setup_operating_modes()
+        self.setup_indirect_map()
         self.enable_torque(True)
-        
+
         # ★ 초기에는 '아주 느린 모드'로 설정 (안전 복귀용)
-        self.set_motion_profile(velocity=50, accel=10) 
+        self.set_motion_profile(velocity=50, accel=10)
+
+    # ------------------------------------------------------------------
+    # 버스 분할
+    # ------------------------------------------------------------------
+    def _build_buses(self, port):
+        info = self.spec['robot_info']
+        configs = self.spec.get('buses') or [{"name": "main", "port": info['port'], "baudrate": info['default_baudrate']}]
+        simulated = port is not None and str(port).startswith("sim")
+
+        assigned = {}
+        for k, config in enumerate(configs):
+            for dxl_id in config.get('ids', []):
+                assigned.setdefault(dxl_id, k)
+
+        buses = []
+        for k, config in enumerate(configs):
+            name = config.get('name', f"bus{k}")
+            if simulated:
+                port_name = port if len(configs) == 1 else f"sim://{name}"
+            else:
+                port_name = port if (port and k == 0) else config['port']
+            motors = {m['name']: m for m in self.spec['motors'] if assigned.get(m['id'], 0) == k}
+            buses.append(DxlBus(name, port_name, config.get('baudrate', info['default_baudrate']), motors,
+                                self.spec, self.packetHandler, self.ADDR_INDIRECT_DATA_1, self.LEN_COMMAND_FRAME))
+        return [bus for bus in buses if bus.motors] or buses[:1]
+
+    def _shard(self, items):
+        """{모터 ID: 값} → {버스: {모터 ID: 값}}"""
+        shards = {}
+        for dxl_id, value in items.items():
+            shards.setdefault(self.bus_of[dxl_id], {})[dxl_id] = value
+        return shards
+
+    def _on_buses(self, fn, shards):
+        """
+        ★ 버스별로 fn(bus, 부분) 실행 → {버스: 결과}
+        - 버스가 둘 이상이면 각 버스의 I/O 스레드에서 동시에 (전체 시간 ≈ 가장 느린 버스 하나)
+        """
+        if len(shards) == 1:
+            (bus, part), = shards.items()
+            return {bus: fn(bus, part)}
+        futures = {bus: bus.submit(fn, bus, part) for bus, part in shards.items()}
+        return {bus: future.result() for bus, future in futures.items()}
+
+    # ------------------------------------------------------------------
+    # 컨트롤 테이블 쉐도우 캐시
+    # ------------------------------------------------------------------
+    def write_register(self, dxl_id, addr, length, value):
+        """
+        ★ 쉐도우 캐시를 거치는 레지스터 쓰기 (TxRx)
+        - value: 정수 또는 바이트 리스트
+        - 마지막으로 성공한 쓰기와 값이 같으면 보내지 않고 True
+        """
+        data = self._encode(value, length)
+        shadow = self.shadow.setdefault(dxl_id, {})
+        if shadow.get(addr) == data:
+            self.write_stats["suppressed"] += 1
+            return True
+
+        bus = self.bus_of[dxl_id]
+        with bus.command(), telemetry.span("bus.write", id=dxl_id, addr=addr):
+            result, error = self.packetHandler.writeTxRx(bus.portHandler, dxl_id, addr, length, list(data))
+        self.write_stats["writes"] += 1
+
+        if result != COMM_SUCCESS or error != 0:
+            # 실제 값이 무엇인지 알 수 없으므로 이 모터의 캐시는 모두 버림
+            self.invalidate(dxl_id)
+            reason = self.packetHandler.getTxRxResult(result) if result != COMM_SUCCESS else self.packetHandler.getRxPacketError(error)
+            telemetry.count("bus.comm_errors")
+            telemetry.log("🚨 [Comm Error] ID {} 주소 {} 쓰기 실패: {}", dxl_id, addr, reason)
+            return False
+
+        shadow[addr] = data
+        if self.recorder is not None:
+            self.recorder.register(addr, length, {dxl_id: data})
+        return True
+
+    def sync_write_register(self, addr, length, values):
+        """
+        ★ 여러 모터의 같은 레지스터를 SyncWrite 한 패킷으로 쓰기 (쉐도우 캐시 적용)
+        - values: {모터 ID: 정수 또는 바이트 리스트} (모터마다 값이 달라도 됨)
+        - SyncWrite 에는 상태 패킷이 없으므로 개별 모터의 거부(EEPROM 잠금 등)는 알 수 없음
+          → 토크 OFF 후 EEPROM 쓰기 같은 순서는 호출하는 쪽에서 지켜야 함
+        """
+        pending = {}
+        for dxl_id, value in values.items():
+            data = self._encode(value, length)
+            if self.shadow.get(dxl_id, {}).get(addr) == data:
+                self.write_stats["suppressed"] += 1
+                continue
+            pending[dxl_id] = data
+
+        if not pending:
+            return True
+
+        def send(bus, part):
+            group = GroupSyncWrite(bus.portHandler, self.packetHandler, addr, length)
+            for dxl_id, data in part.items():
+                group.addParam(dxl_id, list(data))
+            with bus.command(), telemetry.span("bus.sync_write", bus=bus.name, addr=addr, n=len(part)):
+                return group.txPacket()
+
+        results = self._on_buses(send, self._shard(pending))
+        self.write_stats["writes"] += len(pending)
+
+        ok = True
+        for bus, result in results.items():
+            if result != COMM_SUCCESS:
+                ok = False
+                for dxl_id in bus.ids:
+                    pending.pop(dxl_id, None)
+                    self.invalidate(dxl_id)
+                telemetry.count("bus.comm_errors")
+                telemetry.log("🚨 [Comm Error] SyncWrite {} 주소 {}: {}", bus.name, addr, self.packetHandler.getTxRxResult(result))
+
+        for dxl_id, data in pending.items():
+            self.shadow.setdefault(dxl_id, {})[addr] = data
+        if self.recorder is not None and pending:
+            self.recorder.register(addr, length, pending)
+        return ok
+
+    @staticmethod
+    def _encode(value, length):
+        if isinstance(value, (list, tuple, bytes, bytearray)):
+            return bytes(value)
+        return (int(value) & ((1 << (8 * length)) - 1)).to_bytes(length, 'little')
+
+    def invalidate(self, dxl_id=None):
+        """쉐도우 캐시 삭제 (dxl_id 가 None 이면 전체)"""
+        if dxl_id is None:
+            self.shadow.clear()
+        else:
+            self.shadow.pop(dxl_id, None)
+
+    def reboot(self, joint_name):
+        """모터 재부팅 (하드웨어 에러 해제용). 재부팅 후에는 RAM 영역이 초기화되므로 캐시도 삭제"""
+        dxl_id = self.motors[joint_name]['id']
+        bus = self.bus_of[dxl_id]
+        with bus.command():
+            result, error = self.packetHandler.reboot(bus.portHandler, dxl_id)
+        self.invalidate(dxl_id)
+        return result == COMM_SUCCESS
 
     def setup_operating_modes(self):
         """운영 모드 설정 (Wheel:1, Joint:3)"""
+        modes = {info['id']: 1 if info.get('type') == 'wheel' else 3 for info in self.motors.values()}
+        self.sync_write_register(self.ADDR_OPERATING_MODE, 1, modes)
+
+    def setup_indirect_map(self):
+        """
+        Indirect Address 매핑
+        - Data 1~8  : move_joints 의 8바이트 명령 프레임
+        - Data 9~21 : StateFeedback 이 읽는 13바이트 상태 프레임
+        """
+        feedback_targets = []
+        for base, length in self.FEEDBACK_LAYOUT:
+            feedback_targets += [base + offset for offset in range(length)]
+
+        maps = {}
         for name, info in self.motors.items():
-            motor_id = info['id']
-            target_mode = 1 if info.get('type') == 'wheel' else 3
-            self.packetHandler.write1ByteTxRx(
-                self.portHandler, motor_id, self.ADDR_OPERATING_MODE, target_mode
-            )
+            if info.get('type') == 'wheel':
+                command_bases = [self.ADDR_PROFILE_ACCELERATION, self.ADDR_GOAL_VELOCITY]
+            else:
+                command_bases = [self.ADDR_PROFILE_VELOCITY, self.ADDR_GOAL_POSITION]
+            targets = [base + offset for base in command_bases for offset in range(4)]
+            targets += feedback_targets
+
+            # Indirect Address n (2바이트) ← 실제 레지스터의 바이트 주소
+            param = []
+            for addr in targets:
+                param += [DXL_LOBYTE(addr), DXL_HIBYTE(addr)]
+
+            maps[info['id']] = param
+
+        # 모든 모터의 매핑 전체를 한 패킷으로 기록
+        self.sync_write_register(self.ADDR_INDIRECT_ADDRESS_1, 2 * (self.LEN_COMMAND_FRAME + self.LEN_FEEDBACK_FRAME), maps)
 
     def enable_torque(self, enable):
         val = 1 if enable else 0
-        for name, info in self.motors.items():
-            self.packetHandler.write1ByteTxRx(
-                self.portHandler, info['id'], self.ADDR_TORQUE_ENABLE, val
-            )
+        ids = [info['id'] for info in self.motors.values()]
+        was_on = {dxl_id: self.shadow.get(dxl_id, {}).get(self.ADDR_TORQUE_ENABLE) == b'\x01' for dxl_id in ids}
+        self.sync_write_register(self.ADDR_TORQUE_ENABLE, 1, {dxl_id: val for dxl_id in ids})
+        if enable:
+            for dxl_id in ids:
+                if not was_on[dxl_id]:
+                    # 토크를 켜면 모터가 Goal Position 을 현재 위치로 덮어씀
+                    self.shadow.get(dxl_id, {}).pop(self.ADDR_GOAL_POSITION, None)
 
     def set_motion_profile(self, velocity=200, accel=50):
         """
@@ -66,22 +422,17 @@ class DxlDriver:
         - velocity (속도): 클수록 빠름 (기본 200, 초기화시 50 추천)
         - accel (가속도): 클수록 급출발/급정지 (기본 50, 부드러움 원하면 10~20)
         """
-        # 바퀴용 가속도
-        WHEEL_ACC = 50 
-        
+        accels, velocities = {}, {}
         for name, info in self.motors.items():
             dxl_id = info['id']
             if info.get('type') == 'wheel':
-                self.packetHandler.write4ByteTxRx(
-                    self.portHandler, dxl_id, self.ADDR_PROFILE_ACCELERATION, WHEEL_ACC
-                )
+                accels[dxl_id] = self.WHEEL_ACC
             else:
-                self.packetHandler.write4ByteTxRx(
-                    self.portHandler, dxl_id, self.ADDR_PROFILE_ACCELERATION, int(accel)
-                )
-                self.packetHandler.write4ByteTxRx(
-                    self.portHandler, dxl_id, self.ADDR_PROFILE_VELOCITY, int(velocity)
-                )
+                accels[dxl_id] = int(accel)
+                velocities[dxl_id] = int(velocity)
+                self.profile_velocity[name] = int(velocity)
+        self.sync_write_register(self.ADDR_PROFILE_ACCELERATION, 4, accels)
+        self.sync_write_register(self.ADDR_PROFILE_VELOCITY, 4, velocities)
         print(f"⚡ [Settings] 모션 프로파일 변경 (Vel:{velocity}, Acc:{accel})")
 
     def move_joint(self, joint_name, value, velocity=None):
@@ -89,94 +440,371 @@ class DxlDriver:
         통합 이동 함수 (속도 제어 추가됨)
         - velocity: 이 동작을 수행할 속도 (0 ~ 1000). None이면 기본값 사용.
         """
-        if joint_name not in self.motors:
-            print(f"⚠️ 존재하지 않는 모터: {joint_name}")
-            return
+        return self.move_joints({joint_name: (value, velocity)})
 
-        info = self.motors[joint_name]
-        dxl_id = info['id']
-        motor_type = info.get('type', 'joint')
+    def move_joints(self, commands, force=False, timeout=None, urgent=False, cancel=None, failures=None):
+        """
+        ★ 여러 관절을 한 번의 SyncWrite 패킷으로 동시에 이동
+        - commands: {관절이름: (pos, speed)} 또는 {관절이름: pos}
+        - 관절은 Profile Velocity + Goal Position, 바퀴는 Goal Velocity 로 같은 프레임에 실림
+        - speed 가 None 이면 해당 모터에 마지막으로 설정된 Profile Velocity 유지
+        - 쉐도우 캐시와 같은 (프로파일, 목표) 인 모터는 프레임에서 빠지고, 모두 같으면 패킷을 보내지 않음
+        - 궤적 스트리머와 얼굴 추적기가 서로 다른 스레드에서 부르므로 버스별 프레임 구성부터 전송까지 그 버스의 락 안에서 수행
+        - 관절이 여러 버스에 있으면 버스마다 SyncWrite 한 패킷씩 동시에 전송
+        - force: 쉐도우 캐시와 같아도 전송 (버스 워치독 갱신용)
+        - timeout: 버스를 기다릴 최대 초. 그 안에 못 잡은 버스의 프레임은 보내지 않고 False
+          (실패가 아니므로 쉐도우는 그대로. 부른 쪽이 다음 프레임에 합쳐 보내면 됨)
+        - urgent: 정지 명령. 피드백 폴링과 다른 명령보다 먼저 버스를 잡음 (DxlBus.command)
+        - cancel: 버스를 잡은 뒤 전송 직전에 부르는 함수. 참이면 보내지 않음
+          (버스를 기다리는 동안 더 새로운 명령(예: 정지)이 나갔으면 오래된 프레임을 버리기 위함)
+        - failures: 리스트를 주면 실패한 버스마다 "busy"(timeout 초과) 또는 "comm_error" 를 추가
+        """
+        by_bus = {}
+        for joint_name, command in commands.items():
+            info = self.motors.get(joint_name)
+            if info is None:
+                telemetry.log("⚠️ 존재하지 않는 모터: {}", joint_name)
+                continue
+            by_bus.setdefault(self.bus_of[info['id']], {})[joint_name] = command
+        if not by_bus:
+            return True
 
-        # 안전 범위 체크
-        safe_val = int(max(info['min'], min(value, info['max'])))
-        
-        # ★ [추가] 동작별 속도 설정 (이 동작만 느리게/빠르게 하고 싶을 때)
-        if velocity is not None and motor_type != 'wheel':
-            # 속도 프로파일 변경 (Goal Velocity 아님! Profile Velocity임)
-            self.packetHandler.write4ByteTxRx(
-                self.portHandler, dxl_id, self.ADDR_PROFILE_VELOCITY, int(velocity)
-            )
-        
-        # 명령 패킷 전송
-        if motor_type == 'wheel':
-            dxl_comm_result, dxl_error = self.packetHandler.write4ByteTxRx(
-                self.portHandler, dxl_id, self.ADDR_GOAL_VELOCITY, safe_val
-            )
-        else:
-            dxl_comm_result, dxl_error = self.packetHandler.write4ByteTxRx(
-                self.portHandler, dxl_id, self.ADDR_GOAL_POSITION, safe_val
-            )
-            
-        if dxl_comm_result != COMM_SUCCESS:
-            print(f"🚨 [Comm Error] ID:{dxl_id} {self.packetHandler.getTxRxResult(dxl_comm_result)}")
-        elif dxl_error != 0:
-            error_msg = self.packetHandler.getRxPacketError(dxl_error)
-            print(f"🔥 [HW Error] ID:{dxl_id} {error_msg}")
-
-    def go_to_neutral(self):
-        """
-        ★ 안정화된 초기화 함수 (16, 17번 과부하 방지 시차 적용)
-        """
-        print("\n⚡ [System] 로봇 자세 초기화 (Slow & Sync Mode)...")
-        self.set_motion_profile(velocity=40, accel=10) 
-        self.enable_torque(True)
-        
-        self.groupSyncWritePos.clearParam()
-        target_motor_count = 0
-        
-        # 1. 16번, 17번을 제외한 나머지 관절만 먼저 동시 이동 준비
-        for name, info in self.motors.items():
-            if info.get('type') == 'wheel':
-                self.move_joint(name, 0)
+        results = self._on_buses(lambda bus, part: self._move_joints(bus, part, force, timeout, urgent, cancel), by_bus)
+
+        ok = True
+        rows = []
+        for bus, (result, sent, suppressed) in results.items():
+            self.write_stats["frames_suppressed"] += suppressed
+            self.write_stats["frames"] += len(sent)
+            if result is None:
                 continue
-                
-            motor_id = info['id']
-            # ★ 16번과 17번은 이 첫 번째 동시 출발에서 제외!
-            if motor_id in [16, 17]:
+            if result == COMM_PORT_BUSY:
+                ok = False
+                telemetry.count("bus.busy")
+                if failures is not None:
+                    failures.append("busy")
                 continue
-                
-            target_pos = info['neutral']
-            param_goal_position = [
-                DXL_LOBYTE(DXL_LOWORD(target_pos)),
-                DXL_HIBYTE(DXL_LOWORD(target_pos)),
-                DXL_LOBYTE(DXL_HIWORD(target_pos)),
-                DXL_HIBYTE(DXL_HIWORD(target_pos))
-            ]
-            
-            if self.groupSyncWritePos.addParam(motor_id, param_goal_position):
-                target_motor_count += 1
-
-        # 몸통 및 팔 윗부분 먼저 동시 출발
-        self.groupSyncWritePos.txPacket()
-        print(f"✅ [System] {target_motor_count}개 관절 선행 이동")
-        
-        # 2. ★ 다른 관절이 자리를 잡을 때까지 1.5초 대기 (전력 및 관성 안정화)
-        time.sleep(1.5)
-        
-        # 3. 마지막으로 손목(16번)과 손(17번) 부드럽게 개별 이동
-        print("✅ [System] 손목(16) 및 손(17) 순차 이동")
-        self.move_joint('l_wrist_pitch', self.motors['l_wrist_pitch']['neutral'], velocity=30)
-        time.sleep(0.5)
-        self.move_joint('l_hand', self.motors['l_hand']['neutral'], velocity=30)
-        time.sleep(1.0)
-        
+            if result != COMM_SUCCESS:
+                ok = False
+                telemetry.count("bus.comm_errors")
+                if failures is not None:
+                    failures.append("comm_error")
+                telemetry.log("🚨 [Comm Error] SyncWrite {} {}", bus.name, self.packetHandler.getTxRxResult(result))
+                continue
+            rows += [(dxl_id, profile, value) for dxl_id, (_, _, profile, value) in sent.items()]
+        if self.recorder is not None and rows:
+            self.recorder.command(rows)
+        return ok
+
+    def _move_joints(self, bus, commands, force=False, timeout=None, urgent=False, cancel=None):
+        """(버스 하나) 프레임 구성 → 전송 → 쉐도우 갱신. (전송 결과 또는 None, sent, 생략 수)"""
+        with bus.command(timeout, urgent) as acquired:
+            if not acquired:
+                return COMM_PORT_BUSY, {}, 0
+            if cancel is not None and cancel():
+                return None, {}, 0
+            bus.groupSyncWriteCmd.clearParam()
+            sent = {}
+            suppressed = 0
+
+            for joint_name, command in commands.items():
+                if isinstance(command, (tuple, list)):
+                    value, velocity = command
+                else:
+                    value, velocity = command, None
+
+                info = self.motors[joint_name]
+
+                # 안전 범위 체크
+                safe_val = int(max(info['min'], min(value, info['max'])))
+
+                if info.get('type') == 'wheel':
+                    profile = self.WHEEL_ACC
+                    registers = (self.ADDR_PROFILE_ACCELERATION, self.ADDR_GOAL_VELOCITY)
+                else:
+                    if velocity is not None:
+                        self.profile_velocity[joint_name] = int(velocity)
+                    profile = self.profile_velocity.get(joint_name, 0)
+                    registers = (self.ADDR_PROFILE_VELOCITY, self.ADDR_GOAL_POSITION)
+
+                param = self._to_bytes4(profile) + self._to_bytes4(safe_val)
+                dxl_id = info['id']
+                shadow = self.shadow.get(dxl_id, {})
+                if not force and shadow.get(registers[0]) == bytes(param[:4]) and shadow.get(registers[1]) == bytes(param[4:]):
+                    suppressed += 1
+                    continue
+
+                bus.groupSyncWriteCmd.addParam(dxl_id, param)
+                sent[dxl_id] = (registers, param, profile, safe_val)
+
+            if not sent:
+                return None, sent, suppressed
+
+            with telemetry.span("bus.cmd", bus=bus.name, n=len(sent)):
+                result = bus.groupSyncWriteCmd.txPacket()
+            bus.groupSyncWriteCmd.clearParam()
+
+            if result != COMM_SUCCESS:
+                for dxl_id in sent:
+                    self.invalidate(dxl_id)
+                return result, sent, suppressed
+
+            for dxl_id, (registers, param, _, _) in sent.items():
+                shadow = self.shadow.setdefault(dxl_id, {})
+                shadow[registers[0]] = bytes(param[:4])
+                shadow[registers[1]] = bytes(param[4:])
+            return result, sent, suppressed
+
+    @staticmethod
+    def _to_bytes4(value):
+        value = int(value)
+        return [
+            DXL_LOBYTE(DXL_LOWORD(value)),
+            DXL_HIBYTE(DXL_LOWORD(value)),
+            DXL_LOBYTE(DXL_HIWORD(value)),
+            DXL_HIBYTE(DXL_HIWORD(value))
+        ]
+
+    def go_to_neutral(self, velocity=40, accel=10):
+        """
+        ★ 안정화된 초기화 함수
+        - 전류 예산 스케줄러(motion/power_scheduler.py)가 현재 위치/전류/온도로 관절별 전류를 추정해
+          예산 안에서 동시에 출발할 수 있는 관절끼리 웨이브로 묶음 (예전의 16·17번 제외 + 고정 sleep 대체)
+        """
+        from motion.power_scheduler import PowerScheduler
+
+        print("\n⚡ [System] 로봇 자세 초기화 (Power-aware Mode)...")
+        self.set_motion_profile(velocity=velocity, accel=accel)
+        self.enable_torque(True)
+
+        targets = {name: info['neutral'] for name, info in self.motors.items()}
+        schedule = PowerScheduler(self).move(targets, velocity=velocity, accel=accel)
+        if schedule.skipped:
+            print(f"⚠️ [System] 과열로 이동하지 않은 관절: {', '.join(schedule.skipped)}")
+
         self.set_motion_profile(velocity=200, accel=50) # 다시 정상 속도 복귀
 
+    def start_feedback(self, rate_hz=50, depth=64, fast=False, bus_share=0.5, max_hold=0.02):
+        """
+        ★ 상태 피드백 스레드 시작 (이미 실행 중이면 그대로 반환)
+        - rate_hz: 목표 폴링 주기. 버스가 감당할 수 있는 주기보다 높으면 그 한계로 낮춤
+          (57600bps 에서 19개 모터 전체 읽기는 약 95ms → bus_share 0.5 면 약 5Hz)
+        - fast: True 면 Fast Sync Read (응답 패킷 1개) 사용
+        - bus_share: 피드백이 쓸 수 있는 버스 시간 비율 (나머지는 명령용으로 비워 둠)
+        - max_hold: 읽기 트랜잭션 1회가 버스를 잡는 최대 시간 (명령이 기다리는 최대 시간)
+        """
+        if self.feedback is None:
+            self.feedback = StateFeedback(self, rate_hz=rate_hz, depth=depth, fast=fast,
+                                          bus_share=bus_share, max_hold=max_hold)
+            self.feedback.start()
+        return self.feedback
+
     def close(self):
-        for name, info in self.motors.items():
-            if info.get('type') == 'wheel':
-                self.move_joint(name, 0)
+        if self.feedback:
+            self.feedback.stop()
+        self.move_joints({name: 0 for name, info in self.motors.items() if info.get('type') == 'wheel'})
         time.sleep(0.5)
         self.enable_torque(False)
-        self.portHandler.closePort()
-        print("👋 [Driver] 연결 종료")
\ No newline at end of file
+        for bus in self.buses:
+            bus.close()
+        print("👋 [Driver] 연결 종료")
+
+
+class StateFeedback:
+    """
+    ★ 백그라운드 상태 피드백 서비스
+    - 매 주기 GroupSyncRead(또는 Fast Sync Read) 로 모든 모터의 상태를 읽음
+      (버스가 여러 개면 버스마다 동시에. 실패한 버스/묶음의 모터는 이전 값을 유지)
+    - 한 버스의 모터는 max_hold 초 안에 끝나는 묶음으로 나눠 읽고, 묶음마다 포트를 다시 잡음
+      → 명령(DxlBus.command)은 진행 중인 묶음 하나만 기다리면 포트를 먼저 가져감
+    - 폴링 후에는 포트를 잡고 있던 시간에 비례한 쉼을 둬 버스 시간의 bus_share 이상을 쓰지 않음
+      (주기가 밀려도 곧바로 다시 읽지 않음)
+    - 결과는 미리 할당된 NumPy 링 버퍼 [슬롯, 모터 ID, 필드] 에 기록
+    - 읽는 쪽은 락 없이 latest() 로 가장 최근 슬롯을 가져감
+      (쓰기 스레드는 슬롯을 다 채운 뒤에 seq 를 올리므로, 링 한 바퀴 안에서는 찢어진 값이 보이지 않음)
+    """
+    # 필드 인덱스
+    CURRENT = 0
+    VELOCITY = 1
+    POSITION = 2
+    VOLTAGE = 3
+    TEMPERATURE = 4
+    N_FIELDS = 5
+
+    def __init__(self, driver, rate_hz=50, depth=64, fast=False, bus_share=0.5, max_hold=0.02):
+        self.driver = driver
+        self.depth = depth
+        self.fast = fast
+        self.bus_share = bus_share
+
+        self.ids = [info['id'] for info in driver.motors.values()]
+        self.index = {name: info['id'] for name, info in driver.motors.items()}
+
+        # 링 버퍼 (ID 로 바로 인덱싱할 수 있도록 max_id + 1 크기)
+        self.buffer = np.zeros((depth, max(self.ids) + 1, self.N_FIELDS), dtype=np.int32)
+        self.stamps = np.zeros(depth, dtype=np.float64)
+        self.seq = -1
+
+        self.cycles = 0
+        self.comm_errors = 0
+        self.overruns = 0
+        self.last_hold = 0.0
+
+        # 버스별 GroupSyncRead 묶음 + 한 주기의 예상 시간 (버스끼리는 동시에 읽으므로 가장 느린 버스)
+        self.groups = {}
+        self.cycle_time = 0.0
+        for bus in driver.buses:
+            size = self._chunk_size(bus, max_hold)
+            self.groups[bus] = []
+            for k in range(0, len(bus.ids), size):
+                group = GroupSyncRead(bus.portHandler, driver.packetHandler, driver.ADDR_FEEDBACK_FRAME, driver.LEN_FEEDBACK_FRAME)
+                for dxl_id in bus.ids[k:k + size]:
+                    group.addParam(dxl_id)
+                self.groups[bus].append(group)
+            self.cycle_time = max(self.cycle_time, sum(self._read_time(bus, len(group.data_dict)) for group in self.groups[bus]))
+
+        # 목표 주기가 버스 한계보다 빠르면 한계로
+        self.target_hz = rate_hz
+        self.period = max(1.0 / rate_hz, self.cycle_time / bus_share)
+
+        # 프레임 내 각 필드의 (오프셋, 길이, 부호 여부)
+        self._fields = []
+        offset = 0
+        for (addr, length), signed in zip(driver.FEEDBACK_LAYOUT, [True, True, True, False, False]):
+            self._fields.append((offset, length, signed))
+            offset += length
+
+        self._running = False
+        self._thread = None
+        self._started = None
+
+    def _read_time(self, bus, n):
+        """모터 n 개 읽기 트랜잭션 1회의 예상 시간"""
+        length = self.driver.LEN_FEEDBACK_FRAME
+        if self.fast:
+            return bus.transaction_time(14 + n, 10 + n * (length + 4), replies=1)
+        return bus.transaction_time(14 + n, n * (length + 11), replies=n)
+
+    def _chunk_size(self, bus, max_hold):
+        size = max(1, len(bus.ids))
+        while size > 1 and self._read_time(bus, size) > max_hold:
+            size -= 1
+        return size
+
+    def start(self):
+        self._running = True
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name="dxl-feedback", daemon=True)
+        self._thread.start()
+        rate = 1.0 / self.period
+        limit = f", 버스 한계로 목표 {self.target_hz:.0f}Hz → {rate:.1f}Hz" if rate < self.target_hz else ""
+        chunks = sum(len(groups) for groups in self.groups.values())
+        print(f"📡 [Feedback] 상태 피드백 시작 ({len(self.ids)}개 모터, {chunks}묶음, "
+              f"주기당 약 {self.cycle_time * 1000:.0f}ms, {rate:.1f}Hz{limit})")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _loop(self):
+        next_tick = time.monotonic()
+        while self._running:
+            self.poll_once()
+            finished = time.monotonic()
+
+            # 누적 오차 없이 다음 주기로 (밀린 주기는 건너뜀)
+            # 단, 이번에 포트를 잡고 있던 시간에 비례한 쉼은 항상 둠 → 밀려도 곧바로 다시 읽지 않음
+            gap = self.last_hold * (1.0 - self.bus_share) / self.bus_share
+            next_tick += self.period
+            if next_tick < finished:
+                self.overruns += 1
+                telemetry.count("feedback.overruns")
+            next_tick = max(next_tick, finished + gap)
+            time.sleep(next_tick - finished)
+
+    def poll_once(self):
+        """버스마다 묶음별 트랜잭션으로 전체 상태를 읽어 다음 슬롯에 기록 (한 묶음이라도 성공하면 공개)"""
+        with telemetry.span("bus.sync_read", buses=len(self.groups)):
+            reads = self.driver._on_buses(self._read, self.groups)
+        stamp = time.monotonic()
+        results = {bus: codes for bus, (codes, _) in reads.items()}
+        self.last_hold = max(hold for _, hold in reads.values())
+
+        failed = sum(result != COMM_SUCCESS for codes in results.values() for result in codes)
+        if failed:
+            self.comm_errors += failed
+            telemetry.count("bus.comm_errors", failed)
+            if failed == sum(len(codes) for codes in results.values()):
+                return False
+
+        seq = self.seq + 1
+        slot = self.buffer[seq % self.depth]
+        if failed and self.seq >= 0:
+            slot[:] = self.buffer[self.seq % self.depth]
+        for bus, groups in self.groups.items():
+            for group, result in zip(groups, results[bus]):
+                if result != COMM_SUCCESS:
+                    continue
+                for dxl_id, raw in group.data_dict.items():
+                    row = slot[dxl_id]
+                    for field, (offset, length, signed) in enumerate(self._fields):
+                        row[field] = int.from_bytes(raw[offset:offset + length], 'little', signed=signed)
+        self.stamps[seq % self.depth] = stamp
+        if self.driver.recorder is not None:
+            self.driver.recorder.feedback(stamp, self.ids, slot)
+
+        # 슬롯을 다 채운 뒤 공개
+        self.seq = seq
+        self.cycles += 1
+        return True
+
+    def _read(self, bus, groups):
+        """
+        (버스 하나) 묶음마다 Sync Read → (결과 코드 리스트, 포트를 잡고 있던 시간)
+        묶음 사이에 기다리는 명령이 있으면 먼저 보냄
+        """
+        results, hold = [], 0.0
+        for group in groups:
+            with bus.background():
+                started = time.monotonic()
+                results.append(group.fastSyncRead() if self.fast else group.txRxPacket())
+                hold += time.monotonic() - started
+        return results, hold
+
+    def latest(self):
+        """
+        가장 최근 상태 (timestamp, [모터 ID, 필드] 읽기 전용 뷰). 아직 읽은 적이 없으면 (None, None)
+        """
+        seq = self.seq
+        if seq < 0:
+            return None, None
+        view = self.buffer[seq % self.depth].view()
+        view.flags.writeable = False
+        return self.stamps[seq % self.depth], view
+
+    def history(self, n):
+        """최근 n 개 샘플 (오래된 것부터) 의 복사본: (timestamps[n], states[n, 모터 ID, 필드])"""
+        seq = self.seq
+        n = min(n, seq + 1, self.depth)
+        if n <= 0:
+            return self.stamps[:0].copy(), self.buffer[:0].copy()
+        slots = np.arange(seq - n + 1, seq + 1) % self.depth
+        return self.stamps[slots], self.buffer[slots]
+
+    def get(self, joint_name, field=POSITION):
+        """관절 이름으로 최신 값 하나 조회"""
+        _, state = self.latest()
+        if state is None:
+            return None
+        return int(state[self.index[joint_name], field])
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            "cycles": self.cycles,
+            "rate_hz": round(self.cycles / elapsed, 1) if elapsed > 0 else 0.0,
+            "comm_errors": self.comm_errors,
+            "overruns": self.overruns,
+        }
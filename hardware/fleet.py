@@ -0,0 +1,163 @@
+import sys
+import time
+import multiprocessing
+
+from utils.logger import telemetry
+
+
+def _serve(conn, spec_path, port, feedback_hz):
+    """
+    (로봇 프로세스) DxlDriver 하나를 소유하고 파이프로 온 (메서드, args, kwargs) 를 실행
+    - 응답: ("ok", 결과) 또는 ("error", 오류 문자열)
+    - "state": 최신 피드백 (timestamp, [모터 ID, 필드] 리스트), "attr": 드라이버 속성 값
+    """
+    from hardware.dxl_driver import DxlDriver
+
+    try:
+        driver = DxlDriver(spec_path, port=port)
+        if feedback_hz:
+            driver.start_feedback(rate_hz=feedback_hz)
+    except Exception as e:
+        conn.send(("error", repr(e)))
+        return
+    conn.send(("ok", driver.port_name))
+
+    try:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except EOFError:
+                break
+            if method == "close":
+                break
+            try:
+                if method == "state":
+                    stamp, state = driver.feedback.latest() if driver.feedback else (None, None)
+                    result = (stamp, state.tolist() if state is not None else None)
+                elif method == "attr":
+                    result = getattr(driver, args[0])
+                else:
+                    result = getattr(driver, method)(*args, **kwargs)
+                conn.send(("ok", result))
+            except Exception as e:
+                conn.send(("error", repr(e)))
+    finally:
+        driver.close()
+        try:
+            conn.send(("ok", None))
+        except (BrokenPipeError, OSError):
+            pass
+        conn.close()
+
+
+class RobotHandle:
+    """
+    로봇 프로세스 하나의 대리자
+    - handle.move_joints({...}) 처럼 DxlDriver 메서드를 그대로 부름 (결과는 피클 가능해야 함)
+    - 파이프 하나를 쓰므로 한 핸들은 한 스레드에서만 사용
+    """
+
+    def __init__(self, name, process, conn):
+        self.name = name
+        self.process = process
+        self.conn = conn
+
+    def send(self, method, *args, **kwargs):
+        self.conn.send((method, args, kwargs))
+
+    def receive(self):
+        status, result = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(f"[{self.name}] {result}")
+        return result
+
+    def call(self, method, *args, **kwargs):
+        self.send(method, *args, **kwargs)
+        return self.receive()
+
+    def state(self):
+        return self.call("state")
+
+    def attr(self, name):
+        return self.call("attr", name)
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self.call(method, *args, **kwargs)
+
+
+class Fleet:
+    """
+    ★ 여러 로봇을 로봇별 프로세스로 구동
+    - robots: {이름: {"spec": 스펙 경로, "port": 포트 또는 None, "feedback_hz": 0}}
+    - 로봇마다 DxlDriver 를 자기 프로세스에서 소유 (GIL/포트 락을 로봇끼리 공유하지 않음)
+    - broadcast: 모든 로봇에 먼저 보낸 뒤 한꺼번에 응답을 받으므로 전체 시간 ≈ 가장 느린 로봇 하나
+    """
+
+    def __init__(self, robots):
+        ctx = multiprocessing.get_context("spawn")
+        self.robots = {}
+        for name, config in robots.items():
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_serve, name=f"robot-{name}", daemon=True,
+                                  args=(child, config.get("spec", "config/hardware_spec.json"),
+                                        config.get("port"), config.get("feedback_hz", 0)))
+            process.start()
+            child.close()
+            self.robots[name] = RobotHandle(name, process, parent)
+
+        for name, handle in self.robots.items():
+            port_name = handle.receive()
+            print(f"🤖 [Fleet] {name} 준비 완료 ({port_name}, pid {handle.process.pid})")
+
+    def __getitem__(self, name):
+        return self.robots[name]
+
+    def broadcast(self, method, *args, **kwargs):
+        """모든 로봇에서 같은 메서드 실행 → {이름: 결과}"""
+        for handle in self.robots.values():
+            handle.send(method, *args, **kwargs)
+        return {name: handle.receive() for name, handle in self.robots.items()}
+
+    def close(self):
+        for handle in self.robots.values():
+            try:
+                handle.send("close")
+            except (BrokenPipeError, OSError):
+                pass
+        for handle in self.robots.values():
+            try:
+                handle.receive()
+            except (EOFError, OSError, RuntimeError):
+                pass
+            handle.process.join(timeout=3.0)
+            if handle.process.is_alive():
+                handle.process.terminate()
+        print("👋 [Fleet] 모든 로봇 종료")
+
+
+def benchmark(n_robots=2, spec_path="config/hardware_spec.json", frames=20):
+    """시뮬레이션 로봇 n 대에 같은 자세 프레임을 보내 로봇 수에 따른 전체 시간 측정"""
+    n_robots = int(n_robots)
+    frames = int(frames)
+    fleet = Fleet({f"sim{i}": {"spec": spec_path, "port": f"sim://robot{i}"} for i in range(n_robots)})
+    try:
+        first = next(iter(fleet.robots.values()))
+        motors = first.attr("motors")
+        joints = [name for name, info in motors.items() if info.get('type') != 'wheel']
+
+        t0 = time.perf_counter()
+        for k in range(frames):
+            offset = 100 if k % 2 else -100
+            fleet.broadcast("move_joints", {name: motors[name]['neutral'] + offset for name in joints})
+        elapsed = time.perf_counter() - t0
+        telemetry.observe("fleet.frame", elapsed / frames * 1e6)
+        print(f"📊 [Fleet] 로봇 {n_robots}대 × 자세 {frames}개: {elapsed:.3f}s "
+              f"(프레임당 {elapsed / frames * 1000:.1f}ms)")
+    finally:
+        fleet.close()
+
+
+if __name__ == '__main__':
+    benchmark(*sys.argv[1:])
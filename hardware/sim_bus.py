@@ -0,0 +1,472 @@
+import sys
+import json
+import time
+import threading
+from dynamixel_sdk import *
+
+# ==============================================================================
+# ⚙️ 시뮬레이션 설정 (X-Series 공통 컨트롤 테이블)
+# ==============================================================================
+TABLE_SIZE = 700
+
+ADDR_MODEL_NUMBER = 0
+ADDR_FIRMWARE_VERSION = 6
+ADDR_ID = 7
+ADDR_BAUD_RATE = 8
+ADDR_RETURN_DELAY_TIME = 9
+ADDR_OPERATING_MODE = 11
+ADDR_TORQUE_ENABLE = 64
+ADDR_HARDWARE_ERROR_STATUS = 70
+ADDR_GOAL_VELOCITY = 104
+ADDR_PROFILE_ACCELERATION = 108
+ADDR_PROFILE_VELOCITY = 112
+ADDR_GOAL_POSITION = 116
+ADDR_PRESENT_CURRENT = 126
+ADDR_PRESENT_VELOCITY = 128
+ADDR_PRESENT_POSITION = 132
+ADDR_PRESENT_INPUT_VOLTAGE = 144
+ADDR_PRESENT_TEMPERATURE = 146
+ADDR_INDIRECT_ADDRESS_1 = 168
+ADDR_INDIRECT_DATA_1 = 224
+N_INDIRECT = 28
+
+MODEL_NUMBERS = {"2XL430-W250-T": 1090, "XM430-W210-T": 1030}
+DEFAULT_MODEL = "2XL430-W250-T"
+
+# 단위 환산 (Profile Velocity 1 = 0.229rpm, Profile Acceleration 1 = 214.577 rev/min², 전류 1 = 2.69mA)
+TICKS_PER_VEL_UNIT = 0.229 * 4096 / 60.0
+TICKS_PER_ACC_UNIT = 214.577 * 4096 / 3600.0
+MA_PER_CURRENT_UNIT = 2.69
+# 무부하 최고 속도 (약 57rpm)
+MAX_TICKS_PER_SEC = 250 * TICKS_PER_VEL_UNIT
+
+# Protocol 2.0 인스트럭션
+INST_STATUS = 0x55
+INST_CLEAR = 0x10
+
+BAUD_CODES = {0: 9600, 1: 57600, 2: 115200, 3: 1000000, 4: 2000000, 5: 3000000, 6: 4000000, 7: 4500000}
+
+
+class SimMotor:
+    """
+    ★ 모터 한 개의 컨트롤 테이블 + 간단한 동역학
+    - Indirect Data 접근은 Indirect Address 가 가리키는 실제 주소로 변환
+    - 위치 모드: Profile Velocity/Acceleration 을 지키는 사다리꼴 속도 프로파일로 목표를 향해 이동
+    - 속도 모드: Profile Acceleration 으로 Goal Velocity 까지 가감속
+    """
+
+    def __init__(self, info, baudrate=57600):
+        self.info = info
+        self.table = bytearray(TABLE_SIZE)
+        self.model = info.get('model', DEFAULT_MODEL)
+
+        self._put(ADDR_MODEL_NUMBER, 2, MODEL_NUMBERS.get(self.model, 1090))
+        self._put(ADDR_FIRMWARE_VERSION, 1, 46)
+        self._put(ADDR_ID, 1, info['id'])
+        self._put(ADDR_BAUD_RATE, 1, {v: k for k, v in BAUD_CODES.items()}.get(baudrate, 1))
+        self._put(ADDR_RETURN_DELAY_TIME, 1, 250)
+        self._put(ADDR_OPERATING_MODE, 1, 3)
+        self._put(ADDR_PRESENT_INPUT_VOLTAGE, 2, 120)
+        self._put(ADDR_PRESENT_TEMPERATURE, 1, 30)
+        # Indirect Address 초기값: 자기 자신의 Indirect Data 주소
+        for n in range(N_INDIRECT):
+            self._put(ADDR_INDIRECT_ADDRESS_1 + 2 * n, 2, ADDR_INDIRECT_DATA_1 + n)
+
+        self.position = float(info.get('neutral', 2048)) if info.get('type') != 'wheel' else 0.0
+        self.velocity = 0.0
+        self.temperature = 30.0
+        self._put(ADDR_GOAL_POSITION, 4, int(self.position), signed=True)
+        self._sync_present(0.0)
+
+    @property
+    def id(self):
+        return self.table[ADDR_ID]
+
+    @property
+    def baudrate(self):
+        return BAUD_CODES.get(self.table[ADDR_BAUD_RATE], 57600)
+
+    @property
+    def return_delay(self):
+        return self.table[ADDR_RETURN_DELAY_TIME] * 2e-6
+
+    def _put(self, addr, length, value, signed=False):
+        self.table[addr:addr + length] = int(value).to_bytes(length, 'little', signed=signed)
+
+    def _get(self, addr, length, signed=False):
+        return int.from_bytes(self.table[addr:addr + length], 'little', signed=signed)
+
+    def _resolve(self, addr):
+        if ADDR_INDIRECT_DATA_1 <= addr < ADDR_INDIRECT_DATA_1 + N_INDIRECT:
+            n = addr - ADDR_INDIRECT_DATA_1
+            return self._get(ADDR_INDIRECT_ADDRESS_1 + 2 * n, 2)
+        return addr
+
+    def read(self, addr, length):
+        return bytes(self.table[self._resolve(a)] for a in range(addr, addr + length))
+
+    def write(self, addr, data):
+        """쓰기. 토크가 켜진 상태에서 EEPROM 영역(0~63)에 쓰면 Access Error"""
+        targets = [self._resolve(a) for a in range(addr, addr + len(data))]
+        if self.table[ADDR_TORQUE_ENABLE] and any(t < ADDR_TORQUE_ENABLE for t in targets):
+            return 7  # ERRNUM_ACCESS
+        if any(t >= TABLE_SIZE for t in targets):
+            return 4  # ERRNUM_DATA_RANGE
+        torque_before = self.table[ADDR_TORQUE_ENABLE]
+        for t, b in zip(targets, data):
+            self.table[t] = b
+        if self.table[ADDR_TORQUE_ENABLE] and not torque_before:
+            # 토크를 켜면 Goal Position 이 현재 위치로 바뀜 (X-Series 동작)
+            self._put(ADDR_GOAL_POSITION, 4, int(round(self.position)), signed=True)
+        return 0
+
+    def reboot(self):
+        self.table[ADDR_TORQUE_ENABLE] = 0
+        self.table[ADDR_HARDWARE_ERROR_STATUS] = 0
+        self.velocity = 0.0
+
+    def step(self, dt):
+        if dt <= 0:
+            return
+        accel_limit = self._get(ADDR_PROFILE_ACCELERATION, 4) * TICKS_PER_ACC_UNIT or 1e9
+        v_before = self.velocity
+
+        if self.table[ADDR_TORQUE_ENABLE]:
+            if self.table[ADDR_OPERATING_MODE] == 1:
+                target_v = self._get(ADDR_GOAL_VELOCITY, 4, signed=True) * TICKS_PER_VEL_UNIT
+            else:
+                goal = self._get(ADDR_GOAL_POSITION, 4, signed=True)
+                v_limit = self._get(ADDR_PROFILE_VELOCITY, 4) * TICKS_PER_VEL_UNIT or MAX_TICKS_PER_SEC
+                v_limit = min(v_limit, MAX_TICKS_PER_SEC)
+                error = goal - self.position
+                # 정지 거리를 고려한 목표 속도 (사다리꼴 프로파일)
+                target_v = min(v_limit, (2.0 * accel_limit * abs(error)) ** 0.5)
+                target_v = target_v if error >= 0 else -target_v
+        else:
+            target_v = 0.0
+            accel_limit = 1e9
+
+        dv = max(-accel_limit * dt, min(accel_limit * dt, target_v - self.velocity))
+        self.velocity += dv
+        self.position += self.velocity * dt
+
+        if self.table[ADDR_TORQUE_ENABLE] and self.table[ADDR_OPERATING_MODE] != 1:
+            goal = self._get(ADDR_GOAL_POSITION, 4, signed=True)
+            if (goal - self.position) * (goal - (self.position - self.velocity * dt)) <= 0 and abs(self.velocity) < accel_limit * dt * 2:
+                self.position = float(goal)
+                self.velocity = 0.0
+
+        self._sync_present((self.velocity - v_before) / dt, dt)
+
+    def _sync_present(self, accel, dt=0.0):
+        # 전류 모델: 유지 전류 + 속도/가속도 비례 (mA)
+        holding = 40.0 if self.table[ADDR_TORQUE_ENABLE] else 5.0
+        current_ma = holding + 0.05 * abs(self.velocity) + 0.004 * abs(accel)
+        # 온도 모델: 전류 제곱에 비례해 오르고 주변 온도(30℃)로 식음
+        self.temperature += (1e-6 * current_ma ** 2 - 0.01 * (self.temperature - 30.0)) * dt
+
+        self._put(ADDR_PRESENT_CURRENT, 2, int(current_ma / MA_PER_CURRENT_UNIT), signed=True)
+        self._put(ADDR_PRESENT_VELOCITY, 4, int(self.velocity / TICKS_PER_VEL_UNIT), signed=True)
+        self._put(ADDR_PRESENT_POSITION, 4, int(round(self.position)), signed=True)
+        self._put(ADDR_PRESENT_TEMPERATURE, 1, int(self.temperature))
+
+
+class SimPortHandler(PortHandler):
+    """
+    ★ 시뮬레이션 Dynamixel 버스 (PortHandler 대체)
+    - 실제 PacketHandler(2.0) 가 만든 Protocol 2.0 패킷을 그대로 파싱하여 응답 패킷을 생성
+    - 보드레이트에 따른 선로 시간(1바이트 = 10비트) + Return Delay + USB 지연을 계산하고,
+      realtime=True 면 그만큼 실제로 대기함 → 실제 하드웨어와 비슷한 타이밍으로 벤치마크 가능
+    - 버스 사용률/패킷 수/바이트 수는 stats() 로 확인
+    """
+
+    def __init__(self, spec, port_name="sim://herobot", realtime=True, usb_latency=0.001):
+        super().__init__(port_name)
+        self.ph = PacketHandler(2.0)
+        self.realtime = realtime
+        self.usb_latency = usb_latency
+        self.baudrate = spec['robot_info'].get('default_baudrate', 57600)
+
+        self.motors = {m['id']: SimMotor(m, self.baudrate) for m in spec['motors']}
+        self.rx = bytearray()
+        self.registered = {}   # REG_WRITE 대기 중인 쓰기
+        self._lock = threading.Lock()
+        self._last_step = time.monotonic()
+
+        self.reset_stats()
+
+    # ------------------------------------------------------------------
+    # PortHandler 인터페이스
+    # ------------------------------------------------------------------
+    def openPort(self):
+        self.is_open = True
+        return True
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        self.rx.clear()
+
+    def setBaudRate(self, baudrate):
+        if self.getCFlagBaud(baudrate) <= 0:
+            return False
+        self.baudrate = baudrate
+        self.tx_time_per_byte = (1000.0 / baudrate) * 10.0
+        return True
+
+    def setupPort(self, cflag_baud):
+        return True
+
+    def getBytesAvailable(self):
+        return len(self.rx)
+
+    def readPort(self, length):
+        with self._lock:
+            data = bytes(self.rx[:length])
+            del self.rx[:length]
+        return data
+
+    def writePort(self, packet):
+        packet = list(packet)
+        with self._lock:
+            self._advance()
+            responses, delay = self._handle(packet)
+
+            wire = (len(packet) + sum(len(r) for r in responses)) * 10.0 / self.baudrate
+            cost = wire + delay + (self.usb_latency if responses else 0.0)
+            self.stats_data['tx_packets'] += 1
+            self.stats_data['tx_bytes'] += len(packet)
+            self.stats_data['rx_packets'] += len(responses)
+            self.stats_data['rx_bytes'] += sum(len(r) for r in responses)
+            self.stats_data['bus_time'] += cost
+
+        if self.realtime and cost > 0:
+            time.sleep(cost)
+
+        with self._lock:
+            for r in responses:
+                self.rx.extend(r)
+        return len(packet)
+
+    # ------------------------------------------------------------------
+    # 시뮬레이션
+    # ------------------------------------------------------------------
+    def _advance(self):
+        now = time.monotonic()
+        dt = now - self._last_step
+        self._last_step = now
+        # 큰 간격은 잘게 나눠 적분
+        steps = max(1, int(dt / 0.005))
+        for motor in self.motors.values():
+            for _ in range(steps):
+                motor.step(dt / steps)
+
+    def _status(self, dxl_id, error=0, params=b"", fast=False):
+        length = len(params) + 4
+        packet = [0xFF, 0xFF, 0xFD, 0x00, dxl_id, DXL_LOBYTE(length), DXL_HIBYTE(length), INST_STATUS, error]
+        packet += list(params) + [0, 0]
+        if not fast:
+            packet = self.ph.addStuffing(packet)
+        total = DXL_MAKEWORD(packet[5], packet[6]) + 7
+        crc = self.ph.updateCRC(0, packet, total - 2)
+        packet[total - 2] = DXL_LOBYTE(crc)
+        packet[total - 1] = DXL_HIBYTE(crc)
+        return bytes(packet[:total])
+
+    def _handle(self, packet):
+        """인스트럭션 패킷 1개 → (응답 패킷 리스트, 응답 지연 합계)"""
+        if len(packet) < 10 or packet[:3] != [0xFF, 0xFF, 0xFD]:
+            return [], 0.0
+        total = DXL_MAKEWORD(packet[5], packet[6]) + 7
+        crc = DXL_MAKEWORD(packet[total - 2], packet[total - 1])
+        if self.ph.updateCRC(0, packet, total - 2) != crc:
+            self.stats_data['crc_errors'] += 1
+            return [], 0.0
+
+        packet = self.ph.removeStuffing(packet)
+        length = DXL_MAKEWORD(packet[5], packet[6])
+        dxl_id = packet[4]
+        inst = packet[7]
+        params = bytes(packet[8:8 + length - 3])
+        self.stats_data['instructions'][inst] = self.stats_data['instructions'].get(inst, 0) + 1
+
+        # 보드레이트가 다른 모터는 패킷을 알아듣지 못함
+        motors = {i: m for i, m in self.motors.items() if m.baudrate == self.baudrate}
+
+        if dxl_id == BROADCAST_ID:
+            targets = sorted(motors)
+        else:
+            targets = [dxl_id] if dxl_id in motors else []
+
+        if inst == INST_PING:
+            responses = []
+            for i in targets:
+                m = motors[i]
+                responses.append(self._status(i, 0, m.read(ADDR_MODEL_NUMBER, 2) + m.read(ADDR_FIRMWARE_VERSION, 1)))
+            return responses, sum(motors[i].return_delay for i in targets)
+
+        if inst == INST_READ and dxl_id != BROADCAST_ID:
+            addr, n = DXL_MAKEWORD(params[0], params[1]), DXL_MAKEWORD(params[2], params[3])
+            return self._reply(targets, lambda m: self._status(m.id, 0, m.read(addr, n)))
+
+        if inst in (INST_WRITE, INST_REG_WRITE):
+            addr, data = DXL_MAKEWORD(params[0], params[1]), params[2:]
+            errors = {}
+            for i in targets:
+                if inst == INST_WRITE:
+                    errors[i] = motors[i].write(addr, data)
+                else:
+                    self.registered[i] = (addr, data)
+                    errors[i] = 0
+            if dxl_id == BROADCAST_ID:
+                return [], 0.0
+            return self._reply(targets, lambda m: self._status(m.id, errors[m.id]))
+
+        if inst == INST_ACTION:
+            for i, (addr, data) in list(self.registered.items()):
+                if dxl_id == BROADCAST_ID or i == dxl_id:
+                    motors[i].write(addr, data)
+                    del self.registered[i]
+            return [], 0.0
+
+        if inst == INST_REBOOT:
+            for i in targets:
+                motors[i].reboot()
+            if dxl_id == BROADCAST_ID:
+                return [], 0.0
+            return self._reply(targets, lambda m: self._status(m.id))
+
+        if inst in (INST_FACTORY_RESET, INST_CLEAR):
+            if dxl_id == BROADCAST_ID:
+                return [], 0.0
+            return self._reply(targets, lambda m: self._status(m.id))
+
+        if inst == INST_SYNC_WRITE:
+            addr, n = DXL_MAKEWORD(params[0], params[1]), DXL_MAKEWORD(params[2], params[3])
+            for k in range(4, len(params), n + 1):
+                if params[k] in motors:
+                    motors[params[k]].write(addr, params[k + 1:k + 1 + n])
+            return [], 0.0
+
+        if inst == INST_BULK_WRITE:
+            k = 0
+            while k + 5 <= len(params):
+                i, addr, n = params[k], DXL_MAKEWORD(params[k + 1], params[k + 2]), DXL_MAKEWORD(params[k + 3], params[k + 4])
+                if i in motors:
+                    motors[i].write(addr, params[k + 5:k + 5 + n])
+                k += 5 + n
+            return [], 0.0
+
+        if inst in (INST_SYNC_READ, INST_FAST_SYNC_READ):
+            addr, n = DXL_MAKEWORD(params[0], params[1]), DXL_MAKEWORD(params[2], params[3])
+            requests = [(i, addr, n) for i in params[4:] if i in motors]
+            if inst == INST_SYNC_READ:
+                return self._reply([i for i, _, _ in requests],
+                                   lambda m: self._status(m.id, 0, m.read(addr, n)))
+            return self._fast_reply(requests)
+
+        if inst in (INST_BULK_READ, INST_FAST_BULK_READ):
+            requests = []
+            for k in range(0, len(params) - 4, 5):
+                i, addr, n = params[k], DXL_MAKEWORD(params[k + 1], params[k + 2]), DXL_MAKEWORD(params[k + 3], params[k + 4])
+                if i in motors:
+                    requests.append((i, addr, n))
+            if inst == INST_BULK_READ:
+                reads = {i: (addr, n) for i, addr, n in requests}
+                return self._reply([i for i, _, _ in requests],
+                                   lambda m: self._status(m.id, 0, m.read(*reads[m.id])))
+            return self._fast_reply(requests)
+
+        # 지원하지 않는 인스트럭션
+        if dxl_id == BROADCAST_ID:
+            return [], 0.0
+        return self._reply(targets, lambda m: self._status(m.id, 2))
+
+    def _reply(self, ids, make):
+        responses = [make(self.motors[i]) for i in ids]
+        return responses, sum(self.motors[i].return_delay for i in ids)
+
+    def _fast_reply(self, requests):
+        """Fast Sync/Bulk Read: 모든 모터의 데이터가 하나의 상태 패킷에 [ERR ID DATA CRC] 로 이어짐"""
+        if not requests:
+            return [], 0.0
+        body = []
+        for i, addr, n in requests:
+            body += [0, i] + list(self.motors[i].read(addr, n)) + [0, 0]
+        length = len(body) + 1
+        packet = [0xFF, 0xFF, 0xFD, 0x00, BROADCAST_ID, DXL_LOBYTE(length), DXL_HIBYTE(length), INST_STATUS] + body
+        # 블록별 CRC 는 그 지점까지의 CRC, 마지막 블록 CRC 가 패킷 CRC
+        index = 8
+        for i, addr, n in requests:
+            index += n + 4
+            crc = self.ph.updateCRC(0, packet, index - 2)
+            packet[index - 2] = DXL_LOBYTE(crc)
+            packet[index - 1] = DXL_HIBYTE(crc)
+        first_delay = self.motors[requests[0][0]].return_delay
+        return [bytes(packet)], first_delay
+
+    # ------------------------------------------------------------------
+    # 통계
+    # ------------------------------------------------------------------
+    def reset_stats(self):
+        self.stats_data = {
+            "tx_packets": 0, "rx_packets": 0, "tx_bytes": 0, "rx_bytes": 0,
+            "bus_time": 0.0, "crc_errors": 0, "instructions": {},
+        }
+        self._stats_start = time.monotonic()
+
+    def stats(self):
+        elapsed = time.monotonic() - self._stats_start
+        s = dict(self.stats_data)
+        s["instructions"] = {f"0x{k:02X}": v for k, v in s["instructions"].items()}
+        s["bus_time"] = round(s["bus_time"], 4)
+        s["elapsed"] = round(elapsed, 4)
+        s["utilization"] = round(self.stats_data["bus_time"] / elapsed, 3) if elapsed > 0 else 0.0
+        return s
+
+
+def create_port_handler(port_name, spec):
+    """포트 이름이 'sim' 으로 시작하면 시뮬레이션 버스, 아니면 실제 시리얼 포트"""
+    if str(port_name).startswith("sim"):
+        return SimPortHandler(spec, port_name)
+    return PortHandler(port_name)
+
+
+def benchmark(spec_path="config/hardware_spec.json"):
+    """시뮬레이션 버스로 DxlDriver 의 초기화/자세/피드백 트래픽 측정 (버스가 여러 개면 버스별)"""
+    from hardware.dxl_driver import DxlDriver
+
+    driver = DxlDriver(spec_path, port="sim")
+
+    def stats():
+        return {bus.name: bus.portHandler.stats() for bus in driver.buses}
+
+    def reset():
+        for bus in driver.buses:
+            bus.portHandler.reset_stats()
+
+    print(f"📊 [Sim] 초기화: {stats()}")
+
+    reset()
+    driver.go_to_neutral()
+    print(f"📊 [Sim] go_to_neutral: {stats()} / 쉐도우 캐시 {driver.write_stats}")
+
+    joints = {name: info['neutral'] + 100 for name, info in driver.motors.items() if info.get('type') != 'wheel'}
+    reset()
+    t0 = time.perf_counter()
+    driver.move_joints(joints)
+    print(f"📊 [Sim] 자세 1개 ({len(joints)}관절, {(time.perf_counter() - t0) * 1000:.1f}ms): {stats()}")
+
+    reset()
+    feedback = driver.start_feedback(rate_hz=50)
+    time.sleep(2.0)
+    feedback.stop()
+    print(f"📊 [Sim] 피드백 2초: {stats()} / {feedback.stats()}")
+    print(f"   r_shoulder_pitch 현재 위치: {feedback.get('r_shoulder_pitch')}")
+
+    driver.close()
+
+
+if __name__ == '__main__':
+    benchmark(*sys.argv[1:])
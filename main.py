@@ -1,123 +1,177 @@
-import time
-import sys
 import os
+import time
+import asyncio
+import threading
+import concurrent.futures
 from dotenv import load_dotenv
-from contextlib import contextmanager
 
 # 모듈 임포트
 from hardware.dxl_driver import DxlDriver
 from core.llm_engine import LLMEngine
-from core.voice_interface import VoiceInterface
-from core.vision_brain import VisionBrain 
+from core.voice_interface import VoiceInterface, suppress_alsa_warnings
+from core.vision_brain import VisionBrain
+from core.face_tracker import FaceTracker
+from core.orchestrator import HerobotRuntime
+from motion.motion_planner import MotionPlanner, TrajectoryStreamer
+from motion.safety_validator import SafetyValidator
+from motion.base_controller import BaseController
+from utils.logger import telemetry
+from utils.recorder import SessionRecorder
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# HEROBOT_PORT=sim 이면 실제 모터 없이 시뮬레이션 버스로 실행
+HEROBOT_PORT = os.getenv("HEROBOT_PORT")
+# HEROBOT_FACE_TRACKING=0 이면 얼굴 추적(머리 자동 시선) 끔
+HEROBOT_FACE_TRACKING = os.getenv("HEROBOT_FACE_TRACKING", "1") == "1"
+# HEROBOT_TRACE=경로 이면 종료 시 Chrome trace(JSON) 저장 (chrome://tracing / Perfetto)
+HEROBOT_TRACE = os.getenv("HEROBOT_TRACE")
+# HEROBOT_RECORD=경로 이면 세션(발화/계획/버스 명령/피드백)을 기록 → python -m utils.recorder 로 재생
+HEROBOT_RECORD = os.getenv("HEROBOT_RECORD")
+
+def start_driver():
+    driver = DxlDriver(port=HEROBOT_PORT)
+    print("\n⚠️  [주의] 로봇이 초기 자세로 움직입니다.")
+    driver.go_to_neutral()
+    # 실시간 상태 피드백 (위치/속도/전류/온도) 백그라운드 폴링 (버스가 감당할 수 있는 주기로 자동 제한)
+    driver.start_feedback(rate_hz=50)
+    return driver
+
 
-@contextmanager
-def suppress_alsa_warnings():
-    fd = sys.stderr.fileno()
-    old_stderr = os.dup(fd)
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    os.dup2(devnull, fd)
+def start_face_tracker(vision, driver):
+    """카메라 프레임마다 얼굴을 찾아 머리를 돌림 (mediapipe 가 없으면 건너뜀)"""
+    if not (HEROBOT_FACE_TRACKING and vision):
+        return None
+    tracker = FaceTracker(vision, driver, rate_hz=25)
     try:
-        yield
-    finally:
-        os.dup2(old_stderr, fd)
-        os.close(old_stderr)
-        os.close(devnull)
+        tracker.start()
+    except ImportError as e:
+        print(f"⚠️ [FaceTrack] 얼굴 추적 비활성화 ({e})")
+        return None
+    return tracker
+
+
+def start_voice():
+    with suppress_alsa_warnings():
+        return VoiceInterface()
+
+
+def start_subsystems(stages):
+    """
+    ★ 서브시스템을 동시에 초기화하고 단계별 소요 시간을 출력
+    - stages: [(이름, 생성 함수)]
+    - 하나라도 실패하면 성공한 것들을 닫고 예외를 다시 던짐
+    """
+    t0 = time.monotonic()
+    timings = {}
+
+    def timed(name, fn):
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            timings[name] = (started - t0, time.monotonic() - t0)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="init") as pool:
+        futures = {name: pool.submit(timed, name, fn) for name, fn in stages}
+        concurrent.futures.wait(futures.values())
+
+    results, errors = {}, {}
+    for name, future in futures.items():
+        if future.exception() is None:
+            results[name] = future.result()
+        else:
+            errors[name] = future.exception()
+
+    total = time.monotonic() - t0
+    print("\n⏱️  [Startup] 단계별 초기화 시간")
+    for name, _ in stages:
+        begin, finish = timings.get(name, (0.0, 0.0))
+        state = "❌" if name in errors else "✅"
+        print(f"   {state} {name:<8} {begin:5.2f}s → {finish:5.2f}s ({finish - begin:.2f}s)")
+    serial = sum(finish - begin for begin, finish in timings.values())
+    print(f"   합계 {total:.2f}s (순차 실행 시 {serial:.2f}s)")
+
+    if errors:
+        for obj in results.values():
+            if hasattr(obj, 'close'):
+                obj.close()
+        name, error = next(iter(errors.items()))
+        raise RuntimeError(f"{name}: {error}")
+    return results
+
 
 def main():
     print("=============================================")
     print("🤖 Herobot HRI Mode (RGB Vision Only)")
     print("=============================================")
-    
+
+    # 지연 로그 출력 + 주기적 통계 요약 (60초)
+    telemetry.start_reporter(interval=60.0)
+
     try:
-        print("1. 하드웨어 연결 중...", end=" ")
-        driver = DxlDriver()
-        print("✅ 성공")
-        
-        print("2. 두뇌(LLM) 연결 중...", end=" ")
-        brain = LLMEngine()
-        print("✅ 성공")
-
-        print("3. 청각(Voice) 연결 중...", end=" ")
-        with suppress_alsa_warnings():
-            voice = VoiceInterface()
-        print("✅ 성공")
-        
-        print("4. 시각(Vision) 연결 중...", end=" ")
-        vision = VisionBrain(api_key=GEMINI_API_KEY)
-        print("✅ 성공")
-        
-        print("\n⚠️  [주의] 로봇이 초기 자세로 움직입니다.")
-        driver.go_to_neutral()
-        
+        # 하드웨어 / 두뇌 / 청각 / 시각을 동시에 초기화
+        subsystems = start_subsystems([
+            ("driver", start_driver),
+            ("brain", LLMEngine),
+            ("voice", start_voice),
+            ("vision", lambda: VisionBrain(api_key=GEMINI_API_KEY)),
+        ])
+        driver = subsystems["driver"]
+        brain = subsystems["brain"]
+        voice = subsystems["voice"]
+        vision = subsystems["vision"]
+
+        # 궤적 계획기 + 고정 주기 스트리머
+        planner = MotionPlanner(driver.spec)
+        streamer = TrajectoryStreamer(driver, rate_hz=30)
+        # 하체: cmd_vel + 가감속 램프 + 워치독 (명령이 끊기면 자동 정지)
+        base = BaseController(driver)
+        base.start()
+        streamer.base = base
+        # 실행 전 안전 검사 (config/safety_limits.json)
+        validator = SafetyValidator(driver.spec)
+        # 얼굴 추적 (제스처가 머리를 움직이는 동안에는 자동으로 양보)
+        tracker = start_face_tracker(vision, driver)
+        recorder = None
+        if HEROBOT_RECORD:
+            recorder = SessionRecorder(HEROBOT_RECORD, meta={"port": driver.port_name})
+            driver.recorder = recorder
+
     except Exception as e:
         print(f"\n🔥 초기화 실패: {e}")
         return
 
+    # LLM SDK 로드는 첫 명령 전에 백그라운드에서
+    threading.Thread(target=brain.warm_up, name="llm-warmup", daemon=True).start()
+
     print("\n✅ 준비 완료. 언제든지 '히어로봇'이라고 불러주세요.")
     print("---------------------------------------------")
-    
-    while True:
-        try:
-            with suppress_alsa_warnings():
-                is_awake = voice.wait_for_wake_word("히어로봇")
-                
-            if is_awake:
-                with suppress_alsa_warnings():
-                    user_input = voice.listen_command()
-                
-                if not user_input:
-                    print("⚡ [Idle] 명령을 듣지 못했습니다. 다시 불러주세요.")
-                    continue
-                    
-                if any(w in user_input for w in ['종료', '꺼줘', '잘자']):
-                    print("👋 시스템을 종료합니다.")
-                    break
-                
-                # (일반 대화 및 행동 제어만 남김)
-                action_plan = brain.generate_response(user_input)
-                
-                if action_plan:
-                    motions = action_plan.get('motions', [])
-                    
-                    if motions:
-                        print(f"⚡ [Action] {len(motions)}개의 시퀀스 실행")
-                        
-                        for i, motion in enumerate(motions):
-                            if 'delay' in motion:
-                                time.sleep(float(motion['delay']))
-                                continue
-
-                            joint = motion.get('joint')
-                            val = motion.get('pos') if motion.get('pos') is not None else motion.get('val')
-                            speed = motion.get('speed')
-
-                            if joint and val is not None:
-                                driver.move_joint(joint, int(val), velocity=speed)
-                                if "wheel" in joint:
-                                    time.sleep(0.005)
-                                else:
-                                    time.sleep(0.05)
-                        
-                        print("   └─ (완료)")
-                        
-                        if "text" in action_plan:
-                            print(f"   🗣️  [Say]: {action_plan['text']}")
-                
-                print("💤 대기 모드로 전환합니다...")
-
-        except KeyboardInterrupt:
-            print("\n🚨 [비상 정지]")
-            driver.move_joint("wheel_left", 0)
-            driver.move_joint("wheel_right", 0)
-            break
-        except Exception as e:
-            print(f"❌ 오류: {e}")
 
+    # ★ 듣기/생각/움직이기를 동시에 돌리는 이벤트 루프 ("멈춰" 로 동작 중단 가능)
+    runtime = HerobotRuntime(driver, brain, voice, vision, planner, streamer, validator, tracker, recorder)
+    try:
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        print("\n🚨 [비상 정지]")
+        base.halt()
+    except Exception as e:
+        print(f"❌ 오류: {e}")
+
+    if tracker:
+        print(f"🙂 [FaceTrack] {tracker.stats()}")
+        tracker.stop()
     if vision: vision.close()
+    if voice: voice.close()
+    if brain: brain.close()
+    if base: base.stop()
     if driver: driver.close()
+    if recorder: recorder.close()
+
+    telemetry.stop_reporter()
+    print(telemetry.summary())
+    if HEROBOT_TRACE:
+        telemetry.export_chrome_trace(HEROBOT_TRACE)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,228 @@
+import math
+import time
+import threading
+import numpy as np
+
+from utils.logger import telemetry
+
+# Goal/Present Velocity 1 = 0.229 rpm → rad/s
+RAD_PER_VEL_UNIT = 0.229 * 2.0 * math.pi / 60.0
+
+
+class BaseController:
+    """
+    ★ 차동 구동 하체 제어기 (cmd_vel)
+    - cmd_vel(v, ω): 전진 속도 [m/s], 회전 속도 [rad/s, +왼쪽] → 스펙의 바퀴 반지름/간격/부호로 바퀴 속도 변환
+    - 고정 주기 스레드가 가감속 제한(램프)을 적용한 뒤 두 바퀴를 move_joints 한 번(SyncWrite 1패킷)으로 동시에 씀
+      (한쪽 바퀴가 포화되면 두 바퀴를 같은 비율로 줄여 곡률 유지)
+    - 워치독: timeout 안에 새 명령이 없으면 목표를 0 으로 (명령 스레드가 멈춰도 로봇은 멈춤)
+      + 모터 자체의 Bus Watchdog 을 걸어 프로세스 전체가 멈춰도 바퀴가 스스로 정지
+    - 오도메트리: 피드백의 Present Velocity 를 적분 (피드백이 없으면 명령값으로 추정)
+    - 직진 유지: ω=0 으로 전진/후진하는 동안 오도메트리 방향각을 출발 방향으로 되돌리는 보정
+    """
+
+    def __init__(self, driver, rate_hz=50, max_accel=0.4, max_alpha=2.0, timeout=0.3,
+                 heading_gain=1.5, bus_watchdog_ms=500, refresh_s=0.1):
+        self.driver = driver
+        self.period = 1.0 / rate_hz
+        self.max_accel = max_accel              # m/s²
+        self.max_alpha = max_alpha              # rad/s²
+        self.timeout = timeout
+        self.heading_gain = heading_gain
+        self.bus_watchdog = max(1, int(bus_watchdog_ms / 20))
+        # 움직이는 동안 값이 같아도 이 간격으로 다시 보내 모터 워치독을 갱신
+        self.refresh_s = refresh_s
+
+        base = driver.spec.get('base', {})
+        self.radius = float(base.get('wheel_radius', 0.035))
+        self.separation = float(base.get('wheel_separation', 0.2))
+        signs = base.get('forward_sign', {'wheel_left': 1, 'wheel_right': -1})
+        self.wheels = ['wheel_left', 'wheel_right']
+        self.sign = np.array([signs['wheel_left'], signs['wheel_right']], dtype=np.float64)
+        self.ids = [driver.motors[name]['id'] for name in self.wheels]
+        self.max_units = float(min(min(abs(driver.motors[name]['min']), driver.motors[name]['max'])
+                                   for name in self.wheels))
+
+        self._lock = threading.Lock()           # 목표/상태 (버스 I/O 는 이 잠금 밖에서)
+        self._io_lock = threading.Lock()        # 제어 루프 쓰기 순서 (halt 는 이 잠금 없이 정지 차로로)
+        self._halts = 0                         # halt 횟수: 계산 도중 halt 되면 그 tick 의 쓰기는 버림
+        self.target = np.zeros(2)               # (v, ω) 목표
+        self.current = np.zeros(2)              # 램프 적용 후 (v, ω)
+        self.last_cmd = 0.0
+        self.heading_ref = None
+        self._moving = False
+        self._last_write = 0.0
+
+        self.pose = np.zeros(3)                 # (x, y, θ) 오도메트리
+        self.odom_velocity = np.zeros(2)
+        self._feedback_seq = -1
+
+        self.stats_data = {"ticks": 0, "writes": 0, "watchdog_stops": 0, "overruns": 0}
+        self._running = False
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # 명령
+    # ------------------------------------------------------------------
+    def cmd_vel(self, v, omega):
+        """전진 속도 v [m/s], 회전 속도 ω [rad/s]. timeout 안에 다시 불러야 계속 움직임"""
+        with self._lock:
+            if omega == 0 and v != 0 and (self.target[1] != 0 or self.target[0] == 0):
+                # 직진 시작: 지금 방향을 유지
+                self.heading_ref = self.pose[2]
+            elif omega != 0 or v == 0:
+                self.heading_ref = None
+            self.target[:] = (v, omega)
+            self.last_cmd = time.monotonic()
+
+    def cmd_wheels(self, left, right):
+        """바퀴 속도 단위(0.229rpm, 스펙 부호 그대로)의 명령 → cmd_vel (LLM 의 wheel 명령 호환)"""
+        v, omega = self.wheels_to_twist(np.array([left, right], dtype=np.float64))
+        self.cmd_vel(v, omega)
+
+    def keepalive(self):
+        """같은 명령을 유지 (워치독 갱신)"""
+        with self._lock:
+            self.last_cmd = time.monotonic()
+
+    def halt(self):
+        """
+        ★ 즉시 정지: 램프 없이 두 바퀴에 0 을 바로 씀 (호출한 스레드에서 패킷 전송)
+        - 버스의 정지 차로로 보내므로 피드백 폴링, 궤적 프레임, 제어 루프의 쓰기 뒤에 줄 서지 않음
+          (진행 중인 트랜잭션 하나만 기다림, DxlBus.command)
+        - 제어 루프가 halt 전에 계산한 쓰기는 전송 직전에 버려짐 (move_joints cancel)
+        """
+        with self._lock:
+            self.target[:] = 0.0
+            self.current[:] = 0.0
+            self.heading_ref = None
+            self._halts += 1
+        self._write(np.zeros(2), force=True, urgent=True)
+
+    # ------------------------------------------------------------------
+    # 변환
+    # ------------------------------------------------------------------
+    def twist_to_wheels(self, v, omega):
+        """(v, ω) → 바퀴 속도 단위 [왼, 오] (포화 시 비율 유지)"""
+        half = omega * self.separation / 2.0
+        rad_s = np.array([v - half, v + half]) / self.radius
+        units = rad_s / RAD_PER_VEL_UNIT * self.sign
+        peak = np.max(np.abs(units))
+        if peak > self.max_units:
+            units *= self.max_units / peak
+        return units
+
+    def wheels_to_twist(self, units):
+        """바퀴 속도 단위 [왼, 오] → (v, ω)"""
+        linear = units * self.sign * RAD_PER_VEL_UNIT * self.radius
+        return (linear[0] + linear[1]) / 2.0, (linear[1] - linear[0]) / self.separation
+
+    # ------------------------------------------------------------------
+    # 제어 루프
+    # ------------------------------------------------------------------
+    def arm_watchdog(self):
+        """모터 버스 워치독 설정 (0 을 먼저 써서 정지 중에 걸린 트립을 해제)"""
+        self.driver.sync_write_register(self.driver.ADDR_BUS_WATCHDOG, 1, {i: 0 for i in self.ids})
+        self.driver.sync_write_register(self.driver.ADDR_BUS_WATCHDOG, 1, {i: self.bus_watchdog for i in self.ids})
+
+    def start(self):
+        self.arm_watchdog()
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="base", daemon=True)
+        self._thread.start()
+        print(f"🛞 [Base] 하체 제어 시작 ({1.0 / self.period:.0f}Hz, 워치독 {self.timeout * 1000:.0f}ms)")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.halt()
+        self.driver.sync_write_register(self.driver.ADDR_BUS_WATCHDOG, 1, {i: 0 for i in self.ids})
+
+    def _loop(self):
+        next_tick = time.monotonic()
+        last = next_tick
+        while self._running:
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.stats_data["overruns"] += 1
+                next_tick = time.monotonic()
+
+            now = time.monotonic()
+            self.step(now - last, now)
+            last = now
+
+    def step(self, dt, now=None):
+        """한 주기: 워치독 → 오도메트리 → 직진 보정 → 램프 → 전송"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.stats_data["ticks"] += 1
+            if self.target.any() and now - self.last_cmd > self.timeout:
+                self.target[:] = 0.0
+                self.heading_ref = None
+                self.stats_data["watchdog_stops"] += 1
+                telemetry.count("base.watchdog_stops")
+                telemetry.log("🛑 [Base] 명령이 {:.0f}ms 동안 없어 정지합니다.", (now - self.last_cmd) * 1000)
+            target = self.target.copy()
+
+            self._update_odometry(dt)
+            if self.heading_ref is not None:
+                error = self.heading_ref - self.pose[2]
+                target[1] = self.heading_gain * math.atan2(math.sin(error), math.cos(error))
+
+            starting = target.any() and not self._moving
+            self._moving = bool(target.any() or self.current.any())
+            step = np.array([self.max_accel, self.max_alpha]) * dt
+            self.current += np.clip(target - self.current, -step, step)
+            units = self.twist_to_wheels(*self.current)
+            refresh = self._moving and now - self._last_write > self.refresh_s
+            halts = self._halts
+
+        with self._io_lock:
+            if halts != self._halts:
+                return
+            # 정지 상태에서는 패킷이 없어 모터 워치독이 걸려 있을 수 있으므로 출발 전에 다시 설정
+            if starting:
+                self.arm_watchdog()
+            self._write(units, force=refresh, cancel=lambda: halts != self._halts)
+
+    def _write(self, units, force=False, urgent=False, cancel=None):
+        values = np.rint(units).astype(int).tolist()
+        self.driver.move_joints({name: value for name, value in zip(self.wheels, values)},
+                                force=force, urgent=urgent, cancel=cancel)
+        if force:
+            self._last_write = time.monotonic()
+        self.stats_data["writes"] += 1
+
+    def _update_odometry(self, dt):
+        feedback = self.driver.feedback
+        if feedback is not None and feedback.seq >= 0:
+            seq = feedback.seq
+            if seq == self._feedback_seq:
+                # 새 샘플이 없으면 마지막 측정 속도로 계속 적분
+                velocity = self.odom_velocity
+            else:
+                slot = seq % feedback.depth
+                units = feedback.buffer[slot, self.ids, feedback.VELOCITY].astype(np.float64)
+                velocity = np.array(self.wheels_to_twist(units))
+                self._feedback_seq = seq
+        else:
+            # 피드백이 없으면 명령값으로 추정
+            velocity = np.array(self.wheels_to_twist(self.twist_to_wheels(*self.current)))
+        self.odom_velocity = velocity
+
+        v, omega = velocity
+        theta = self.pose[2] + omega * dt / 2.0     # 중간 방향각으로 적분
+        self.pose += (v * math.cos(theta) * dt, v * math.sin(theta) * dt, omega * dt)
+
+    def reset_odometry(self):
+        with self._lock:
+            self.pose[:] = 0.0
+            self.heading_ref = None
+
+    def stats(self):
+        return dict(self.stats_data, pose=[round(float(p), 3) for p in self.pose])
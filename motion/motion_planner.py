@@ -0,0 +1,331 @@
+import time
+import numpy as np
+
+from utils.logger import telemetry
+
+# ==============================================================================
+# ⚙️ X-Series 단위 환산
+# ==============================================================================
+# Profile Velocity 1 = 0.229 rpm → tick/s
+TICKS_PER_VEL_UNIT = 0.229 * 4096 / 60.0
+# Profile Acceleration 1 = 214.577 rev/min² → tick/s²
+TICKS_PER_ACC_UNIT = 214.577 * 4096 / 3600.0
+
+# 최소 저크(minimum-jerk) 곡선의 최대 속도/가속도 계수
+#   v_max = 1.875 * D / T,  a_max = 5.7735 * D / T²
+MJ_PEAK_VEL = 1.875
+MJ_PEAK_ACC = 5.7735
+
+
+def build_keyframes(motions):
+    """
+    LLM 의 motions 리스트를 키프레임 단위로 묶음
+    - ('pose', {관절: (pos, speed)}) : 한 번의 SyncWrite 로 보낼 자세
+    - ('delay', 초)                 : 대기
+    같은 관절이 다시 등장하거나 delay 를 만나면 새 키프레임을 시작함.
+    """
+    keyframe = {}
+    for motion in motions:
+        if 'delay' in motion:
+            if keyframe:
+                yield 'pose', keyframe
+                keyframe = {}
+            yield 'delay', float(motion['delay'])
+            continue
+
+        joint = motion.get('joint')
+        val = motion.get('pos') if motion.get('pos') is not None else motion.get('val')
+        speed = motion.get('speed')
+
+        if joint and val is not None:
+            if joint in keyframe:
+                yield 'pose', keyframe
+                keyframe = {}
+            keyframe[joint] = (int(val), speed)
+
+    if keyframe:
+        yield 'pose', keyframe
+
+
+def split_open_keyframe(motions):
+    """
+    스트리밍 중인 motions 를 (확정된 앞부분, 아직 이어질 수 있는 마지막 키프레임) 으로 분리
+    - 마지막 키프레임은 다음 motion 이 같은 관절이거나 delay 일 때 비로소 닫힘
+    """
+    start = 0
+    joints = set()
+    for i, motion in enumerate(motions):
+        if 'delay' in motion:
+            start = i + 1
+            joints = set()
+            continue
+        joint = motion.get('joint')
+        if joint in joints:
+            start = i
+            joints = set()
+        joints.add(joint)
+    return motions[:start], motions[start:]
+
+
+class Trajectory:
+    """
+    ★ 전 관절 동기화 궤적
+    - times:  [K]    키프레임 도달 시각 (초, 0 에서 시작)
+    - knots:  [K, J] 각 키프레임의 관절 위치 (tick)
+    - wheel_events: [(시각, {바퀴: 속도})] 바퀴는 보간 없이 해당 시각에 즉시 적용
+    구간 사이는 최소 저크(5차) 다항식으로 보간하므로 속도/가속도가 0 에서 시작해 0 으로 끝남.
+    """
+
+    def __init__(self, joints, times, knots, wheel_events=None):
+        self.joints = list(joints)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.knots = np.asarray(knots, dtype=np.float64)
+        self.wheel_events = wheel_events or []
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def sample(self, t):
+        """시각 t (스칼라 또는 배열) 의 전 관절 위치 → [len(t), J]"""
+        t = np.clip(np.atleast_1d(np.asarray(t, dtype=np.float64)), 0.0, self.duration)
+        if len(self.times) < 2:
+            return np.repeat(self.knots[:1], len(t), axis=0)
+
+        seg = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, len(self.times) - 2)
+        t0 = self.times[seg]
+        span = self.times[seg + 1] - t0
+        s = np.divide(t - t0, span, out=np.ones_like(t), where=span > 0)
+        blend = s * s * s * (10.0 - 15.0 * s + 6.0 * s * s)
+
+        p0 = self.knots[seg]
+        p1 = self.knots[seg + 1]
+        return p0 + (p1 - p0) * blend[:, None]
+
+    def sample_grid(self, rate_hz):
+        """고정 주기 rate_hz 로 전체 궤적을 한 번에 평가 → (tick 시각 [N], 위치 [N, J])"""
+        n = int(np.ceil(self.duration * rate_hz)) + 1
+        ticks = np.arange(n) / rate_hz
+        return ticks, self.sample(ticks)
+
+
+class MotionPlanner:
+    """
+    ★ LLM motions → 시간 매개변수화된 궤적
+    - 키프레임마다 각 관절의 이동 거리와 속도/가속도 한계로 필요한 시간을 구하고,
+      가장 느린 관절에 맞춰 전 관절이 같은 시각에 출발/도착하도록 동기화함.
+    """
+
+    def __init__(self, spec, default_speed=200, default_accel=50):
+        joints = [m for m in spec['motors'] if m.get('type') != 'wheel']
+        self.joints = [m['name'] for m in joints]
+        self.wheels = [m['name'] for m in spec['motors'] if m.get('type') == 'wheel']
+        self.index = {name: i for i, name in enumerate(self.joints)}
+
+        self.lower = np.array([m['min'] for m in joints], dtype=np.float64)
+        self.upper = np.array([m['max'] for m in joints], dtype=np.float64)
+        self.neutral = np.array([m['neutral'] for m in joints], dtype=np.float64)
+
+        self.default_speed = default_speed
+        self.default_accel = default_accel
+
+        # 피드백이 없을 때의 출발 자세 (마지막으로 계획한 끝 자세)
+        self.last_positions = self.neutral.copy()
+
+    def current_positions(self, feedback=None):
+        """피드백이 있으면 실측 위치, 없으면 마지막 계획의 끝 자세"""
+        if feedback is not None:
+            _, state = feedback.latest()
+            if state is not None:
+                ids = [feedback.index[name] for name in self.joints]
+                return state[ids, feedback.POSITION].astype(np.float64)
+        return self.last_positions.copy()
+
+    def plan(self, motions, start=None):
+        """motions 리스트 → Trajectory"""
+        current = self.last_positions.copy() if start is None else np.asarray(start, dtype=np.float64)
+        times = [0.0]
+        knots = [current.copy()]
+        wheel_events = []
+        t = 0.0
+
+        for kind, payload in build_keyframes(motions):
+            if kind == 'delay':
+                t += max(payload, 0.0)
+                times.append(t)
+                knots.append(current.copy())
+                continue
+
+            target = current.copy()
+            vmax = np.full(len(self.joints), self.default_speed * TICKS_PER_VEL_UNIT)
+            wheels = {}
+            for joint, (pos, speed) in payload.items():
+                if joint in self.wheels:
+                    wheels[joint] = pos
+                    continue
+                if joint not in self.index:
+                    telemetry.log("⚠️ [Planner] 존재하지 않는 관절: {}", joint)
+                    continue
+                i = self.index[joint]
+                target[i] = pos
+                if speed:
+                    vmax[i] = float(speed) * TICKS_PER_VEL_UNIT
+
+            if wheels:
+                wheel_events.append((t, wheels))
+
+            target = np.clip(target, self.lower, self.upper)
+            duration = self.segment_duration(current, target, vmax)
+            if duration > 0:
+                t += duration
+                times.append(t)
+                knots.append(target)
+                current = target
+
+        self.last_positions = current.copy()
+        return Trajectory(self.joints, times, knots, wheel_events)
+
+    def segment_duration(self, p0, p1, vmax, amax=None):
+        """속도/가속도 한계를 만족하는 최소 저크 구간의 최소 시간 (전 관절 중 최댓값)"""
+        if amax is None:
+            amax = self.default_accel * TICKS_PER_ACC_UNIT
+        distance = np.abs(p1 - p0)
+        t_vel = MJ_PEAK_VEL * distance / vmax
+        t_acc = np.sqrt(MJ_PEAK_ACC * distance / amax)
+        return float(np.max(np.maximum(t_vel, t_acc))) if len(distance) else 0.0
+
+
+class TrajectoryStreamer:
+    """
+    ★ 고정 주기 스트리밍 루프
+    - 궤적 전체를 먼저 벡터화 평가한 뒤, tick 마다 바뀐 관절만 SyncWrite 한 프레임으로 전송
+    - 각 tick 은 시작 시각 + k·dt 의 절대 시각에 맞춰 보내므로 sleep 오차가 누적되지 않음
+    - 버스는 한 주기까지만 기다림 (DxlDriver.move_joints timeout). 못 보낸 관절/바퀴 명령은 다음 tick 프레임에 합쳐 보냄
+    - 한 주기 이상 늦으면 밀린 tick 을 건너뛰고 지금 시각의 설정점을 보냄 → 궤적 시간이 늘어나지 않음
+      (늦은 tick / 건너뛴 tick / 버스 대기 초과 / 통신 오류는 통계와 telemetry 로 보고)
+    - 스트리밍 중에는 Profile Velocity 0(무제한)으로 두어 서보가 설정점을 그대로 따라가게 하고,
+      마지막 프레임에서 원래 Profile Velocity 로 복구함
+    - 57600bps 에서 관절 17개 풀 프레임은 약 30ms 이므로 기본 주기는 30Hz
+    """
+
+    def __init__(self, driver, rate_hz=30):
+        self.driver = driver
+        self.rate_hz = rate_hz
+        self.last_stats = None
+        self.last_setpoint = None
+        # 하체 제어기 (motion/base_controller.py). 있으면 바퀴 명령은 cmd_vel 로 보내고 매 tick 워치독을 갱신
+        self.base = None
+
+    def run(self, trajectory, stop_event=None):
+        """궤적을 끝까지(또는 stop_event 가 set 될 때까지) 전송하고 지터/지연 통계를 반환"""
+        ticks, setpoints = trajectory.sample_grid(self.rate_hz)
+        setpoints = np.rint(setpoints).astype(np.int64)
+        # 궤적에서 실제로 움직이는 관절만 스트리밍 (멈춰 있는 관절은 다른 제어기가 써도 됨. 예: 얼굴 추적)
+        moving = np.nonzero(np.ptp(setpoints, axis=0) > 0)[0]
+        setpoints = setpoints[:, moving]
+        joints = [trajectory.joints[i] for i in moving]
+        saved_profile = {name: self.driver.profile_velocity.get(name) for name in joints}
+
+        wheel_events = sorted(trajectory.wheel_events, key=lambda e: e[0])
+        next_wheel = 0
+        wheel_cmd = {'wheel_left': 0, 'wheel_right': 0}
+        # (하체 제어기가 없을 때) 아직 전송에 성공하지 못한 바퀴 명령 → 성공할 때까지 매 프레임에 실음
+        pending_wheels = {}
+        sent = np.full(len(joints), np.iinfo(np.int64).min)
+
+        period = 1.0 / self.rate_hz
+        lateness = []
+        overruns = skipped = busy = comm_errors = 0
+        t_start = time.monotonic()
+        n_sent = 0
+
+        k = 0
+        while k < len(ticks):
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            deadline = t_start + ticks[k]
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            if now - deadline >= period:
+                # 한 주기 이상 늦음: 밀린 tick 은 건너뛰고 지금 시각의 설정점으로
+                overruns += 1
+                latest = min(int((now - t_start) * self.rate_hz), len(ticks) - 1)
+                skipped += latest - k
+                k = latest
+                deadline = t_start + ticks[k]
+            lateness.append(now - deadline)
+
+            frame = {}
+            changed = np.nonzero(setpoints[k] != sent)[0]
+            for i in changed:
+                frame[joints[i]] = (int(setpoints[k, i]), 0)
+
+            while next_wheel < len(wheel_events) and wheel_events[next_wheel][0] <= ticks[k]:
+                if self.base is not None:
+                    wheel_cmd.update(wheel_events[next_wheel][1])
+                    self.base.cmd_wheels(wheel_cmd['wheel_left'], wheel_cmd['wheel_right'])
+                else:
+                    pending_wheels.update(wheel_events[next_wheel][1])
+                next_wheel += 1
+            frame.update(pending_wheels)
+            if self.base is not None and any(wheel_cmd.values()):
+                self.base.keepalive()
+
+            if frame:
+                failures = []
+                if self.driver.move_joints(frame, timeout=period, failures=failures):
+                    sent[changed] = setpoints[k, changed]
+                    pending_wheels.clear()
+                elif "comm_error" in failures:
+                    comm_errors += 1
+                else:
+                    busy += 1
+            n_sent = k + 1
+            k += 1
+
+        # 마지막 설정점 + 원래 Profile Velocity 복구
+        final = setpoints[max(n_sent - 1, 0)]
+        self.last_setpoint = trajectory.sample(ticks[max(n_sent - 1, 0)])[0]
+        restore = {}
+        for i, name in enumerate(joints):
+            if saved_profile[name] is not None:
+                restore[name] = (int(final[i]), saved_profile[name])
+        if stop_event is not None and stop_event.is_set():
+            # 중단 시 바퀴는 즉시 정지
+            if self.base is not None:
+                self.base.halt()
+            else:
+                restore.update({name: 0 for name in self.driver.motors if self.driver.motors[name].get('type') == 'wheel'})
+        elif self.base is not None:
+            # 궤적이 끝난 뒤 바퀴는 워치독 시간 안에 멈춤 (계속 달리게 두지 않음)
+            for _, wheels in wheel_events[next_wheel:]:
+                wheel_cmd.update(wheels)
+            self.base.cmd_wheels(wheel_cmd['wheel_left'], wheel_cmd['wheel_right'])
+        else:
+            restore.update(pending_wheels)
+            for _, wheels in wheel_events[next_wheel:]:
+                restore.update(wheels)
+        if restore:
+            self.driver.move_joints(restore)
+
+        late_ms = np.array(lateness) * 1000.0
+        self.last_stats = {
+            "ticks": len(lateness),
+            "duration_s": round(time.monotonic() - t_start, 3),
+            "jitter_mean_ms": round(float(np.mean(late_ms)), 3) if len(late_ms) else 0.0,
+            "jitter_p99_ms": round(float(np.percentile(late_ms, 99)), 3) if len(late_ms) else 0.0,
+            "jitter_max_ms": round(float(np.max(late_ms)), 3) if len(late_ms) else 0.0,
+            "overruns": overruns,
+            "skipped": skipped,
+            "busy": busy,
+            "comm_errors": comm_errors,
+        }
+        for name in ("overruns", "skipped", "busy", "comm_errors"):
+            telemetry.count(f"stream.{name}", self.last_stats[name])
+        if overruns or busy or comm_errors:
+            telemetry.log("⚠️ [Streamer] 늦은 tick {}회 (건너뛴 tick {}), 버스 대기 초과 {}회, 통신 오류 {}회",
+                          overruns, skipped, busy, comm_errors)
+        return self.last_stats
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import numpy as np
+
+from motion.motion_planner import TICKS_PER_VEL_UNIT, TICKS_PER_ACC_UNIT
+from utils.logger import telemetry
+
+
+class Schedule:
+    """
+    전류 예산 안에서 짠 이동 계획
+    - waves: [(시작 시각, {관절: (목표, 속도)})] 같은 시각에 출발하는 관절은 한 번의 SyncWrite
+    - duration: 마지막 관절이 도착하는 예상 시각 (초)
+    - peak_ma: 예상 최대 동적 전류 (유지 전류 제외)
+    - skipped: 과열로 움직이지 않은 관절
+    """
+
+    def __init__(self, waves, duration, peak_ma, skipped=None):
+        self.waves = waves
+        self.duration = duration
+        self.peak_ma = peak_ma
+        self.skipped = skipped or []
+
+
+class PowerScheduler:
+    """
+    ★ 전류/온도를 고려한 시차 출발 스케줄러 (config/safety_limits.json 의 "power")
+    - 관절별 전류를 Profile 사다리꼴(가속 → 정속 → 감속)로 추정:
+        가감속 구간 = load·(accel_ma·가속도 + vel_ma·속도), 정속 구간 = load·vel_ma·속도
+      (짧은 이동은 최고 속도에 닿지 못하므로 실제 도달 속도로 계산)
+    - 유지 전류는 피드백의 Present Current 실측값(없으면 hold_ma)으로 예산에서 먼저 뺌
+    - 전류가 큰 관절부터 시간 격자(20ms) 위 가장 이른 출발 시각에 배치 → 같은 시각 출발끼리 한 웨이브
+      (다음 웨이브는 앞 웨이브의 가속 구간이 끝나 전류가 내려가면 바로 출발: 고정 sleep 없음)
+    - 온도가 warn 이상인 관절은 느리게(slow_factor) 마지막에, limit 이상이면 움직이지 않음
+    """
+
+    def __init__(self, driver, limits_path="config/safety_limits.json", grid=0.02):
+        self.driver = driver
+        self.grid = grid
+
+        power = {}
+        if limits_path and os.path.exists(limits_path) and os.path.getsize(limits_path) > 0:
+            with open(limits_path, 'r', encoding='utf-8') as f:
+                power = json.load(f).get('power', {})
+
+        self.budget = float(power.get('budget_ma', 3000))
+        self.ma_per_unit = float(power.get('ma_per_unit', 2.69))
+        default = power.get('default', {})
+        overrides = power.get('joints', {})
+        self.params = {}
+        for name in driver.motors:
+            p = dict(default, **overrides.get(name, {}))
+            self.params[name] = (float(p.get('hold_ma', 40)), float(p.get('accel_ma', 6.0)),
+                                 float(p.get('vel_ma', 1.2)), float(p.get('load', 1.0)))
+        temperature = power.get('temperature', {})
+        self.temp_warn = temperature.get('warn', 55)
+        self.temp_limit = temperature.get('limit', 70)
+        self.slow_factor = temperature.get('slow_factor', 0.5)
+
+    def read_state(self):
+        """현재 (위치, 전류, 온도) [모터 ID, 필드] 배열. 피드백 서비스가 없으면 한 번만 읽음"""
+        feedback = self.driver.feedback
+        if feedback is None:
+            from hardware.dxl_driver import StateFeedback
+            feedback = StateFeedback(self.driver)
+            if not feedback.poll_once():
+                return None, feedback
+        _, state = feedback.latest()
+        return state, feedback
+
+    def plan(self, targets, velocity, accel, state=None, feedback=None):
+        """
+        targets: {관절: 목표} (바퀴는 속도) → Schedule
+        velocity / accel: 이 이동에 쓸 Profile Velocity / Acceleration (관절 공통)
+        """
+        if state is None:
+            state, feedback = self.read_state()
+
+        joints, wheels, skipped = [], {}, []
+        for name, target in targets.items():
+            info = self.driver.motors[name]
+            if info.get('type') == 'wheel':
+                wheels[name] = target
+                continue
+            joints.append(name)
+
+        # 1. 관절별 거리 / 유지 전류 / 온도 (피드백이 없으면 최대 거리로 보수적으로)
+        n = len(joints)
+        distance = np.empty(n)
+        hold = np.empty(n)
+        temp = np.zeros(n)
+        for i, name in enumerate(joints):
+            info = self.driver.motors[name]
+            hold_ma, _, _, _ = self.params[name]
+            if state is not None:
+                row = state[info['id']]
+                distance[i] = abs(targets[name] - row[feedback.POSITION])
+                hold[i] = max(abs(row[feedback.CURRENT]) * self.ma_per_unit, hold_ma)
+                temp[i] = row[feedback.TEMPERATURE]
+            else:
+                distance[i] = info['max'] - info['min']
+                hold[i] = hold_ma
+
+        hot = temp >= self.temp_warn
+        blocked = temp >= self.temp_limit
+        for i in np.nonzero(blocked)[0]:
+            skipped.append(joints[i])
+            telemetry.log("🔥 [Power] {} 온도 {}°C ≥ {}°C: 이동 생략", joints[i], int(temp[i]), self.temp_limit)
+
+        # 2. 사다리꼴 프로파일 시간과 구간별 전류
+        speed = np.where(hot, max(1, int(velocity * self.slow_factor)), velocity).astype(np.float64)
+        v = speed * TICKS_PER_VEL_UNIT
+        a = max(accel, 1) * TICKS_PER_ACC_UNIT
+        t_acc = np.minimum(v / a, np.sqrt(distance / a))           # 짧은 이동은 삼각형 프로파일
+        v_peak = t_acc * a
+        t_total = np.where(distance > 0, 2 * t_acc + np.maximum(distance - v_peak * t_acc, 0) / np.maximum(v_peak, 1e-9), 0)
+        p = np.array([self.params[name] for name in joints]).reshape(n, 4)
+        load = p[:, 3]
+        peak_ma = load * (p[:, 1] * accel + p[:, 2] * speed * (v_peak / np.maximum(v, 1e-9)))
+        cruise_ma = load * p[:, 2] * speed
+
+        # 3. 시간 격자에 배치: 전류 큰 순서 (과열 관절은 맨 뒤)
+        budget = max(self.budget - float(hold.sum()), 1.0)
+        steps = np.ceil(t_total / self.grid).astype(int)
+        acc_steps = np.ceil(t_acc / self.grid).astype(int)
+        horizon = int(steps.sum()) + 2
+        total = np.zeros(horizon)
+        starts = {}
+        order = sorted((i for i in range(n) if not blocked[i] and distance[i] > 0),
+                       key=lambda i: (hot[i], -peak_ma[i]))
+        for i in order:
+            profile = np.full(steps[i], cruise_ma[i])
+            profile[:acc_steps[i]] = peak_ma[i]
+            profile[max(steps[i] - acc_steps[i], 0):] = peak_ma[i]
+            # 예산보다 큰 관절은 혼자 출발할 수 있는 시각(전류 0 구간)까지 기다림
+            limit = max(budget, float(profile.max()))
+            window = np.lib.stride_tricks.sliding_window_view(total, len(profile)) if len(profile) else None
+            if window is None:
+                start = 0
+            else:
+                fits = np.nonzero(((window + profile) <= limit + 1e-6).all(axis=1))[0]
+                start = int(fits[0]) if len(fits) else horizon - len(profile)
+            total[start:start + len(profile)] += profile
+            starts.setdefault(start, {})[joints[i]] = (targets[joints[i]], int(speed[i]))
+
+        # 4. 웨이브 (시작 시각 순). 바퀴 정지/속도 명령은 첫 웨이브에
+        waves = [(start * self.grid, frame) for start, frame in sorted(starts.items())]
+        if wheels:
+            if waves:
+                waves[0][1].update(wheels)
+            else:
+                waves.append((0.0, dict(wheels)))
+        ends = [start + steps[joints.index(name)] for start, frame in starts.items() for name in frame if name in joints]
+        duration = max(ends) * self.grid if ends else 0.0
+        return Schedule(waves, duration, float(total.max()) if len(total) else 0.0, skipped)
+
+    def execute(self, schedule, wait=True, stop_event=None):
+        """웨이브를 예정 시각에 전송. wait 이면 마지막 관절 도착 예상 시각까지 대기"""
+        t_start = time.monotonic()
+        for offset, frame in schedule.waves:
+            delay = t_start + offset - time.monotonic()
+            if delay > 0:
+                if stop_event is not None and stop_event.wait(delay):
+                    return False
+                if stop_event is None:
+                    time.sleep(delay)
+            self.driver.move_joints(frame)
+        if wait:
+            delay = t_start + schedule.duration - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return True
+
+    def move(self, targets, velocity=200, accel=50, wait=True):
+        """targets 로 전류 예산 안에서 최대한 빨리 이동 → Schedule"""
+        with telemetry.span("power.plan", n=len(targets)):
+            schedule = self.plan(targets, velocity, accel)
+        sizes = "/".join(str(len(frame)) for _, frame in schedule.waves)
+        print(f"⚡ [Power] {len(schedule.waves)}개 웨이브 ({sizes}), 예상 {schedule.duration:.2f}s, "
+              f"최대 동적 전류 {schedule.peak_ma:.0f}mA / 예산 {self.budget:.0f}mA")
+        self.execute(schedule, wait=wait)
+        return schedule
@@ -0,0 +1,207 @@
+import json
+import numpy as np
+
+from motion.safety_validator import load_limits, joint_limit_of
+
+# 오른팔 관절 → 왼팔 관절로 옮길 때의 부호 (스펙 desc 기준: 어깨 pitch/상박 회전/팔꿈치는 방향이 반대)
+MIRROR = {
+    'shoulder_pitch': -1.0,
+    'shoulder_roll': 1.0,
+    'arm_yaw': -1.0,
+    'elbow_pitch': -1.0,
+    'wrist_pitch': 1.0,
+    'hand': 1.0,
+}
+
+SIDES = ('r', 'l', 'both')
+
+
+class Primitive:
+    """
+    ★ 미리 컴파일된 단위 동작 (Lego Block)
+    - frames: [K, J] 중립 자세 대비 오프셋 (tick). 모든 키프레임이 같은 관절들을 지정하므로
+      build_keyframes 에서 행 하나가 그대로 키프레임 하나가 됨
+    - speed:  [K] 각 키프레임으로 가는 Profile Velocity
+    - hold:   [K] 키프레임 도착 후 대기 (초, 0 이면 대기 없음)
+    - loop:   (시작, 끝) 반복 구간 행 범위. reps 만큼 반복
+    - 팔 관절은 오른팔(r_) 기준으로 정의하고 side 로 왼팔/양팔로 옮김
+    """
+
+    def __init__(self, name, desc, joints, frames, speed, hold, loop=None, side='r'):
+        self.name = name
+        self.desc = desc
+        self.joints = list(joints)
+        self.frames = np.asarray(frames, dtype=np.float64)
+        self.speed = np.asarray(speed, dtype=np.float64)
+        self.hold = np.asarray(hold, dtype=np.float64)
+        self.loop = loop
+        self.side = side
+
+
+# 오프셋은 hardware_spec.json 의 neutral 기준 (오른팔 방향 규칙: 어깨 pitch +위, 팔꿈치 -굽힘, 손목 +위, 손 +쥠)
+PRIMITIVES = [
+    Primitive(
+        "wave", "손 흔들기 (인사)",
+        ['r_shoulder_pitch', 'r_elbow_pitch', 'r_wrist_pitch'],
+        [[1400, -400, 400],
+         [1400, -400, 750],
+         [1400, -400, 50],
+         [0, 0, 0]],
+        speed=[200, 250, 250, 40],
+        hold=[0.3, 0, 0, 0],
+        loop=(1, 3),
+    ),
+    Primitive(
+        "nod", "고개 끄덕이기 (긍정)",
+        ['head_tilt_down'],
+        [[-200],
+         [0]],
+        speed=[150, 150],
+        hold=[0, 0],
+        loop=(0, 2),
+    ),
+    Primitive(
+        "cheer", "두 팔 들고 환호",
+        ['r_shoulder_pitch', 'r_elbow_pitch', 'r_hand'],
+        [[1800, 0, 800],
+         [1800, -300, 800],
+         [1800, 0, 800],
+         [0, 0, 0]],
+        speed=[250, 250, 250, 60],
+        hold=[0.2, 0, 0, 0],
+        loop=(1, 3),
+        side='both',
+    ),
+    Primitive(
+        "shrug", "어깨 으쓱 (모르겠음/거절)",
+        ['r_shoulder_roll', 'r_elbow_pitch', 'r_wrist_pitch', 'head_tilt_down'],
+        [[200, -400, 500, -80],
+         [0, 0, 0, 0]],
+        speed=[150, 60],
+        hold=[1.0, 0],
+        side='both',
+    ),
+    Primitive(
+        "arm_lift", "팔 들어 올리기 (손들기/가리키기)",
+        ['r_shoulder_pitch', 'r_elbow_pitch'],
+        [[1500, -100],
+         [0, 0]],
+        speed=[200, 60],
+        hold=[1.5, 0],
+    ),
+]
+
+
+class PrimitiveLibrary:
+    """
+    ★ {"prim": 이름, "amp", "speed", "reps", "side"} → motions 리스트 (LLM 출력 토큰 절약)
+    - amp:   오프셋 배율 (동작 크기)
+    - speed: 속도 배율 (Profile Velocity 는 곱하고 대기 시간은 나눔)
+    - reps:  반복 구간 횟수
+    - side:  'r' / 'l' / 'both' (팔 동작만 해당)
+    변환은 키프레임 배열 전체에 대한 NumPy 연산이고, 결과 위치는 스펙 범위로,
+    속도는 관절별 max_speed (config/safety_limits.json) 로 자름 → 안전 검사기가 매번 고칠 일이 없음
+    """
+
+    AMP_RANGE = (0.2, 1.5)
+    SPEED_RANGE = (0.3, 3.0)
+    MAX_REPS = 5
+
+    def __init__(self, spec, primitives=PRIMITIVES, limits_path="config/safety_limits.json"):
+        motors = {m['name']: m for m in spec['motors'] if m.get('type') != 'wheel'}
+        limits = load_limits(limits_path)
+        self.neutral = {name: m['neutral'] for name, m in motors.items()}
+        self.lower = {name: m['min'] for name, m in motors.items()}
+        self.upper = {name: m['max'] for name, m in motors.items()}
+        self.max_speed = {name: min(joint_limit_of(limits, name, 'max_speed', 1000), 1000) for name in motors}
+        self.primitives = {p.name: p for p in primitives}
+
+    @classmethod
+    def from_file(cls, spec_path="config/hardware_spec.json", limits_path="config/safety_limits.json"):
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), limits_path=limits_path)
+
+    def describe(self):
+        """프롬프트용 한 줄 목록"""
+        lines = []
+        for p in self.primitives.values():
+            options = [f"기본 side={p.side}"] if any(j.startswith('r_') for j in p.joints) else []
+            options.append("반복 가능" if p.loop else "반복 없음")
+            lines.append(f"{p.name}: {p.desc} ({', '.join(options)})")
+        return "\n".join(lines)
+
+    def expand(self, motion):
+        """prim motion 하나 → 관절 motions. 알 수 없는 이름이면 빈 리스트"""
+        prim = self.primitives.get(motion.get('prim'))
+        if prim is None:
+            print(f"⚠️ [Primitives] 알 수 없는 프리미티브: {motion.get('prim')}")
+            return []
+
+        amp = float(np.clip(_number(motion.get('amp'), 1.0), *self.AMP_RANGE))
+        speed = float(np.clip(_number(motion.get('speed'), 1.0), *self.SPEED_RANGE))
+        reps = int(np.clip(_number(motion.get('reps'), 2), 1, self.MAX_REPS))
+        side = motion.get('side', prim.side)
+        if side not in SIDES:
+            side = prim.side
+
+        # 1. 반복: 반복 구간 행을 reps 번 이어 붙임
+        frames, speeds, holds = prim.frames, prim.speed, prim.hold
+        if prim.loop is not None:
+            a, b = prim.loop
+            rows = np.concatenate([np.arange(a), np.tile(np.arange(a, b), reps), np.arange(b, len(frames))])
+            frames, speeds, holds = frames[rows], speeds[rows], holds[rows]
+
+        # 2. 좌우: 관절 열 이름과 부호를 바꿔 열을 선택/복제
+        names, signs, cols = [], [], []
+        for c, joint in enumerate(prim.joints):
+            if joint.startswith('r_'):
+                part = joint[2:]
+                if side in ('r', 'both'):
+                    names.append(joint)
+                    signs.append(1.0)
+                    cols.append(c)
+                if side in ('l', 'both'):
+                    names.append('l_' + part)
+                    signs.append(MIRROR[part])
+                    cols.append(c)
+            else:
+                names.append(joint)
+                signs.append(1.0)
+                cols.append(c)
+
+        # 3. 크기/속도 → 절대 위치 (스펙 범위) + 관절별 속도 [K, N] (안전 한계)
+        neutral = np.array([self.neutral[j] for j in names], dtype=np.float64)
+        lower = np.array([self.lower[j] for j in names], dtype=np.float64)
+        upper = np.array([self.upper[j] for j in names], dtype=np.float64)
+        max_speed = np.array([self.max_speed[j] for j in names], dtype=np.float64)
+        positions = np.clip(neutral + frames[:, cols] * np.array(signs) * amp, lower, upper)
+        positions = np.rint(positions).astype(int).tolist()
+        speeds = np.clip(np.rint(speeds[:, None] * speed), 1, max_speed).astype(int).tolist()
+        holds = (holds / speed).round(2).tolist()
+
+        motions = []
+        for row, row_speeds, hold in zip(positions, speeds, holds):
+            motions += [{"joint": j, "pos": p, "speed": v} for j, p, v in zip(names, row, row_speeds)]
+            if hold > 0:
+                motions.append({"delay": hold})
+        return motions
+
+    def expand_all(self, motions):
+        """motions 리스트 안의 prim 을 모두 펼침 (일반 motion 은 그대로)"""
+        out = []
+        for motion in motions:
+            if isinstance(motion, dict) and 'prim' in motion:
+                out += self.expand(motion)
+            else:
+                out.append(motion)
+        return out
+
+
+def _number(value, default):
+    if isinstance(value, bool) or value is None:
+        return default
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if np.isfinite(value) else default
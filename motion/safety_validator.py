@@ -0,0 +1,228 @@
+import os
+import json
+import numpy as np
+
+from motion.motion_planner import TICKS_PER_VEL_UNIT, TICKS_PER_ACC_UNIT, MJ_PEAK_VEL, MJ_PEAK_ACC
+
+
+def load_limits(limits_path="config/safety_limits.json"):
+    """safety_limits.json → dict (없거나 비어 있으면 빈 dict)"""
+    if limits_path and os.path.exists(limits_path) and os.path.getsize(limits_path) > 0:
+        with open(limits_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def joint_limit_of(limits, joint, key, fallback):
+    """관절별 값 → 없으면 default → 없으면 fallback"""
+    return limits.get('joints', {}).get(joint, {}).get(key, limits.get('default', {}).get(key, fallback))
+
+
+class ValidationResult:
+    """
+    검사 결과
+    - motions: 범위/속도를 고친 계획 (거절이면 빈 리스트)
+    - rejected: True 면 실행하지 말고 거절 (Layer 3)
+    - reasons: 고치거나 거절한 이유 문자열 목록
+    """
+
+    def __init__(self, motions, rejected=False, reasons=None):
+        self.motions = motions
+        self.rejected = rejected
+        self.reasons = reasons or []
+
+    @property
+    def ok(self):
+        return not self.rejected
+
+
+class SafetyValidator:
+    """
+    ★ 실행 전 안전 검사기 (config/safety_limits.json)
+    - 관절 범위, 관절별 속도/가속도 상한, 관절 조합 금지 영역(자기 충돌)을 로드 시 NumPy 배열로 컴파일
+    - check() 는 계획 전체를 한 번에 검사: 작은 범위 초과와 과속은 고쳐서 통과,
+      범위를 크게 벗어나거나(불가능한 요청) 금지 영역을 지나가면 계획 전체를 거절
+    - 금지 영역은 관절 공간의 상자(box). 플래너가 키프레임 사이를 전 관절 동일 비율로 보간하므로
+      구간은 직선이고, 직선-상자 교차(slab) 검사로 키프레임 사이 경로까지 정확히 확인함
+    """
+
+    def __init__(self, spec, limits_path="config/safety_limits.json", default_speed=200, default_accel=50):
+        joints = [m for m in spec['motors'] if m.get('type') != 'wheel']
+        self.joints = [m['name'] for m in joints]
+        self.index = {name: i for i, name in enumerate(self.joints)}
+        self.wheels = {m['name'] for m in spec['motors'] if m.get('type') == 'wheel'}
+        self.neutral = np.array([m['neutral'] for m in joints], dtype=np.float64)
+        self.default_speed = default_speed
+
+        limits = load_limits(limits_path)
+
+        def joint_limit(m, key, fallback):
+            return joint_limit_of(limits, m['name'], key, fallback)
+
+        # 범위: 스펙 범위를 safety_limits 에서 더 좁힐 수 있음
+        self.lower = np.array([max(m['min'], joint_limit(m, 'min', m['min'])) for m in joints], dtype=np.float64)
+        self.upper = np.array([min(m['max'], joint_limit(m, 'max', m['max'])) for m in joints], dtype=np.float64)
+        self.max_speed = np.array([joint_limit(m, 'max_speed', 1000) for m in joints], dtype=np.float64)
+        max_accel = np.array([joint_limit(m, 'max_accel', 1000) for m in joints], dtype=np.float64)
+
+        # 가속도 상한 → 이동 거리 D 에 대한 속도 상한: speed ≤ acc_coef · √D
+        #   (최소 저크 구간 T ≥ 1.875·D/v 이면 최대 가속도 5.7735·D/T² ≤ a_max)
+        # 플래너는 구간 시간을 default_accel 로도 제한하므로, 그보다 엄격한 관절만 속도를 낮추면 됨
+        self.acc_coef = MJ_PEAK_VEL * np.sqrt(max_accel * TICKS_PER_ACC_UNIT / MJ_PEAK_ACC) / TICKS_PER_VEL_UNIT
+        self.acc_coef[max_accel >= default_accel] = np.inf
+
+        self.wheel_max = float(limits.get('wheels', {}).get('max_speed', 200))
+        plan = limits.get('plan', {})
+        self.max_motions = int(plan.get('max_motions', 64))
+        self.max_delay = float(plan.get('max_delay', 5.0))
+        self.clamp_margin = float(plan.get('clamp_margin', 300))
+
+        # 금지 영역: [E, C] 하한/상한 (C = 금지 영역에 등장하는 관절 열만)
+        exclusions = limits.get('exclusions', [])
+        used = sorted({self.index[j] for e in exclusions for j in e['box'] if j in self.index})
+        self.ex_cols = np.array(used, dtype=np.intp)
+        self.ex_names = [e['name'] for e in exclusions]
+        self.ex_desc = [e.get('desc', '') for e in exclusions]
+        self.ex_lo = np.full((len(exclusions), len(used)), -np.inf)
+        self.ex_hi = np.full((len(exclusions), len(used)), np.inf)
+        col = {j: c for c, j in enumerate(used)}
+        for e, exclusion in enumerate(exclusions):
+            for joint, (lo, hi) in exclusion['box'].items():
+                if joint in self.index:
+                    self.ex_lo[e, col[self.index[joint]]] = lo
+                    self.ex_hi[e, col[self.index[joint]]] = hi
+
+    def check(self, motions, start=None):
+        """motions (LLM 계획) → ValidationResult. start: 출발 자세 [J] (없으면 중립 자세)"""
+        start = self.neutral if start is None else np.asarray(start, dtype=np.float64)
+        reasons = []
+        if len(motions) > self.max_motions:
+            reasons.append(f"motions {len(motions)}개 → {self.max_motions}개로 자름")
+            motions = motions[:self.max_motions]
+
+        # 1. 한 번 순회하며 관절 명령을 행 배열로 (키프레임 구분은 build_keyframes 와 동일)
+        out = []
+        rows, kf_of, col_of, pos_of, speed_of = [], [], [], [], []
+        kf, in_kf = 0, set()
+        for motion in motions:
+            if not isinstance(motion, dict):
+                reasons.append(f"잘못된 motion 무시: {str(motion)[:40]}")
+                continue
+            if 'delay' in motion:
+                delay = _number(motion['delay'])
+                if delay is None:
+                    reasons.append(f"잘못된 delay 무시: {motion['delay']!r}")
+                    continue
+                clipped = min(max(delay, 0.0), self.max_delay)
+                if clipped != delay:
+                    reasons.append(f"delay {delay} → {clipped}")
+                out.append({"delay": clipped})
+                if in_kf:
+                    kf, in_kf = kf + 1, set()
+                continue
+
+            joint = motion.get('joint')
+            value = _number(motion.get('pos') if motion.get('pos') is not None else motion.get('val'))
+            if value is None or (joint not in self.index and joint not in self.wheels):
+                reasons.append(f"알 수 없는 명령 무시: {joint}")
+                continue
+            if joint in in_kf:
+                kf, in_kf = kf + 1, set()
+            in_kf.add(joint)
+
+            if joint in self.wheels:
+                clipped = int(min(max(value, -self.wheel_max), self.wheel_max))
+                if clipped != value:
+                    reasons.append(f"{joint} 속도 {value:g} → {clipped:g}")
+                out.append({"joint": joint, "val": clipped})
+                continue
+
+            rows.append(len(out))
+            kf_of.append(kf)
+            col_of.append(self.index[joint])
+            pos_of.append(value)
+            speed = _number(motion.get('speed'))
+            speed_of.append(speed if speed else np.nan)
+            out.append(dict(motion))
+
+        if not rows:
+            return ValidationResult(out, reasons=reasons)
+
+        kf_of = np.array(kf_of, dtype=np.intp)
+        col_of = np.array(col_of, dtype=np.intp)
+        pos = np.array(pos_of, dtype=np.float64)
+
+        # 2. 범위: 조금 벗어나면 자르고, clamp_margin 이상 벗어나면 불가능한 요청으로 거절
+        lo, hi = self.lower[col_of], self.upper[col_of]
+        over = np.maximum(lo - pos, pos - hi)
+        if (over > self.clamp_margin).any():
+            bad = np.nonzero(over > self.clamp_margin)[0]
+            reasons += [f"{self.joints[col_of[r]]} {pos[r]:g} 는 가동 범위({lo[r]:g}~{hi[r]:g}) 밖" for r in bad]
+            return ValidationResult([], rejected=True, reasons=reasons)
+        clamped = np.clip(pos, lo, hi)
+        for r in np.nonzero(over > 0)[0]:
+            reasons.append(f"{self.joints[col_of[r]]} {pos[r]:g} → {clamped[r]:g}")
+
+        # 3. 키프레임별 전 관절 자세 [K+1, J] (명령 없는 관절은 직전 값 유지)
+        n_kf = int(kf_of[-1]) + 1
+        targets = np.vstack([start[None, :], np.full((n_kf, len(self.joints)), np.nan)])
+        targets[kf_of + 1, col_of] = clamped
+        filled = np.where(np.isnan(targets), 0, np.arange(n_kf + 1)[:, None])
+        filled = np.maximum.accumulate(filled, axis=0)
+        poses = targets[filled, np.arange(len(self.joints))[None, :]]
+
+        # 4. 속도/가속도 상한
+        distance = np.abs(poses[kf_of + 1, col_of] - poses[kf_of, col_of])
+        speed = np.array(speed_of, dtype=np.float64)
+        requested = np.where(np.isnan(speed), self.default_speed, speed)
+        with np.errstate(invalid='ignore'):   # 제자리 명령(거리 0) 의 inf·0 은 아래 where 에서 버려짐
+            cap = np.where(distance > 0,
+                           np.minimum(self.max_speed[col_of], self.acc_coef[col_of] * np.sqrt(distance)),
+                           self.max_speed[col_of])
+
+        for r, value in zip(rows, np.rint(clamped).astype(int).tolist()):
+            out[r]['pos'] = value
+            out[r].pop('val', None)
+        for i in np.nonzero(requested > cap)[0]:
+            new_speed = max(1, int(cap[i]))
+            reasons.append(f"{self.joints[col_of[i]]} speed {requested[i]:g} → {new_speed}")
+            out[rows[i]]['speed'] = new_speed
+
+        # 5. 금지 영역: 각 구간(직선)이 상자 안으로 들어가는지 (이미 안에서 출발하는 구간은 빠져나가는 것으로 허용)
+        if len(self.ex_names):
+            collisions = self._segment_hits(poses[:-1, self.ex_cols], poses[1:, self.ex_cols])
+            if collisions.any():
+                for k, e in zip(*np.nonzero(collisions)):
+                    reasons.append(f"키프레임 {k + 1}: {self.ex_names[e]} ({self.ex_desc[e]})")
+                return ValidationResult([], rejected=True, reasons=reasons)
+
+        return ValidationResult(out, reasons=reasons)
+
+    def _segment_hits(self, p0, p1):
+        """구간 [K, C] 들과 금지 상자 [E, C] 의 교차 여부 → [K, E]"""
+        d = p1 - p0
+        # 움직이지 않는 관절은 아주 작은 이동으로 취급 → 범위 안이면 (-∞, ∞), 밖이면 [0, 1] 과 겹치지 않는 구간
+        d[d == 0] = 1e-9
+        a = p0[:, None, :]
+        d = d[:, None, :]
+        t_lo = (self.ex_lo[None] - a) / d
+        t_hi = (self.ex_hi[None] - a) / d
+        t_enter = np.minimum(t_lo, t_hi)
+        t_exit = np.maximum(t_lo, t_hi)
+
+        enter = t_enter.max(axis=2)
+        leave = t_exit.min(axis=2)
+        hits = (np.maximum(enter, 0.0) <= np.minimum(leave, 1.0))
+        starts_inside = (enter <= 0.0) & (leave >= 0.0)
+        return hits & ~starts_inside
+
+
+def _number(value):
+    """숫자로 바꿀 수 있으면 float, 아니면 None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
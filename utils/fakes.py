@@ -0,0 +1,311 @@
+import json
+import time
+import wave
+import random
+import threading
+import collections
+import numpy as np
+
+from core.plan_cache import normalize_transcript
+
+# ==============================================================================
+# 🧪 하드웨어/클라우드 대역 (utils/latency_bench.py 에서 사용)
+# ==============================================================================
+# - WavMicrophone: WAV 발화를 실시간 속도로 AudioFrontEnd 에 밀어 넣는 마이크
+# - FakeRecognizer: 재생한 발화를 찾아 그 텍스트를 돌려주는 STT (지연 설정 가능)
+# - FakeGenAI: google.genai 의 Client / types 대역 (첫 토큰 지연 + 토큰 간격으로 스트리밍)
+# - FakeCamera: cv2.VideoCapture 대역 (고정 fps 합성 프레임)
+# 모터 버스는 hardware/sim_bus.py (port="sim") 를 그대로 사용
+
+
+def load_wav(path, rate=16000):
+    """WAV → int16 모노 (rate 가 다르면 선형 보간으로 맞춤)"""
+    with wave.open(path, 'rb') as f:
+        n_channels, width, src_rate, n = f.getnchannels(), f.getsampwidth(), f.getframerate(), f.getnframes()
+        raw = f.readframes(n)
+    if width != 2:
+        raise ValueError(f"16비트 PCM WAV 만 지원합니다: {path} ({width * 8}비트)")
+    samples = np.frombuffer(raw, dtype='<i2').reshape(-1, n_channels).astype(np.float32).mean(axis=1)
+    if src_rate != rate:
+        t = np.arange(int(len(samples) * rate / src_rate)) * (src_rate / rate)
+        samples = np.interp(t, np.arange(len(samples)), samples)
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+def save_wav(path, samples, rate=16000):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype('<i2').tobytes())
+    return path
+
+
+def synth_utterance(text, rate=16000, syllable_sec=0.16, gap_sec=0.05, word_gap_sec=0.12, amplitude=6000):
+    """
+    녹음이 없을 때 쓰는 합성 발화: 글자(음절)마다 배음 있는 톤 + Hann 포락선, 단어 사이는 짧은 쉼
+    - 음절 수 게이트(KeywordSpotter)와 에너지 VAD 를 실제 발화처럼 통과
+    - 텍스트로 난수 시드를 정하므로 같은 문장은 같은 샘플 (FakeRecognizer 가 샘플로 문장을 찾음)
+    """
+    rng = np.random.default_rng(int.from_bytes(normalize_transcript(text).encode('utf-8')[:8].ljust(8, b'\0'), 'little'))
+    n_syl = int(syllable_sec * rate)
+    t = np.arange(n_syl) / rate
+    envelope = np.hanning(n_syl)
+    parts = []
+    for w, word in enumerate(text.split()):
+        if w:
+            parts.append(np.zeros(int(word_gap_sec * rate)))
+        for k, _ in enumerate(word):
+            if k:
+                parts.append(np.zeros(int(gap_sec * rate)))
+            f0 = rng.uniform(110, 220)
+            tone = sum(np.sin(2 * np.pi * f0 * h * t + rng.uniform(0, 2 * np.pi)) / h for h in (1, 2, 3))
+            parts.append(tone * envelope * amplitude * rng.uniform(0.7, 1.0))
+    samples = np.concatenate(parts) + rng.normal(0, 20, sum(len(p) for p in parts))
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+class WavMicrophone:
+    """
+    ★ WAV 재생 마이크 (PyAudio 콜백 대신 AudioFrontEnd.push_frame 을 실시간 주기로 호출)
+    - 재생할 발화가 없을 때는 낮은 잡음 프레임을 계속 넣음 (실제 마이크처럼 VAD/소음 기준이 동작)
+    - play(): 발화를 재생하고 마지막 프레임을 넣은 시각(perf_counter_ns) 을 반환 = 말이 끝난 시각
+    - identify(): 인식기로 들어온 샘플이 어느 발화의 어디까지인지 찾음 (FakeRecognizer 용)
+    """
+
+    def __init__(self, front, noise_rms=30.0, seed=0):
+        self.front = front
+        self.noise_rms = noise_rms
+        self.rng = np.random.default_rng(seed)
+        self.clips = {}                         # 텍스트 → 샘플 bytes (프레임 단위로 0 채움)
+        self._queue = collections.deque()       # (프레임, 끝 Event, [시각]) 재생 대기
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def register(self, text, samples):
+        """발화(텍스트, 샘플) 등록 → 프레임 단위로 맞춘 샘플"""
+        frame = self.front.frame
+        padded = np.zeros(-(-len(samples) // frame) * frame, dtype=np.int16)
+        padded[:len(samples)] = samples
+        self.clips[text] = padded.tobytes()
+        return padded
+
+    def start(self, calibrate_sec=0.5):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="wav-mic", daemon=True)
+        self._thread.start()
+        self.front.wait_frames(int(calibrate_sec / self.front.frame_sec))
+        print(f"✅ [Audio] WAV 마이크 시작 (소음 기준 RMS {self.front.noise_floor:.0f})")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def play(self, text, samples=None):
+        """등록된 발화(또는 samples) 를 재생하고 끝날 때까지 대기 → 마지막 프레임 시각 (ns)"""
+        if samples is None:
+            samples = np.frombuffer(self.clips[text], dtype=np.int16)
+        elif text not in self.clips:
+            samples = self.register(text, samples)
+        frames = samples.reshape(-1, self.front.frame)
+        done, stamp = threading.Event(), [None]
+        with self._lock:
+            for i, frame in enumerate(frames):
+                last = i == len(frames) - 1
+                self._queue.append((frame, done if last else None, stamp if last else None))
+        done.wait()
+        return stamp[0]
+
+    def _loop(self):
+        next_tick = time.monotonic()
+        noise = np.empty(self.front.frame, dtype=np.int16)
+        while self._running:
+            with self._lock:
+                item = self._queue.popleft() if self._queue else None
+            if item is None:
+                noise[:] = self.rng.normal(0, self.noise_rms, len(noise))
+                self.front.push_frame(noise)
+            else:
+                frame, done, stamp = item
+                self.front.push_frame(frame)
+                if done is not None:
+                    stamp[0] = time.perf_counter_ns()
+                    done.set()
+
+            next_tick += self.front.frame_sec
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def identify(self, samples, probe_ms=30):
+        """
+        인식기 입력 샘플 → (텍스트, 덮은 비율 0~1). 못 찾으면 (None, 0)
+        - 가장 큰 에너지 구간과 마지막 유성 구간을 등록된 발화 바이트에서 그대로 찾음
+          (링 버퍼는 밀어 넣은 프레임을 변형 없이 보관하므로 정확히 일치)
+        """
+        probe = self.front.rate * probe_ms // 1000
+        n = len(samples) // probe
+        if n == 0:
+            return None, 0.0
+        blocks = samples[:n * probe].reshape(n, probe).astype(np.float32)
+        energy = np.sqrt((blocks ** 2).mean(axis=1))
+        voiced = np.nonzero(energy > self.noise_rms * 4)[0]
+        if len(voiced) == 0:
+            return None, 0.0
+        loudest = samples[int(np.argmax(energy)) * probe:][:probe].tobytes()
+        last = samples[int(voiced[-1]) * probe:][:probe].tobytes()
+        for text, clip in self.clips.items():
+            if clip.find(loudest) < 0:
+                continue
+            end = clip.find(last)
+            covered = (end + len(last)) / len(clip.rstrip(b'\0')) if end >= 0 else 1.0
+            return text, min(covered, 1.0)
+        return None, 0.0
+
+
+class FakeRecognizer:
+    """
+    speech_recognition.Recognizer 대역
+    - recognize_google: latency(±jitter) 초 뒤 재생한 발화의 텍스트 (부분 구간이면 덮은 비율만큼의 앞 단어들)
+    - 재생한 발화가 아니면 UnknownValueError (실제 STT 가 잡음을 못 알아들을 때와 같음)
+    """
+
+    def __init__(self, mic, latency=0.3, jitter=0.1, seed=0):
+        self.mic = mic
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def recognize_google(self, audio, language=None):
+        from core import voice_interface
+
+        self.calls += 1
+        time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        samples = np.frombuffer(audio.frame_data, dtype=np.int16)
+        text, covered = self.mic.identify(samples)
+        if text is None:
+            raise voice_interface.sr.UnknownValueError()
+        words = text.split()
+        return " ".join(words[:max(1, round(len(words) * covered))])
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _FakeTypes:
+    """google.genai.types 중 엔진이 쓰는 것만"""
+
+    class GenerateContentConfig(_Namespace):
+        pass
+
+    class Part(_Namespace):
+        @classmethod
+        def from_bytes(cls, data, mime_type):
+            return cls(data=data, mime_type=mime_type)
+
+
+class FakeGenAI:
+    """
+    ★ google.genai 대역 (core.llm_engine.genai / types 자리에 넣어 사용)
+    - Client(api_key).models.generate_content_stream: first_token(±jitter 비율) 초 뒤 첫 청크,
+      이후 chunk_chars 글자마다 token_interval 초 간격으로 응답 JSON 을 나눠 보냄 (마지막 청크에 usage)
+    - 응답 계획: plans 의 {정규화된 발화: 계획}, 없으면 default_plan
+    - model_latency: {모델: (first_token, token_interval)} 모델별로 다르게 (헤지 측정용)
+    """
+
+    def __init__(self, plans=None, first_token=0.6, token_interval=0.02, jitter=0.2, chunk_chars=12,
+                 default_plan=None, model_latency=None, seed=0):
+        self.plans = {normalize_transcript(text): plan for text, plan in (plans or {}).items()}
+        self.first_token = first_token
+        self.token_interval = token_interval
+        self.jitter = jitter
+        self.chunk_chars = chunk_chars
+        self.default_plan = default_plan or {"text": "네, 알겠어요.", "motions": [{"prim": "nod", "reps": 1}]}
+        self.model_latency = model_latency or {}
+        self.random = random.Random(seed)
+        self.types = _FakeTypes
+        self.requests = 0
+
+    def Client(self, api_key=None):
+        return _Namespace(models=_FakeModels(self))
+
+    def _response(self, contents):
+        user_text = contents[-1]["parts"][0]["text"] if contents else ""
+        plan = self.plans.get(normalize_transcript(user_text), self.default_plan)
+        text = json.dumps(plan, ensure_ascii=False)
+        prompt_tokens = sum(len(part.get("text", "")) for c in contents for part in c["parts"]) // 2
+        usage = _Namespace(prompt_token_count=prompt_tokens, candidates_token_count=len(text) // 2)
+        return text, usage
+
+    def _latency(self, model):
+        first, interval = self.model_latency.get(model, (self.first_token, self.token_interval))
+        return first * (1.0 + self.random.uniform(-self.jitter, self.jitter)), interval
+
+
+class _FakeModels:
+    def __init__(self, genai):
+        self.genai = genai
+
+    def generate_content_stream(self, model, contents, config=None):
+        self.genai.requests += 1
+        text, usage = self.genai._response(contents)
+        first, interval = self.genai._latency(model)
+        size = self.genai.chunk_chars
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        time.sleep(first)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(interval)
+            yield _Namespace(text=chunk, usage_metadata=usage if i == len(chunks) - 1 else None)
+
+    def generate_content(self, model, contents, config=None):
+        text = "".join(chunk.text for chunk in self.generate_content_stream(model, contents, config))
+        return _Namespace(text=text, usage_metadata=self.genai._response(contents)[1])
+
+
+class FakeCamera:
+    """
+    cv2.VideoCapture 대역: fps 주기로 합성 프레임 (움직이는 그라디언트, BGR uint8)
+    - read(image) 는 image 에 바로 채움 (VisionBrain 의 미리 할당된 링 버퍼 경로 그대로)
+    """
+
+    def __init__(self, width=640, height=480, fps=30):
+        self.shape = (height, width, 3)
+        self.period = 1.0 / fps
+        self.n = 0
+        self._next = time.monotonic()
+        self._ramp = np.add.outer(np.arange(height), np.arange(width)).astype(np.uint8)
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def set(self, prop, value):
+        return True
+
+    def read(self, image=None):
+        self._next += self.period
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next = time.monotonic()
+        if image is None:
+            image = np.empty(self.shape, dtype=np.uint8)
+        shifted = self._ramp + np.uint8(self.n % 256)
+        image[..., 0] = shifted
+        image[..., 1] = shifted[::-1]
+        image[..., 2] = 128
+        self.n += 1
+        return True, image
+
+    def release(self):
+        self._open = False
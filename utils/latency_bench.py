@@ -0,0 +1,500 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import numpy as np
+
+from utils.logger import telemetry
+from utils.fakes import WavMicrophone, FakeRecognizer, FakeGenAI, FakeCamera, load_wav, save_wav, synth_utterance
+
+# ==============================================================================
+# ⏱️ 종단 간 상호작용 지연 벤치마크
+# ==============================================================================
+# 실제 런타임(HerobotRuntime) 을 그대로 돌리고 마이크/STT/Gemini/카메라/모터 버스만 대역으로 바꿈
+#   마이크: WAV 발화를 실시간으로 AudioFrontEnd 에 재생 (없으면 합성 발화)
+#   STT: 재생한 발화의 텍스트를 지연 후 반환, Gemini: 첫 토큰 지연 + 토큰 간격으로 스트리밍
+#   카메라: 합성 프레임 (cv2 가 없으면 비전 생략), 버스: hardware/sim_bus.py (57600bps 타이밍)
+#
+# 턴마다 "말이 끝난 시각" 부터 첫 서보 명령 패킷까지를 단계별로 나눔 (단계 합 = total)
+#   endpoint  말 끝 → 녹음 종료 (끝 판정 쉼)
+#   stt       녹음 종료 → 최종 텍스트 (부분 인식을 재사용하면 0 에 가까움)
+#   think     텍스트 → 첫 동작 계획 시작 (라우터 / 캐시 / LLM 첫 동작)
+#   plan      안전 검사 + 궤적 계획
+#   bus       궤적 스트리밍 시작 → 첫 명령 패킷 전송
+#   wake      호출어 끝 → 호출어 감지 (total 에는 포함하지 않음)
+# 결과는 JSON 보고서 (p50/p95/p99, 턴별 값, 턴당 버스 패킷) → --baseline 으로 커밋 간 비교
+# 지연 숫자가 버스 경합에 가려지지 않도록 턴마다 피드백 주기/밀림, 스트리머 지터/늦은 tick/궤적 늘어남도 기록하고,
+# 동작이 끝나지 않고 선점되거나 타임아웃된 턴이 있으면 보고서에 경고(flags)를 남김
+
+STAGES = ["wake", "endpoint", "stt", "think", "plan", "bus", "total"]
+
+# 녹음이 없을 때 쓰는 기본 대본: 라우터 / LLM / (반복 시) 캐시 경로가 섞이도록
+DEFAULT_SCRIPT = [
+    {"text": "인사해 봐"},
+    {"text": "오른팔로 저기 가리켜 줄래",
+     "plan": {"text": "저쪽이요!", "motions": [{"prim": "arm_lift", "amp": 1.2}, {"delay": 0.5}]}},
+    {"text": "고개 끄덕여"},
+    {"text": "기분 좋은 척 해 봐",
+     "plan": {"text": "야호!", "motions": [{"prim": "cheer", "amp": 0.6, "speed": 1.5}, {"prim": "nod", "reps": 1}]}},
+    {"text": "날아라"},
+    {"text": "천천히 인사하면서 고개 숙여",
+     "plan": {"text": "반갑습니다.", "motions": [{"prim": "wave", "amp": 0.5, "speed": 0.8, "reps": 1}, {"prim": "nod", "reps": 1}]}},
+]
+
+
+class TurnProbe:
+    """
+    턴 측정용 기록기 (SessionRecorder 와 같은 인터페이스)
+    - DxlDriver.recorder: 실제로 전송된 명령 프레임 시각
+    - HerobotRuntime.recorder: 최종 텍스트 / 계획 도착 시각
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.commands = []
+            self.text_at = None
+            self.text = None
+            self.plan_at = None
+
+    def command(self, rows):
+        now = time.perf_counter_ns()
+        with self._lock:
+            self.commands.append(now)
+
+    def first_command(self, after):
+        """after(ns) 이후 첫 명령 프레임 시각"""
+        with self._lock:
+            return next((t for t in self.commands if t >= after), None)
+
+    def register(self, addr, length, values):
+        pass
+
+    def feedback(self, stamp, ids, state):
+        pass
+
+    def user_input(self, text):
+        with self._lock:
+            self.text_at = time.perf_counter_ns()
+            self.text = text
+
+    def plan(self, plan):
+        with self._lock:
+            self.plan_at = time.perf_counter_ns()
+
+
+def _first(events, name, after, ph='X'):
+    """after(ns) 이후 끝난 첫 구간 (t, end) 또는 None"""
+    for kind, event, t, dur, _, _ in events:
+        if kind == ph and event == name and t + dur >= after:
+            return t, t + dur
+    return None
+
+
+def _ms(a, b):
+    return None if a is None or b is None else round((b - a) / 1e6, 3)
+
+
+def summarize(values, unit="ms"):
+    """값 목록 → n / mean / p50 / p95 / p99 / max (키 뒤에 _unit, 개수처럼 단위가 없으면 unit=None)"""
+    values = np.array([v for v in values if v is not None], dtype=np.float64)
+    if len(values) == 0:
+        return {"n": 0}
+    suffix = f"_{unit}" if unit else ""
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    summary = {"mean": values.mean(), "p50": p50, "p95": p95, "p99": p99, "max": values.max()}
+    return dict({"n": int(len(values))}, **{k + suffix: round(float(v), 3) for k, v in summary.items()})
+
+
+class LatencyBench:
+    """
+    ★ 대역 하드웨어 위에서 main.py 와 같은 구성으로 런타임을 띄우고 대본을 재생
+    - script: [{"text": 발화, "wav": WAV 경로(옵션, 없으면 합성), "plan": 가짜 Gemini 응답 계획(옵션)}]
+    - 턴마다: 호출어 재생 → gap 초 쉼 → 명령 재생 → 동작이 끝날 때까지 대기 (최대 max_motion 초, 넘으면 선점)
+    """
+
+    def __init__(self, script=None, wake_wav=None, spec_path="config/hardware_spec.json", stt_latency=0.3,
+                 stt_jitter=0.1, first_token=0.6, token_interval=0.02, llm_jitter=0.2, gap=0.4, idle=0.6,
+                 max_motion=3.0, turn_timeout=30.0, vision=True, seed=0):
+        self.script = script or DEFAULT_SCRIPT
+        self.wake_wav = wake_wav
+        self.spec_path = spec_path
+        self.gap = gap
+        self.idle = idle
+        self.max_motion = max_motion
+        self.turn_timeout = turn_timeout
+        self.config = {
+            "spec": spec_path, "stt_latency": stt_latency, "stt_jitter": stt_jitter, "first_token": first_token,
+            "token_interval": token_interval, "llm_jitter": llm_jitter, "gap": gap, "max_motion": max_motion,
+            "seed": seed,
+        }
+        self.genai = FakeGenAI(plans={item["text"]: item["plan"] for item in self.script if "plan" in item},
+                               first_token=first_token, token_interval=token_interval, jitter=llm_jitter, seed=seed)
+        self.stt = dict(latency=stt_latency, jitter=stt_jitter, seed=seed)
+        self.use_vision = vision
+        self.probe = TurnProbe()
+        self.turns = []
+        self._tmp = tempfile.TemporaryDirectory(prefix="herobot-bench-")
+
+    # ------------------------------------------------------------------
+    # 구성
+    # ------------------------------------------------------------------
+    def _register_utterances(self, front):
+        """대본의 WAV 를 마이크에 등록 (없으면 합성해 WAV 로 저장한 뒤 같은 경로로 읽음)"""
+        items = [{"text": "히어로봇", "wav": self.wake_wav}] + list(self.script)
+        for k, item in enumerate(items):
+            path = item.get("wav")
+            if not path:
+                path = os.path.join(self._tmp.name, f"{k:02d}.wav")
+                save_wav(path, synth_utterance(item["text"], rate=front.rate), rate=front.rate)
+            self.mic.register(item["text"], load_wav(path, rate=front.rate))
+
+    def setup(self):
+        from core import llm_engine
+        from core.audio_frontend import AudioFrontEnd, KeywordSpotter
+        from core.llm_engine import LLMEngine
+        from core.plan_cache import PlanCache
+        from core.voice_interface import VoiceInterface
+        from core.orchestrator import HerobotRuntime
+        from hardware.dxl_driver import DxlDriver
+        from motion.motion_planner import MotionPlanner, TrajectoryStreamer
+        from motion.safety_validator import SafetyValidator
+        from motion.base_controller import BaseController
+
+        # 가짜 Gemini: 엔진은 첫 호출 때 이 모듈을 SDK 로 사용
+        llm_engine.genai, llm_engine.types = self.genai, self.genai.types
+
+        self.driver = DxlDriver(self.spec_path, port="sim")
+        self.driver.go_to_neutral()
+        self.driver.start_feedback(rate_hz=50)
+
+        self.brain = LLMEngine(spec_path=self.spec_path)
+        # 디스크 캐시(cache/plan_cache.json) 상태에 결과가 좌우되지 않도록 빈 캐시로
+        self.brain.cache = PlanCache(path=os.path.join(self._tmp.name, "plan_cache.json"),
+                                     fingerprint=self.brain.cache.fingerprint)
+        self.brain.warm_up()
+
+        front = AudioFrontEnd(device_index=None)
+        self.mic = WavMicrophone(front)
+        self._register_utterances(front)
+        self.mic.start()
+        # 호출어 템플릿도 임시 경로에 (config/wake_templates.npz 에 합성 발화가 등록되지 않도록)
+        spotter = KeywordSpotter(rate=front.rate, templates_path=os.path.join(self._tmp.name, "wake_templates.npz"))
+        self.voice = VoiceInterface(front=front, recognizer=FakeRecognizer(self.mic, **self.stt), spotter=spotter)
+
+        self.vision = None
+        if self.use_vision:
+            try:
+                from core.vision_brain import VisionBrain
+                self.vision = VisionBrain(api_key=None, capture=FakeCamera())
+            except ImportError as e:
+                print(f"⚠️ [Bench] 비전 생략 ({e})")
+
+        self.planner = MotionPlanner(self.driver.spec)
+        self.streamer = TrajectoryStreamer(self.driver, rate_hz=30)
+        self.base = BaseController(self.driver)
+        self.base.start()
+        self.streamer.base = self.base
+        self.validator = SafetyValidator(self.driver.spec)
+
+        self.driver.recorder = self.probe
+        self.runtime = HerobotRuntime(self.driver, self.brain, self.voice, self.vision, self.planner,
+                                      self.streamer, self.validator, None, self.probe)
+        self._thread = threading.Thread(target=asyncio.run, args=(self.runtime.run(),), name="bench-runtime",
+                                        daemon=True)
+        self._thread.start()
+        while getattr(self.runtime, 'shutdown', None) is None:
+            time.sleep(0.01)
+
+    def close(self):
+        self.runtime.loop.call_soon_threadsafe(self.runtime.shutdown.set)
+        self._thread.join(timeout=3.0)
+        self.mic.stop()
+        if self.vision:
+            self.vision.close()
+        self.base.stop()
+        self.brain.close()
+        self.driver.recorder = None
+        self.driver.close()
+        self._tmp.cleanup()
+
+    # ------------------------------------------------------------------
+    # 측정
+    # ------------------------------------------------------------------
+    def _counters(self):
+        counters = telemetry.stats()["counters"]
+        return {
+            "route": self.brain.router.hits if self.brain.router else 0,
+            "cache": self.brain.cache.hits,
+            "speculation": counters.get("speculation.hits", 0),
+            "llm": self.genai.requests,
+        }
+
+    def _feedback(self):
+        feedback = self.driver.feedback
+        stats = feedback.stats() if feedback else {"cycles": 0, "overruns": 0}
+        return stats["cycles"], stats["overruns"], time.monotonic()
+
+    def run_turn(self, text):
+        for bus in self.driver.buses:
+            bus.portHandler.reset_stats()
+        self.probe.reset()
+        before = self._counters()
+        feedback_before = self._feedback()
+        t0 = time.perf_counter_ns()
+
+        wake_end = self.mic.play("히어로봇")
+        time.sleep(self.gap)
+        speech_end = self.mic.play(text)
+
+        # 응답이 끝나고, 계획한 궤적의 스트리밍이 모두 끝난 뒤 idle 초가 지나면 턴 종료
+        # (궤적 안의 정지 구간은 쉐도우 캐시로 패킷이 없으므로 패킷 유무로는 판단하지 않음)
+        # 첫 명령 후 max_motion 초가 지나도 동작 중이면 "멈춰" 처럼 선점 (긴 제스처가 다음 턴과 버스를 다투지 않게)
+        deadline = time.monotonic() + self.turn_timeout
+        timed_out, stopped = True, False
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            if self.probe.plan_at is None:
+                continue
+            events = [e for e in telemetry.events() if e[2] >= speech_end and e[0] == 'X']
+            plans = [e for e in events if e[1] == "plan"]
+            streams = [e for e in events if e[1] == "stream"]
+            now = time.perf_counter_ns()
+            if len(streams) < len(plans):
+                first = self.probe.first_command(plans[0][2] + plans[0][3])
+                if not stopped and self.max_motion and first and now - first > self.max_motion * 1e9:
+                    self.runtime.loop.call_soon_threadsafe(self.runtime.preempt)
+                    stopped = True
+                continue
+            last = max([self.probe.plan_at] + [e[2] + e[3] for e in streams])
+            if now - last > self.idle * 1e9:
+                timed_out = False
+                break
+
+        events = [e for e in telemetry.events() if e[2] + e[3] >= t0]
+        wake = _first(events, "wake", wake_end, ph='i')
+        record = _first(events, "record", speech_end)
+        safety = _first(events, "safety", speech_end)
+        plan = _first(events, "plan", speech_end)
+        think_end = (safety or plan or (None, None))[0]
+        # 첫 서보 명령 = 이번 턴의 궤적 계획 이후 실제로 값이 바뀌어 전송된 첫 프레임
+        first_command = self.probe.first_command(plan[1]) if plan else None
+        stages = {
+            "wake": _ms(wake_end, wake[0] if wake else None),
+            "endpoint": _ms(speech_end, record[1] if record else None),
+            "stt": _ms(record[1] if record else None, self.probe.text_at),
+            "think": _ms(self.probe.text_at, think_end),
+            "plan": _ms(think_end, plan[1] if plan else None),
+            "bus": _ms(plan[1] if plan else None, first_command),
+            "total": _ms(speech_end, first_command),
+        }
+
+        after = self._counters()
+        delta = {k: after[k] - before[k] for k in after}
+        path = next((k for k in ("route", "cache", "speculation", "llm") if delta[k] > 0), "none")
+        bus = {"tx_packets": 0, "rx_packets": 0, "tx_bytes": 0, "sync_write": 0, "sync_read": 0}
+        for b in self.driver.buses:
+            stats = b.portHandler.stats()
+            bus["tx_packets"] += stats["tx_packets"]
+            bus["rx_packets"] += stats["rx_packets"]
+            bus["tx_bytes"] += stats["tx_bytes"]
+            bus["sync_write"] += stats["instructions"].get("0x83", 0)
+            bus["sync_read"] += stats["instructions"].get("0x82", 0)
+
+        # 버스 경합: 이번 턴의 스트리밍 구간(지터/늦은 tick/계획 대비 늘어난 시간)과 피드백 주기
+        streams = [(dur, args or {}) for kind, name, _, dur, _, args in events if kind == 'X' and name == "stream"]
+        stream = {
+            "jitter_p99_ms": max((args.get("jitter_p99_ms", 0.0) for _, args in streams), default=None),
+            "overruns": sum(args.get("overruns", 0) for _, args in streams),
+            "skipped": sum(args.get("skipped", 0) for _, args in streams),
+            "busy": sum(args.get("busy", 0) for _, args in streams),
+            "comm_errors": sum(args.get("comm_errors", 0) for _, args in streams),
+            "stretch_ms": max((round(dur / 1e6 - args.get("duration", 0.0) * 1000.0, 3) for dur, args in streams),
+                              default=None),
+        }
+        cycles, overruns, started = feedback_before
+        cycles_after, overruns_after, finished = self._feedback()
+        feedback = {
+            "rate_hz": round((cycles_after - cycles) / (finished - started), 2) if finished > started else None,
+            "overruns": overruns_after - overruns,
+        }
+
+        turn = {"text": text, "heard": self.probe.text, "path": path, "timeout": timed_out, "stopped": stopped,
+                "stages": stages, "bus": bus, "stream": stream, "feedback": feedback}
+        self.turns.append(turn)
+        total = stages["total"]
+        contention = ""
+        if stream["overruns"] or stream["busy"] or stream["comm_errors"] or feedback["overruns"]:
+            contention = (f" / 늦은 tick {stream['overruns']}, 버스 대기 초과 {stream['busy']}, "
+                          f"통신 오류 {stream['comm_errors']}, 피드백 밀림 {feedback['overruns']}")
+        print(f"⏱️ [Bench] '{text}' ({path}) 말 끝 → 첫 서보 명령 "
+              f"{'-' if total is None else f'{total:.0f}ms'} "
+              + " ".join(f"{k}={v:.0f}" for k, v in stages.items() if v is not None and k != "total")
+              + f" / 패킷 {bus['tx_packets']}" + contention
+              + (" (타임아웃)" if timed_out else " (선점)" if stopped else ""))
+        return turn
+
+    def run(self, repeat=1):
+        for _ in range(repeat):
+            for item in self.script:
+                self.run_turn(item["text"])
+                time.sleep(self.gap)
+        return self.report()
+
+    def report(self):
+        by_path = {}
+        for turn in self.turns:
+            by_path.setdefault(turn["path"], []).append(turn["stages"]["total"])
+        timeouts = sum(turn["timeout"] for turn in self.turns)
+        stopped = sum(turn["stopped"] for turn in self.turns)
+        stream_overruns = sum(turn["stream"]["overruns"] for turn in self.turns)
+        feedback_overruns = sum(turn["feedback"]["overruns"] for turn in self.turns)
+
+        # 결과를 그대로 믿으면 안 되는 경우 (동작이 끝나기 전에 선점/타임아웃, 버스 경합)
+        flags = []
+        if stopped:
+            flags.append(f"{stopped}/{len(self.turns)} 턴이 동작을 끝내지 못하고 선점됨 (--max-motion {self.max_motion}s)")
+        if timeouts:
+            flags.append(f"{timeouts}/{len(self.turns)} 턴이 타임아웃됨")
+        if stream_overruns:
+            flags.append(f"스트리머가 한 주기 이상 늦은 tick {stream_overruns}회 (버스 경합)")
+        if feedback_overruns:
+            flags.append(f"피드백 폴링 주기 밀림 {feedback_overruns}회")
+        comm_errors = sum(turn["stream"]["comm_errors"] for turn in self.turns)
+        if comm_errors:
+            flags.append(f"스트리밍 중 통신 오류 {comm_errors}회")
+        return {
+            "meta": {
+                "commit": _git_commit(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "turns": len(self.turns),
+                "timeouts": timeouts,
+                "stopped": stopped,
+                "flags": flags,
+                "buses": [bus.name for bus in self.driver.buses],
+                "config": self.config,
+            },
+            "stages": {stage: summarize(turn["stages"][stage] for turn in self.turns) for stage in STAGES},
+            "paths": {path: summarize(values) for path, values in by_path.items()},
+            "bus_per_turn": {key: summarize((turn["bus"][key] for turn in self.turns), unit=None)
+                             for key in ("tx_packets", "sync_write", "sync_read", "tx_bytes")},
+            "stream": {
+                "jitter_p99": summarize(turn["stream"]["jitter_p99_ms"] for turn in self.turns),
+                "stretch": summarize(turn["stream"]["stretch_ms"] for turn in self.turns),
+                "overruns": summarize((turn["stream"]["overruns"] for turn in self.turns), unit=None),
+                "busy": summarize((turn["stream"]["busy"] for turn in self.turns), unit=None),
+            },
+            "feedback": {
+                "rate_hz": summarize((turn["feedback"]["rate_hz"] for turn in self.turns), unit=None),
+                "overruns": summarize((turn["feedback"]["overruns"] for turn in self.turns), unit=None),
+            },
+            "llm": self.brain.llm.stats(),
+            "turns": self.turns,
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(report, baseline, tolerance=0.10, key="p95_ms"):
+    """기준 보고서와 단계별 비교 → (표 문자열, total 이 tolerance 이상 느려졌는지)"""
+    lines = [f"📈 [Bench] 기준 {baseline['meta'].get('commit')} → 현재 {report['meta'].get('commit')} ({key})"]
+    for name, r in (("기준", baseline), ("현재", report)):
+        if r["meta"].get("flags"):
+            lines.append(f"   ⚠️ {name} 보고서에 경고가 있어 비교가 정확하지 않을 수 있음")
+    regressed = False
+    for stage in STAGES:
+        old = baseline["stages"].get(stage, {}).get(key)
+        new = report["stages"].get(stage, {}).get(key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = " ⚠️"
+            regressed = regressed or stage == "total"
+        lines.append(f"   {stage:<9} {old:9.1f}ms → {new:9.1f}ms ({change:+.1%}){flag}")
+    return "\n".join(lines), regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Herobot 종단 간 상호작용 지연 벤치마크 (대역 하드웨어)")
+    parser.add_argument("--script", help="대본 JSON: [{\"text\", \"wav\"(옵션), \"plan\"(옵션)}]")
+    parser.add_argument("--wake-wav", help="호출어 WAV (없으면 합성)")
+    parser.add_argument("--spec", default="config/hardware_spec.json")
+    parser.add_argument("--repeat", type=int, default=3, help="대본 반복 횟수 (2회째부터 LLM 응답은 캐시 적중)")
+    parser.add_argument("--stt-ms", type=float, default=300, help="가짜 STT 지연")
+    parser.add_argument("--first-token-ms", type=float, default=600, help="가짜 Gemini 첫 토큰 지연")
+    parser.add_argument("--token-ms", type=float, default=20, help="가짜 Gemini 청크 간격")
+    parser.add_argument("--max-motion", type=float, default=3.0, help="첫 명령 후 이 시간(초)이 지나면 동작 선점 (0: 끝까지)")
+    parser.add_argument("--no-vision", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="latency_report.json", help="JSON 보고서 경로")
+    parser.add_argument("--baseline", help="비교할 이전 보고서 (total p95 가 tolerance 이상 늘면 종료 코드 1)")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            script = json.load(f)
+
+    telemetry.start_reporter(interval=0)
+    bench = LatencyBench(script=script, wake_wav=args.wake_wav, spec_path=args.spec,
+                         stt_latency=args.stt_ms / 1000.0, first_token=args.first_token_ms / 1000.0,
+                         token_interval=args.token_ms / 1000.0, max_motion=args.max_motion,
+                         vision=not args.no_vision, seed=args.seed)
+    bench.setup()
+    try:
+        report = bench.run(repeat=args.repeat)
+    finally:
+        bench.close()
+        telemetry.stop_reporter()
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n📊 [Bench] 단계별 지연 (말 끝 기준)")
+    for stage, s in report["stages"].items():
+        if s["n"]:
+            print(f"   {stage:<9} n={s['n']:<3} p50 {s['p50_ms']:8.1f}ms  p95 {s['p95_ms']:8.1f}ms  "
+                  f"p99 {s['p99_ms']:8.1f}ms")
+    for path, s in report["paths"].items():
+        if s["n"]:
+            print(f"   [{path}] total p50 {s['p50_ms']:.1f}ms / p95 {s['p95_ms']:.1f}ms (n={s['n']})")
+    packets = report["bus_per_turn"]["tx_packets"]
+    if packets["n"]:
+        print(f"   턴당 버스 패킷 p50 {packets['p50']:.0f} / p95 {packets['p95']:.0f}")
+    jitter, stretch, rate = report["stream"]["jitter_p99"], report["stream"]["stretch"], report["feedback"]["rate_hz"]
+    if jitter["n"]:
+        print(f"   스트리머 지터 p99 (턴 최대) p50 {jitter['p50_ms']:.1f}ms / max {jitter['max_ms']:.1f}ms, "
+              f"궤적 늘어남 p95 {stretch['p95_ms']:.0f}ms")
+    if rate["n"]:
+        print(f"   피드백 주기 p50 {rate['p50']:.1f}Hz, 밀림 합계 {sum(t['feedback']['overruns'] for t in report['turns'])}")
+    for flag in report["meta"]["flags"]:
+        print(f"⚠️ [Bench] {flag}")
+    print(f"🧾 [Bench] 보고서 저장: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        table, regressed = compare(report, baseline, args.tolerance)
+        print(table)
+        if regressed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
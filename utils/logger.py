@@ -0,0 +1,235 @@
+import os
+import json
+import math
+import time
+import queue
+import itertools
+import threading
+import numpy as np
+
+
+class Histogram:
+    """
+    로그 눈금 히스토그램 (1µs ~ 약 30s, 한 옥타브를 4칸으로: 칸 폭 약 19%)
+    - 관측은 칸 카운트 하나만 올리므로 값 목록을 보관하지 않음
+    """
+
+    PER_OCTAVE = 4
+    N_BUCKETS = 100
+
+    def __init__(self):
+        self.counts = np.zeros(self.N_BUCKETS, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, us):
+        b = int(math.log2(us) * self.PER_OCTAVE) + 1 if us >= 1.0 else 0
+        self.counts[min(b, self.N_BUCKETS - 1)] += 1
+        self.n += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, q):
+        """q(0~100) 분위수의 칸 상한값 (µs)"""
+        if self.n == 0:
+            return None
+        b = int(np.searchsorted(np.cumsum(self.counts), self.n * q / 100.0))
+        return min(2.0 ** (b / self.PER_OCTAVE), self.max)
+
+    def summary(self):
+        if self.n == 0:
+            return {"n": 0}
+        return {
+            "n": self.n,
+            "mean_ms": round(self.total / self.n / 1000.0, 3),
+            "p50_ms": round(self.percentile(50) / 1000.0, 3),
+            "p95_ms": round(self.percentile(95) / 1000.0, 3),
+            "p99_ms": round(self.percentile(99) / 1000.0, 3),
+            "max_ms": round(self.max / 1000.0, 3),
+        }
+
+
+class Span:
+    """with telemetry.span("이름", key=값): ... → 구간 이벤트 + 같은 이름의 히스토그램"""
+
+    __slots__ = ('telemetry', 'name', 'args', 't0')
+
+    def __init__(self, telemetry, name, args):
+        self.telemetry = telemetry
+        self.name = name
+        self.args = args
+        self.t0 = 0
+
+    def set(self, key, value):
+        """구간 안에서 알게 된 값(결과 코드 등)을 인자로 추가"""
+        if self.args is None:
+            self.args = {}
+        self.args[key] = value
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.t0
+        if exc_type is not None:
+            self.set('error', exc_type.__name__)
+        self.telemetry._record('X', self.name, self.t0, duration, self.args)
+        self.telemetry.observe(self.name, duration / 1000.0)
+        return False
+
+
+class Telemetry:
+    """
+    ★ 저부하 구조화 텔레메트리
+    - span / event 는 (종류, 이름, 시각 ns, 길이 ns, 스레드, 인자) 튜플 하나를 고정 크기 링 버퍼에 넣기만 함
+      (슬롯 번호는 itertools.count 로 받으므로 잠금 없음, 시각은 perf_counter_ns 단조 시계)
+    - 카운터 / 히스토그램(µs)은 작은 잠금 하나로 갱신
+    - 문자열 포맷/출력은 hot path 밖에서: log() 는 (포맷, 인자) 만 큐에 넣고 리포터 스레드가 출력,
+      Chrome trace / 통계 요약은 요청할 때 링 버퍼에서 만듦
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.ring = [None] * capacity
+        self._seq = itertools.count()
+        self.t0 = time.perf_counter_ns()
+
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._threads = {}
+
+        self._messages = queue.SimpleQueue()
+        self._reporter = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # 기록 (hot path)
+    # ------------------------------------------------------------------
+    def span(self, name, **args):
+        return Span(self, name, args or None)
+
+    def event(self, name, **args):
+        """순간 이벤트 (Chrome trace 의 instant)"""
+        self._record('i', name, time.perf_counter_ns(), 0, args or None)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, us):
+        """히스토그램에 값 하나 (µs)"""
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(us)
+
+    def since(self, name, t0_ns, **args):
+        """t0_ns(perf_counter_ns) 부터 지금까지를 구간으로 기록 (여러 스레드/태스크에 걸친 구간용)"""
+        now = time.perf_counter_ns()
+        self._record('X', name, t0_ns, now - t0_ns, args or None)
+        self.observe(name, (now - t0_ns) / 1000.0)
+
+    def log(self, fmt, *args):
+        """
+        지연 출력: 포맷은 리포터 스레드에서 수행
+        - 리포터가 없으면 (check_motors 같은 단독 실행) 바로 출력
+        """
+        if self._reporter is None:
+            print(fmt.format(*args))
+        else:
+            self._messages.put((fmt, args))
+
+    def _record(self, ph, name, t_ns, dur_ns, args):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self.ring[next(self._seq) % self.capacity] = (ph, name, t_ns, dur_ns, tid, args)
+
+    # ------------------------------------------------------------------
+    # 조회 / 내보내기 (hot path 밖)
+    # ------------------------------------------------------------------
+    def events(self):
+        """링 버퍼의 이벤트를 시간순으로"""
+        return sorted((e for e in list(self.ring) if e is not None), key=lambda e: e[2])
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {name: hist.summary() for name, hist in self.histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def summary(self):
+        """사람이 읽는 통계 요약 문자열"""
+        stats = self.stats()
+        lines = ["📊 [Telemetry] 통계 요약"]
+        for name, h in sorted(stats["histograms"].items()):
+            if h["n"]:
+                lines.append(f"   {name:<28} n={h['n']:<6} p50 {h['p50_ms']:>8.2f}ms  p99 {h['p99_ms']:>8.2f}ms  "
+                             f"max {h['max_ms']:>8.2f}ms")
+        for name, value in sorted(stats["counters"].items()):
+            lines.append(f"   {name:<28} {value}")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        """chrome://tracing / Perfetto 에서 열 수 있는 JSON 으로 저장"""
+        pid = os.getpid()
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in list(self._threads.items())]
+        for ph, name, t_ns, dur_ns, tid, args in self.events():
+            item = {"name": name, "ph": ph, "ts": (t_ns - self.t0) / 1000.0, "pid": pid, "tid": tid}
+            if ph == 'X':
+                item["dur"] = dur_ns / 1000.0
+            else:
+                item["s"] = "t"
+            if args:
+                item["args"] = {k: v if isinstance(v, (int, float, str, bool)) else str(v) for k, v in args.items()}
+            trace.append(item)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        print(f"🧾 [Telemetry] Chrome trace 저장: {path} ({len(trace)}개 이벤트)")
+        return path
+
+    # ------------------------------------------------------------------
+    # 리포터 스레드
+    # ------------------------------------------------------------------
+    def start_reporter(self, interval=60.0):
+        """지연 로그를 출력하고 interval 초마다 통계 요약을 출력 (interval 이 0 이면 요약 생략)"""
+        if self._reporter is not None:
+            return
+        self._stop.clear()
+        self._reporter = threading.Thread(target=self._report_loop, args=(interval,), name="telemetry", daemon=True)
+        self._reporter.start()
+
+    def stop_reporter(self):
+        if self._reporter is None:
+            return
+        self._stop.set()
+        self._reporter.join(timeout=1.0)
+        self._reporter = None
+        self._drain()
+
+    def _report_loop(self, interval):
+        next_summary = time.monotonic() + interval
+        while not self._stop.wait(0.2):
+            self._drain()
+            if interval and time.monotonic() >= next_summary:
+                print(self.summary())
+                next_summary += interval
+
+    def _drain(self):
+        while True:
+            try:
+                fmt, args = self._messages.get_nowait()
+            except queue.Empty:
+                return
+            print(fmt.format(*args))
+
+
+# 프로세스 전체에서 공유하는 인스턴스
+telemetry = Telemetry()
@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+# ==============================================================================
+# 📼 세션 기록 파일 형식
+# ==============================================================================
+# 모든 레코드는 256바이트 고정 크기 → np.memmap 으로 바로 배열처럼 읽음 (파싱 없음)
+#   t       f8   세션 시작 후 경과 시간 (monotonic 초)
+#   seq     u4   메시지 번호 (여러 레코드로 나뉜 메시지는 같은 seq)
+#   kind    u1   레코드 종류 (아래 KIND_*)
+#   n       u1   payload 에서 유효한 항목 수 (텍스트는 바이트 수)
+#   part    u1   나뉜 메시지의 조각 번호
+#   flags   u1   FLAG_LAST: 메시지의 마지막 조각
+#   payload 240바이트 = int32 × 60
+RECORD = np.dtype([
+    ('t', '<f8'), ('seq', '<u4'), ('kind', 'u1'), ('n', 'u1'), ('part', 'u1'), ('flags', 'u1'),
+    ('payload', 'u1', 240),
+])
+PAYLOAD_INTS = 60
+MAGIC = b"HEROBOT-REC\x00"
+VERSION = 1
+
+KIND_HEADER = 0     # payload: MAGIC + JSON(버전, 시작 시각, 포트)
+KIND_INPUT = 1      # 사용자 발화 (UTF-8, 조각)
+KIND_PLAN = 2       # LLM 계획 JSON (UTF-8, 조각)
+KIND_NOTE = 3       # 기타 메모 (UTF-8, 조각)
+KIND_COMMAND = 4    # move_joints 로 실제 전송된 프레임: n × (id, profile, value)
+KIND_REGISTER = 5   # 레지스터 쓰기: (addr, length) + n × (id, value)  (4바이트 이하 단위)
+KIND_FEEDBACK = 6   # 상태 피드백: n × (id, 전류, 속도, 위치, 전압, 온도), 10모터씩 조각
+
+FLAG_LAST = 1
+
+TEXT_BYTES = 240
+COMMAND_WIDTH = 3
+FEEDBACK_WIDTH = 6
+
+
+class SessionRecorder:
+    """
+    ★ 세션 기록기 (추가 전용 고정 레코드 파일)
+    - 사용자 발화, LLM 계획, DxlDriver 가 실제로 보낸 명령/레지스터 쓰기, 상태 피드백을 시간순으로 기록
+    - 레코드 하나 = 미리 할당된 numpy 레코드를 채워 write 한 번 (버퍼링 없이 OS 로 바로 → 프로세스가 죽어도 남음)
+    - 여러 스레드(motion / face-tracker / dxl-feedback / llm)에서 부르므로 쓰기는 잠금 하나로 직렬화
+    """
+
+    def __init__(self, path, feedback_every=1, meta=None):
+        self.path = path
+        self.feedback_every = max(int(feedback_every), 1)
+        self.t0 = time.monotonic()
+        self.n_records = 0
+        self._seq = 0
+        self._feedback_count = 0
+
+        self._record = np.zeros(1, dtype=RECORD)
+        self._ints = self._record['payload'][0].view('<i4')
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb', buffering=0)
+
+        header = dict(meta or {}, version=VERSION, started=time.time())
+        data = MAGIC + json.dumps(header, ensure_ascii=False).encode('utf-8')
+        self._write_bytes(KIND_HEADER, data[:TEXT_BYTES], 0.0)
+        print(f"📼 [Recorder] 세션 기록 시작: {path}")
+
+    # ------------------------------------------------------------------
+    # 텍스트 (발화 / 계획)
+    # ------------------------------------------------------------------
+    def user_input(self, text):
+        self._text(KIND_INPUT, text)
+
+    def plan(self, plan):
+        self._text(KIND_PLAN, json.dumps(plan, ensure_ascii=False, separators=(',', ':')))
+
+    def note(self, text):
+        self._text(KIND_NOTE, text)
+
+    def _text(self, kind, text):
+        data = (text or "").encode('utf-8')
+        t = time.monotonic() - self.t0
+        chunks = [data[i:i + TEXT_BYTES] for i in range(0, len(data), TEXT_BYTES)] or [b""]
+        with self._lock:
+            self._seq += 1
+            for part, chunk in enumerate(chunks):
+                self._write_bytes(kind, chunk, t, part=part, last=part == len(chunks) - 1, seq=self._seq)
+
+    def _write_bytes(self, kind, data, t, part=0, last=True, seq=0):
+        rec = self._record[0]
+        rec['payload'][:] = 0
+        rec['payload'][:len(data)] = np.frombuffer(data, dtype=np.uint8)
+        self._emit(kind, len(data), t, part, last, seq)
+
+    # ------------------------------------------------------------------
+    # 버스 (드라이버에서 호출)
+    # ------------------------------------------------------------------
+    def command(self, rows):
+        """rows: [(id, profile, value), ...] (move_joints 가 보낸 순서)"""
+        t = time.monotonic() - self.t0
+        with self._lock:
+            self._seq += 1
+            self._rows(KIND_COMMAND, rows, COMMAND_WIDTH, t)
+
+    def register(self, addr, length, values):
+        """values: {id: 바이트열} (write_register / sync_write_register 에서 성공한 쓰기)"""
+        t = time.monotonic() - self.t0
+        with self._lock:
+            self._seq += 1
+            # 4바이트보다 긴 쓰기(간접 주소 맵 등)는 4바이트 단위로 나눔
+            length_max = max(len(data) for data in values.values())
+            for offset in range(0, length_max, 4):
+                rows = [(dxl_id, int.from_bytes(bytes(data[offset:offset + 4]), 'little', signed=True))
+                        for dxl_id, data in values.items() if offset < len(data)]
+                width = min(4, length - offset)
+                per_record = (PAYLOAD_INTS - 2) // 2
+                for part, start in enumerate(range(0, len(rows), per_record)):
+                    chunk = rows[start:start + per_record]
+                    ints = self._ints
+                    ints[:] = 0
+                    ints[0], ints[1] = addr + offset, width
+                    ints[2:2 + 2 * len(chunk)] = np.asarray(chunk, dtype=np.int32).ravel()
+                    last = offset + 4 >= length_max and start + per_record >= len(rows)
+                    self._emit(KIND_REGISTER, len(chunk), t, part, last, self._seq)
+
+    def feedback(self, stamp, ids, state):
+        """stamp: time.monotonic() 시각, state: StateFeedback 슬롯 [max_id+1, 필드]"""
+        self._feedback_count += 1
+        if self._feedback_count % self.feedback_every:
+            return
+        rows = np.empty((len(ids), FEEDBACK_WIDTH), dtype=np.int32)
+        rows[:, 0] = ids
+        rows[:, 1:] = state[ids]
+        with self._lock:
+            self._seq += 1
+            self._rows(KIND_FEEDBACK, rows, FEEDBACK_WIDTH, stamp - self.t0)
+
+    def _rows(self, kind, rows, width, t):
+        rows = np.asarray(rows, dtype=np.int32).reshape(-1, width)
+        per_record = PAYLOAD_INTS // width
+        n_parts = max((len(rows) + per_record - 1) // per_record, 1)
+        for part in range(n_parts):
+            chunk = rows[part * per_record:(part + 1) * per_record]
+            self._ints[:] = 0
+            self._ints[:chunk.size] = chunk.ravel()
+            self._emit(kind, len(chunk), t, part, part == n_parts - 1, self._seq)
+
+    def _emit(self, kind, n, t, part, last, seq):
+        if self._file is None:
+            return
+        rec = self._record[0]
+        rec['t'] = t
+        rec['seq'] = seq
+        rec['kind'] = kind
+        rec['n'] = n
+        rec['part'] = part
+        rec['flags'] = FLAG_LAST if last else 0
+        self._file.write(self._record.tobytes())
+        self.n_records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        print(f"📼 [Recorder] 세션 기록 종료: {self.path} ({self.n_records}개 레코드, "
+              f"{self.n_records * RECORD.itemsize / 1024:.1f}KB)")
+
+
+class SessionLog:
+    """
+    ★ 세션 기록 읽기 (np.memmap, 파싱 없음)
+    - records: 전체 레코드 배열 (파일 그대로)
+    - 종류별 선택은 boolean 인덱싱, 행 데이터는 payload 의 int32 뷰
+    """
+
+    def __init__(self, path):
+        self.path = path
+        size = os.path.getsize(path)
+        # 기록 중 잘린 마지막 레코드는 무시
+        count = size // RECORD.itemsize
+        self.records = np.memmap(path, dtype=RECORD, mode='r', shape=(count,)) if count else np.zeros(0, RECORD)
+        if count == 0 or self.records[0]['kind'] != KIND_HEADER or \
+                bytes(self.records[0]['payload'][:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"세션 기록 파일이 아닙니다: {path}")
+        head = self.records[0]
+        self.meta = json.loads(bytes(head['payload'][len(MAGIC):head['n']]).decode('utf-8'))
+
+    @property
+    def duration(self):
+        return float(self.records['t'][-1]) if len(self.records) else 0.0
+
+    def counts(self):
+        kinds = np.bincount(self.records['kind'], minlength=KIND_FEEDBACK + 1)
+        names = ["header", "input", "plan", "note", "command", "register", "feedback"]
+        return {name: int(kinds[i]) for i, name in enumerate(names)}
+
+    def texts(self, kind):
+        """[(t, 문자열)] (조각을 seq 로 이어 붙임)"""
+        recs = self.records[self.records['kind'] == kind]
+        out, parts = [], []
+        for rec in recs:
+            parts.append(bytes(rec['payload'][:rec['n']]))
+            if rec['flags'] & FLAG_LAST:
+                out.append((float(rec['t']), b"".join(parts).decode('utf-8', errors='replace')))
+                parts = []
+        return out
+
+    def inputs(self):
+        return self.texts(KIND_INPUT)
+
+    def plans(self):
+        """[(t, 계획 dict)]"""
+        return [(t, json.loads(text)) for t, text in self.texts(KIND_PLAN)]
+
+    def rows(self, kind, width):
+        """[(t, seq, int32 행 배열 [n, width])] (조각을 합침)"""
+        recs = self.records[self.records['kind'] == kind]
+        ints = recs['payload'].view('<i4').reshape(len(recs), PAYLOAD_INTS)
+        out, parts = [], []
+        for i, rec in enumerate(recs):
+            parts.append(ints[i, :rec['n'] * width].reshape(-1, width))
+            if rec['flags'] & FLAG_LAST:
+                out.append((float(rec['t']), int(rec['seq']), np.concatenate(parts)))
+                parts = []
+        return out
+
+    def commands(self):
+        return self.rows(KIND_COMMAND, COMMAND_WIDTH)
+
+    def feedback(self):
+        return self.rows(KIND_FEEDBACK, FEEDBACK_WIDTH)
+
+    def bus_events(self):
+        """명령 + 레지스터 쓰기를 기록 순서대로: [(t, 'command', rows) | (t, 'register', (addr, width, rows))]"""
+        mask = (self.records['kind'] == KIND_COMMAND) | (self.records['kind'] == KIND_REGISTER)
+        recs = self.records[mask]
+        ints = recs['payload'].view('<i4').reshape(len(recs), PAYLOAD_INTS)
+        events, parts = [], []
+        for i, rec in enumerate(recs):
+            if rec['kind'] == KIND_COMMAND:
+                parts.append(ints[i, :rec['n'] * COMMAND_WIDTH].reshape(-1, COMMAND_WIDTH))
+                if rec['flags'] & FLAG_LAST:
+                    events.append((float(rec['t']), 'command', np.concatenate(parts)))
+                    parts = []
+            else:
+                rows = ints[i, 2:2 + rec['n'] * 2].reshape(-1, 2)
+                events.append((float(rec['t']), 'register', (int(ints[i, 0]), int(ints[i, 1]), rows)))
+        return events
+
+    def compare_commands(self, other):
+        """두 세션의 명령 프레임을 순서대로 비교 → 처음 다른 프레임 번호 (같으면 None)"""
+        mine, theirs = self.commands(), other.commands()
+        for i, ((_, _, a), (_, _, b)) in enumerate(zip(mine, theirs)):
+            if a.shape != b.shape or not np.array_equal(a, b):
+                return i
+        return None if len(mine) == len(theirs) else min(len(mine), len(theirs))
+
+
+class SessionReplayer:
+    """
+    ★ 기록된 세션을 드라이버(실제 또는 sim)로 다시 실행
+    - replay_bus(): 기록된 명령 프레임/레지스터 쓰기를 그대로 재전송 (speed=1.0 실시간, None 이면 최대 속도)
+    - replay_plans(): 기록된 LLM 계획을 LLM 호출 없이 안전 검사 → 궤적 계획 → 스트리밍으로 다시 실행
+    """
+
+    def __init__(self, log, driver):
+        self.log = log if isinstance(log, SessionLog) else SessionLog(log)
+        self.driver = driver
+        self.names = {info['id']: name for name, info in driver.motors.items()}
+
+    def replay_bus(self, speed=1.0, include_registers=True, stop_event=None):
+        events = self.log.bus_events()
+        print(f"▶️ [Replay] 버스 이벤트 {len(events)}개 재생 ({'최대 속도' if not speed else f'{speed}x'})")
+        t_start = time.monotonic()
+        t_first = events[0][0] if events else 0.0
+        sent = 0
+        for t, kind, payload in events:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if speed:
+                delay = t_start + (t - t_first) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            if kind == 'command':
+                frame = {self.names[int(dxl_id)]: (int(value), int(profile))
+                         for dxl_id, profile, value in payload.tolist() if int(dxl_id) in self.names}
+                self.driver.move_joints(frame)
+            elif include_registers:
+                addr, width, rows = payload
+                self.driver.sync_write_register(addr, width, {int(i): int(v) & ((1 << (8 * width)) - 1)
+                                                              for i, v in rows.tolist()})
+            sent += 1
+        elapsed = time.monotonic() - t_start
+        print(f"⏹️ [Replay] {sent}개 재생 완료 ({elapsed:.2f}s, 원본 {self.log.duration:.2f}s)")
+        return sent
+
+    def replay_plans(self, planner, streamer, validator=None, library=None):
+        """기록된 계획 → (prim 펼침) → 안전 검사 → 궤적 → 스트리밍. 실행한 계획 수 반환"""
+        count = 0
+        for t, plan in self.log.plans():
+            motions = plan.get('motions', [])
+            if library is not None:
+                motions = library.expand_all(motions)
+            if validator is not None:
+                result = validator.check(motions, start=planner.current_positions(self.driver.feedback))
+                if result.rejected:
+                    print(f"🙅 [Replay] {t:.2f}s 계획 거절: {result.reasons}")
+                    continue
+                motions = result.motions
+            trajectory = planner.plan(motions, start=planner.current_positions(self.driver.feedback))
+            print(f"▶️ [Replay] {t:.2f}s 계획: {plan.get('text', '')!s:.40} ({trajectory.duration:.2f}s)")
+            streamer.run(trajectory)
+            count += 1
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Herobot 세션 기록 조회/재생")
+    parser.add_argument("path", help="세션 기록 파일 (.rec)")
+    parser.add_argument("--replay", choices=["bus", "plans"], help="bus: 명령 그대로 재전송, plans: 계획 다시 실행")
+    parser.add_argument("--port", default="sim", help="재생할 포트 (기본 sim)")
+    parser.add_argument("--fast", action="store_true", help="시간 간격 무시하고 최대 속도로 재생")
+    parser.add_argument("--record", help="재생 결과를 새 기록 파일로 저장 (원본과 명령 비교)")
+    args = parser.parse_args()
+
+    log = SessionLog(args.path)
+    print(f"📼 {args.path}: {log.meta}")
+    print(f"   {log.duration:.2f}s, {log.counts()}")
+    for t, text in log.inputs():
+        print(f"   {t:8.2f}s 🗣️ {text}")
+
+    if not args.replay:
+        return
+
+    from hardware.dxl_driver import DxlDriver
+    driver = DxlDriver(port=args.port)
+    recorder = None
+    if args.record:
+        recorder = SessionRecorder(args.record, meta={"replay_of": args.path, "port": args.port})
+        driver.recorder = recorder
+    try:
+        replayer = SessionReplayer(log, driver)
+        if args.replay == "bus":
+            replayer.replay_bus(speed=None if args.fast else 1.0)
+        else:
+            from motion.motion_planner import MotionPlanner, TrajectoryStreamer
+            from motion.primitives import PrimitiveLibrary
+            from motion.safety_validator import SafetyValidator
+            replayer.replay_plans(MotionPlanner(driver.spec), TrajectoryStreamer(driver, rate_hz=30),
+                                  SafetyValidator(driver.spec), PrimitiveLibrary(driver.spec))
+    finally:
+        # 종료 시 바퀴 정지 명령은 재생 결과가 아니므로 기록하지 않음
+        driver.recorder = None
+        driver.close()
+        if recorder:
+            recorder.close()
+            diff = log.compare_commands(SessionLog(args.record))
+            print("✅ [Replay] 명령 프레임 일치" if diff is None else f"❌ [Replay] {diff}번째 명령 프레임부터 다름")
+
+
+if __name__ == "__main__":
+    main()